@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Measure CLI startup import time for each subcommand.
+
+Run each command in a new interpreter with ``-X importtime``
+and report total import time, number of imported modules
+and process wall time.
+
+Usage: python3 benchmarks/cli_import.py [repeat]
+"""
+
+import os
+import sys
+import subprocess
+from tempfile import TemporaryDirectory
+from timeit import default_timer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def run(args, repeat):
+    cmd = [sys.executable, '-X', 'importtime', '-m', 'markovchain'] + args
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    best = None
+    for _ in range(repeat):
+        start = default_timer()
+        res = subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.PIPE,
+                             universal_newlines=True)
+        elapsed = default_timer() - start
+        total = 0
+        modules = 0
+        for line in res.stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            try:
+                total += int(line.split('|')[0].split(':')[1])
+            except ValueError:
+                continue
+            modules += 1
+        if best is None or elapsed < best[0]:
+            best = (elapsed, total, modules)
+    return best
+
+
+def main(repeat=5):
+    with TemporaryDirectory() as tmp:
+        data = os.path.join(tmp, 'data.txt')
+        state = os.path.join(tmp, 'state.json')
+        with open(data, 'wt') as fp:
+            fp.write('aa bb cc. bb cc dd.')
+        subprocess.check_call(
+            [sys.executable, '-m', 'markovchain',
+             'text', 'create', '-o', state, data],
+            env=dict(os.environ, PYTHONPATH=ROOT)
+        )
+        commands = [
+            ['text', 'generate', '-c', '1', state],
+            ['text', 'settings', state],
+            ['text', '-h'],
+            ['image', '-h'],
+            ['serve', '-h'],
+            ['-h']
+        ]
+        for args in commands:
+            elapsed, total, modules = run(args, repeat)
+            name = ' '.join('state.json' if arg == state else arg
+                            for arg in args)
+            print('%-32s %8.1f ms import %4d modules %8.1f ms total'
+                  % (name, total / 1000, modules, elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Compare image parsing with and without a level cache.
+
+Parse a large random image resized by the scanner and converted
+to the default dithered palette, with and without a warm level cache.
+
+Usage: python3 benchmarks/image_cache.py [size] [resize] [repeat]
+"""
+
+import os
+import sys
+import random
+from tempfile import TemporaryDirectory
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image  # pylint:disable=wrong-import-position
+from markovchain import JsonStorage  # pylint:disable=wrong-import-position
+from markovchain.image import (  # pylint:disable=wrong-import-position
+    MarkovImage, ImageScanner, LevelCache
+)
+
+
+def random_image(size, seed=0):
+    rnd = random.Random(seed)
+    data = rnd.getrandbits(8 * size * size * 3).to_bytes(size * size * 3,
+                                                         'little')
+    return Image.frombytes('RGB', (size, size), data)
+
+
+def timeit(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = default_timer()
+        res = func()
+        elapsed = default_timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, res
+
+
+def parse(markov, fname, cache=None):
+    markov.storage = JsonStorage()
+    if cache is None:
+        markov.data(Image.open(fname))
+        return
+    key = cache.key(fname, markov)
+    pyramids = cache.get(key)
+    if pyramids is None:
+        pyramids = markov.pyramids(Image.open(fname))
+        cache.put(key, pyramids)
+    markov.data_pyramids(pyramids)
+
+
+def main(size=3072, resize=256, repeat=3):
+    img = random_image(size)
+    markov = MarkovImage(
+        levels=2,
+        scanner=ImageScanner(resize=(resize, resize), levels=2,
+                             level_scale=4)
+    )
+    with TemporaryDirectory() as tmp:
+        fname = os.path.join(tmp, 'img.png')
+        img.save(fname)
+        cache = LevelCache(os.path.join(tmp, 'cache'))
+        parse(markov, fname, cache)
+        t_parse, _ = timeit(lambda: parse(markov, fname), repeat)
+        t_cached, _ = timeit(lambda: parse(markov, fname, cache), repeat)
+
+    print('size: %d, resize: %d' % (size, resize))
+    print('parse:            %8.3fs' % t_parse)
+    print('parse (cached):   %8.3fs' % t_cached)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Compare per-channel and fused image channel scanning.
+
+Scan and parse a random RGB image with each channel traversed
+separately and with all channels traversed at once.
+
+Usage: python3 benchmarks/image_channels.py [size] [levels] [repeat]
+"""
+
+import os
+import sys
+import random
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image  # pylint:disable=wrong-import-position
+from markovchain.image import MarkovImage, ImageScanner  # pylint:disable=wrong-import-position
+from markovchain.image.type import RGB  # pylint:disable=wrong-import-position
+
+
+class NullStorage:  # pylint:disable=too-few-public-methods
+    def add_links(self, links, dataset_prefix=''):  # pylint:disable=unused-argument
+        for _ in links:
+            pass
+
+
+def random_image(size, seed=0):
+    rnd = random.Random(seed)
+    data = bytes(rnd.getrandbits(8) for _ in range(size * size * 3))
+    return Image.frombytes('RGB', (size, size), data)
+
+
+def scan(scanner, channels):
+    count = 0
+    for levels in scanner.scan_channels(channels):
+        for level in levels:
+            for _ in level:
+                count += 1
+    return count
+
+
+def timeit(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = default_timer()
+        res = func()
+        elapsed = default_timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, res
+
+
+def main(size=1024, levels=4, repeat=3):
+    img = random_image(size)
+    markov = MarkovImage(
+        levels=levels,
+        imgtype=RGB(),
+        scanner=ImageScanner(levels=levels, level_scale=4),
+        storage=NullStorage()
+    )
+    channels = markov.imgtype.convert(img)
+
+    print('size: %d, levels: %d' % (size, levels))
+    for fused in (False, True):
+        markov.scanner.fused = fused
+        t_scan, count = timeit(lambda: scan(markov.scanner, channels), repeat)
+        t_data, _ = timeit(lambda: markov.data(img), repeat)
+        print('fused=%-5s scan: %8.3fs (%d tokens) scan+parse: %8.3fs'
+              % (fused, t_scan, count, t_data))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Compare image scanner level construction and pixel access.
+
+Build image levels by resizing the input image for every level
+and by downscaling each level from the next one, then scan
+the levels with ``getpixel`` and with pixel access objects.
+
+Usage: python3 benchmarks/image_pyramid.py [size] [levels] [repeat]
+"""
+
+import os
+import sys
+import random
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image  # pylint:disable=wrong-import-position
+from markovchain.image import ImageScanner  # pylint:disable=wrong-import-position
+from markovchain.image.type import RGB  # pylint:disable=wrong-import-position
+from markovchain.image.util import pixel_to_state  # pylint:disable=wrong-import-position
+
+
+def random_image(size, seed=0):
+    rnd = random.Random(seed)
+    data = bytes(rnd.getrandbits(8) for _ in range(size * size * 3))
+    return Image.frombytes('RGB', (size, size), data)
+
+
+def scan_getpixel(scanner, levels):
+    """Scan image levels with ``getpixel`` (previous implementation)."""
+    count = 0
+    prev = None
+    for level, img in enumerate(levels):
+        if level == 0:
+            width, height = img.size
+            for xy in scanner.traversal[0](width, height, True):
+                if xy is not None:
+                    pixel_to_state(img.getpixel(xy))
+                    count += 1
+        else:
+            width, height = prev.size
+            scale = scanner.level_scale[level - 1]
+            for xy in scanner.traversal[0](width, height, False):
+                x0 = xy[0] * scale
+                y0 = xy[1] * scale
+                pixel_to_state(prev.getpixel(xy))
+                for dxy in scanner.traversal[level](scale, scale, True):
+                    if dxy is not None:
+                        pixel_to_state(
+                            img.getpixel((x0 + dxy[0], y0 + dxy[1]))
+                        )
+                        count += 1
+        prev = img
+    return count
+
+
+def scan(scanner, img):
+    count = 0
+    for level in scanner(img):
+        for token in level:
+            if isinstance(token, str):
+                count += 1
+    return count
+
+
+def timeit(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = default_timer()
+        res = func()
+        elapsed = default_timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, res
+
+
+def main(size=2048, levels=4, repeat=3):
+    scanner = ImageScanner(levels=levels, level_scale=4)
+    img = RGB().convert(random_image(size))[0]
+
+    t_level, _ = timeit(
+        lambda: [scanner.level(img, level) for level in range(levels)],
+        repeat
+    )
+    t_pyramid, pyramid = timeit(lambda: scanner.pyramid(img), repeat)
+    t_getpixel, n_getpixel = timeit(
+        lambda: scan_getpixel(scanner, pyramid), 1
+    )
+    t_scan, n_scan = timeit(lambda: scan(scanner, img), 1)
+
+    print('size: %d, levels: %d' % (size, levels))
+    print('levels (resize input): %8.3fs' % t_level)
+    print('levels (pyramid):      %8.3fs' % t_pyramid)
+    print('scan (getpixel):       %8.3fs %d px' % (t_getpixel, n_getpixel))
+    print('scan (pixel access):   %8.3fs %d px' % (t_scan, n_scan))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Compare full and tiled image generation.
+
+Train a generator on a random image, then generate an image
+in memory and in strips written to a PNG file, each in a separate
+process, and report time and peak memory usage.
+
+Usage: python3 benchmarks/image_tiled.py [size] [levels] [scale]
+"""
+
+import os
+import sys
+import random
+import resource
+import subprocess
+from tempfile import TemporaryDirectory
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image  # pylint:disable=wrong-import-position
+from markovchain import JsonStorage  # pylint:disable=wrong-import-position
+from markovchain.image import (  # pylint:disable=wrong-import-position
+    MarkovImage, ImageScanner
+)
+from markovchain.image.type import RGB  # pylint:disable=wrong-import-position
+from markovchain.image.png import PngWriter  # pylint:disable=wrong-import-position
+
+
+def random_image(size, seed=0):
+    rnd = random.Random(seed)
+    data = rnd.getrandbits(8 * size * size * 3).to_bytes(size * size * 3,
+                                                         'little')
+    return Image.frombytes('RGB', (size, size), data)
+
+
+def run(mode, state, size, output):
+    markov = MarkovImage.from_storage(JsonStorage.load(state))
+    width = size // markov.scanner.min_size
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = default_timer()
+    if mode == 'full':
+        markov(width, width).save(output)
+    else:
+        width, height, strips = markov.strips(width, width)
+        with open(output, 'wb') as fp:
+            with PngWriter(fp, width, height, markov.imgtype.mode) as png:
+                for strip in strips:
+                    png.write(strip)
+    elapsed = default_timer() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print('%-6s %8.3fs %8.1f MiB peak, %8.1f MiB generating'
+          % (mode, elapsed, rss / 1024, (rss - base) / 1024))
+
+
+def main(size=1024, levels=3, scale=4):
+    markov = MarkovImage(
+        levels=levels,
+        imgtype=RGB(),
+        scanner=ImageScanner(levels=levels, level_scale=scale),
+        storage=JsonStorage()
+    )
+    markov.data(random_image(scale ** (levels - 1) * 4))
+    with TemporaryDirectory() as tmp:
+        state = os.path.join(tmp, 'state.json')
+        markov.save(state)
+        print('size: %d, levels: %d, scale: %d' % (size, levels, scale))
+        for mode in ('full', 'tiled'):
+            subprocess.check_call([
+                sys.executable, __file__, mode, state, str(size),
+                os.path.join(tmp, mode + '.png')
+            ])
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] in ('full', 'tiled'):
+        run(sys.argv[1], sys.argv[2], int(sys.argv[3]), sys.argv[4])
+    else:
+        main(*map(int, sys.argv[1:]))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Compare SQLite storage schema versions.
+
+Build a version 2 database from a random corpus, convert it
+to the version 1 layout and compare database sizes and
+forward link query times.
+
+Usage: python3 benchmarks/sqlite_schema.py [sentences] [queries]
+"""
+
+import os
+import sys
+import random
+import shutil
+import sqlite3
+import tempfile
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from markovchain import SqliteStorage  # pylint:disable=wrong-import-position
+from markovchain.parser import Parser  # pylint:disable=wrong-import-position
+
+
+V1_SCHEMA = '''
+    CREATE TABLE links_v1 (
+        dataset INTEGER,
+        source INTEGER,
+        target INTEGER,
+        value TEXT,
+        bvalue TEXT,
+        count INTEGER NOT NULL DEFAULT 1
+    );
+    INSERT INTO links_v1
+        SELECT links.dataset, links.source, NULLIF(links.target, 0),
+               token.value, btoken.value, links.count
+        FROM links
+        LEFT JOIN tokens AS token ON token.id = links.token
+        INNER JOIN tokens AS btoken ON btoken.id = links.btoken;
+    DROP TABLE links;
+    DROP TABLE tokens;
+    ALTER TABLE links_v1 RENAME TO links;
+    CREATE INDEX link_source ON links (source, dataset);
+    CREATE INDEX link_target ON links (target, dataset);
+    PRAGMA user_version=0;
+'''
+
+V1_QUERY = ('SELECT count, value, target FROM links'
+            ' WHERE dataset=? AND source=?')
+
+
+def corpus(sentences, words=5000, seed=0):
+    rnd = random.Random(seed)
+    vocabulary = ['w%d' % i for i in range(words)]
+    for _ in range(sentences):
+        yield [rnd.choice(vocabulary)
+               for _ in range(rnd.randint(5, 20))]
+
+
+def build(path, sentences):
+    storage = SqliteStorage(db=path, bulk=True)
+    parser = Parser(state_sizes=[2])
+    for sentence in corpus(sentences):
+        storage.add_links(parser(sentence + [None]))
+        parser.reset()
+    storage.save()
+    storage.close()
+
+
+def query(func, sources):
+    start = default_timer()
+    for source in sources:
+        func(1, source)
+    return default_timer() - start
+
+
+def main(sentences=20000, queries=100000):
+    with tempfile.TemporaryDirectory() as tmp:
+        v1 = os.path.join(tmp, 'v1.db')
+        v2 = os.path.join(tmp, 'v2.db')
+        build(v2, sentences)
+        shutil.copyfile(v2, v1)
+
+        db = sqlite3.connect(v1)
+        db.executescript(V1_SCHEMA)
+        db.execute('VACUUM')
+        cursor = db.cursor()
+
+        def get_links_v1(dataset, source):
+            cursor.execute(V1_QUERY, (dataset, source))
+            return cursor.fetchall()
+
+        storage = SqliteStorage(db=v2)
+        storage.cursor.execute('VACUUM')
+        storage.cursor.execute('SELECT MAX(id) FROM nodes')
+        nodes = storage.cursor.fetchone()[0]
+        rnd = random.Random(1)
+        sources = [rnd.randint(1, nodes) for _ in range(queries)]
+
+        for source in sources[:1000]:
+            assert (sorted(get_links_v1(1, source), key=str)
+                    == sorted(storage.get_links(1, source), key=str))
+
+        t1 = query(get_links_v1, sources)
+        t2 = query(storage.get_links, sources)
+        db.close()
+        storage.close()
+
+        print('sentences: %d, queries: %d' % (sentences, queries))
+        print('v1: %9d bytes %8.3fs' % (os.path.getsize(v1), t1))
+        print('v2: %9d bytes %8.3fs' % (os.path.getsize(v2), t2))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Compare best-of-N random generation and beam search.
+
+Train a text generator on random Zipf-distributed words, then
+pick texts either as the most likely of N random candidates
+or with ``BeamSearch``. Reports the time per text and
+the mean log-probability of links of picked texts.
+
+Usage: python3 benchmarks/storage_beam.py [words] [candidates] [texts]
+"""
+
+import os
+import sys
+import random
+from itertools import islice
+from math import log
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from markovchain.storage import BeamSearch  # pylint:disable=wrong-import-position
+from markovchain.text import MarkovText  # pylint:disable=wrong-import-position
+from markovchain.util import state_size_dataset  # pylint:disable=wrong-import-position
+
+MAX_LENGTH = 32
+
+
+def random_text(words, seed=0):
+    rnd = random.Random(seed)
+    vocabulary = ['w%d' % i for i in range(words // 20)]
+    weights = [1 / (i + 1) for i in range(len(vocabulary))]
+    return ' '.join(
+        word + ('.' if rnd.random() < 0.05 else '')
+        for word in rnd.choices(vocabulary, weights, k=words)
+    )
+
+
+def log_prob(storage, data, text, cache):
+    state = storage.get_state((), 1)
+    ret = 0.0
+    for value in text + [None]:
+        key = tuple(state)
+        try:
+            links = cache[key]
+        except KeyError:
+            links = storage.get_links(data, state)
+            total = sum(link[0] for link in links)
+            links = {link[1]: (log(link[0] / total), link) for link in links}
+            cache[key] = links
+        link_log_prob, link = links[value]
+        ret += link_log_prob
+        state = storage.follow_link(link, state)
+    return ret / (len(text) + 1)
+
+
+def best_of(storage, data, candidates, texts):
+    cache = {}
+    res = []
+    for _ in range(texts):
+        best = None
+        count = 0
+        while count < candidates or best is None:
+            state = storage.get_state((), 1)
+            text = list(islice(storage.do_generate(data, state),
+                               MAX_LENGTH + 1))
+            if len(text) > MAX_LENGTH:
+                continue
+            count += 1
+            score = log_prob(storage, data, text, cache)
+            if best is None or score > best[0]:
+                best = (score, text)
+        res.append(best[1])
+    return res
+
+
+def beam_search(storage, data, width, texts):
+    beam = BeamSearch(width, 1.0, MAX_LENGTH)
+    res = []
+    for _ in range(texts):
+        state = storage.get_state((), 1)
+        res.append(list(storage.do_generate(data, state, False, beam)))
+    return res
+
+
+def main(words=100000, candidates=10, texts=100):
+    markov = MarkovText()
+    markov.data(random_text(words))
+    storage = markov.storage
+    data = storage.get_dataset(state_size_dataset(1))
+    cache = {}
+    print('words: %d, candidates / width: %d, texts: %d'
+          % (words, candidates, texts))
+    for name, func in [('best of N', best_of), ('beam search', beam_search)]:
+        random.seed(0)
+        start = default_timer()
+        res = func(storage, data, candidates, texts)
+        time = default_timer() - start
+        print('%-12s %8.3fs %10.3fms/text  log p: %.3f  mean length: %.2f'
+              % (name, time, time / len(res) * 1000,
+                 sum(log_prob(storage, data, text, cache) for text in res)
+                 / len(res),
+                 sum(map(len, res)) / len(res)))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
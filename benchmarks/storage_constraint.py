@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Compare rejection sampling and constrained generation.
+
+Train a text generator on random Zipf-distributed words, then
+generate texts that end within a length limit and do not contain
+forbidden tokens, either by generating and filtering candidates
+or with ``Constraint``. Reports the time per accepted text.
+
+Usage: python3 benchmarks/storage_constraint.py [words] [max_length] [texts]
+"""
+
+import os
+import sys
+import random
+from itertools import islice
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from markovchain.storage import Constraint  # pylint:disable=wrong-import-position
+from markovchain.text import MarkovText  # pylint:disable=wrong-import-position
+from markovchain.util import state_size_dataset  # pylint:disable=wrong-import-position
+
+
+def random_text(words, seed=0):
+    rnd = random.Random(seed)
+    vocabulary = ['w%d' % i for i in range(words // 20)]
+    weights = [1 / (i + 1) for i in range(len(vocabulary))]
+    return ' '.join(
+        word + ('.' if rnd.random() < 0.05 else '')
+        for word in rnd.choices(vocabulary, weights, k=words)
+    )
+
+
+def rejection(storage, max_length, forbidden, texts):
+    data = storage.get_dataset(state_size_dataset(1))
+    res = []
+    candidates = 0
+    while len(res) < texts:
+        candidates += 1
+        state = storage.get_state((), 1)
+        text = list(islice(storage.do_generate(data, state),
+                           max_length + 1))
+        if len(text) <= max_length and forbidden.isdisjoint(text):
+            res.append(text)
+    return candidates, res
+
+
+def constrained(storage, max_length, forbidden, texts):
+    data = storage.get_dataset(state_size_dataset(1))
+    constraint = Constraint(forbidden=forbidden, max_length=max_length)
+    res = []
+    candidates = 0
+    while len(res) < texts:
+        candidates += 1
+        state = storage.get_state((), 1)
+        text = list(storage.do_generate(data, state, False, constraint))
+        if len(text) <= max_length and forbidden.isdisjoint(text):
+            res.append(text)
+    return candidates, res
+
+
+def main(words=100000, max_length=8, texts=1000):
+    markov = MarkovText()
+    markov.data(random_text(words))
+    storage = markov.storage
+    forbidden = {'w0', 'w1', 'w2'}
+    print('words: %d, max length: %d, texts: %d, forbidden: %s'
+          % (words, max_length, texts, ' '.join(sorted(forbidden))))
+    for name, func in [('rejection', rejection),
+                       ('constraint', constrained)]:
+        random.seed(0)
+        start = default_timer()
+        candidates, res = func(storage, max_length, forbidden, texts)
+        time = default_timer() - start
+        print('%-12s %8.3fs %8d candidates %10.3fms/text  mean length: %.2f'
+              % (name, time, candidates, time / len(res) * 1000,
+                 sum(map(len, res)) / len(res)))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Compare generic and JSON storage generation loops.
+
+Train a text generator on random words, then generate sequences
+with ``Storage.do_generate`` (``random_link``, ``get_links`` and
+``follow_link`` calls per token) and ``JsonStorage.do_generate``.
+
+Usage: python3 benchmarks/storage_generate.py [words] [state_size] [tokens]
+"""
+
+import os
+import sys
+import random
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from markovchain.storage import Storage  # pylint:disable=wrong-import-position
+from markovchain.text import MarkovText  # pylint:disable=wrong-import-position
+from markovchain.util import state_size_dataset  # pylint:disable=wrong-import-position
+
+
+def random_text(words, seed=0):
+    rnd = random.Random(seed)
+    vocabulary = ['w%d' % i for i in range(words // 20)]
+    return ' '.join(
+        rnd.choice(vocabulary) + ('.' if rnd.random() < 0.05 else '')
+        for _ in range(words)
+    )
+
+
+def run(do_generate, storage, state_size, tokens):
+    data = storage.get_dataset(state_size_dataset(state_size))
+    random.seed(0)
+    res = []
+    start = default_timer()
+    while len(res) < tokens:
+        state = storage.get_state((), state_size)
+        res.extend(do_generate(storage, data, state))
+    return default_timer() - start, res
+
+
+def main(words=300000, state_size=2, tokens=1000000):
+    markov = MarkovText(
+        parser=MarkovText.DEFAULT_PARSER(state_sizes=[state_size])
+    )
+    markov.data(random_text(words))
+    storage = markov.storage
+
+    t_base, res_base = run(Storage.do_generate, storage, state_size, tokens)
+    t_json, res_json = run(type(storage).do_generate,
+                           storage, state_size, tokens)
+    assert res_base == res_json
+
+    print('words: %d, state size: %d, tokens: %d'
+          % (words, state_size, len(res_base)))
+    print('Storage.do_generate:     %8.3fs %10.0f tokens/s'
+          % (t_base, len(res_base) / t_base))
+    print('JsonStorage.do_generate: %8.3fs %10.0f tokens/s'
+          % (t_json, len(res_json) / t_json))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Compare link sampling policies.
+
+Train a text generator on random Zipf-distributed words, then
+generate sequences with count proportional sampling and with
+``Sampling`` policies. Reports generation speed and mean
+log-probability of generated tokens under the trained model.
+
+Usage: python3 benchmarks/storage_sampling.py [words] [state_size] [tokens]
+"""
+
+import os
+import sys
+import random
+from math import log
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from markovchain.storage import Storage, Sampling  # pylint:disable=wrong-import-position
+from markovchain.text import MarkovText  # pylint:disable=wrong-import-position
+from markovchain.util import state_size_dataset  # pylint:disable=wrong-import-position
+
+
+def random_text(words, seed=0):
+    rnd = random.Random(seed)
+    vocabulary = ['w%d' % i for i in range(words // 20)]
+    weights = [1 / (i + 1) for i in range(len(vocabulary))]
+    return ' '.join(
+        word + ('.' if rnd.random() < 0.05 else '')
+        for word in rnd.choices(vocabulary, weights, k=words)
+    )
+
+
+def run(storage, state_size, tokens, sampling):
+    data = storage.get_dataset(state_size_dataset(state_size))
+    random.seed(0)
+    res = []
+    start = default_timer()
+    while len(res) < tokens:
+        state = storage.get_state((), state_size)
+        res.append(list(Storage.do_generate(storage, data, state,
+                                            False, sampling)))
+    return default_timer() - start, res
+
+
+def log_prob(storage, state_size, texts):
+    data = storage.get_dataset(state_size_dataset(state_size))
+    cache = {}
+    total = 0.0
+    count = 0
+    for text in texts:
+        state = storage.get_state((), state_size)
+        for value in text:
+            key = tuple(state)
+            try:
+                links = cache[key]
+            except KeyError:
+                links = storage.get_links(data, state, False)
+                size = sum(link[0] for link in links)
+                links = {link[1]: (log(link[0] / size), link)
+                         for link in links}
+                cache[key] = links
+            prob, link = links[value]
+            total += prob
+            count += 1
+            state = storage.follow_link(link, state, False)
+    return total / count
+
+
+def main(words=100000, state_size=1, tokens=20000):
+    markov = MarkovText(
+        parser=MarkovText.DEFAULT_PARSER(state_sizes=[state_size])
+    )
+    markov.data(random_text(words))
+    storage = markov.storage
+    data = storage.get_dataset(state_size_dataset(state_size))
+    links = [len(node[1]) if isinstance(node[1], list) else 1
+             for node in data[0].values()]
+
+    print('words: %d, state size: %d, states: %d, mean links: %.1f'
+          % (words, state_size, len(links), sum(links) / len(links)))
+    for name, sampling in [
+            ('count', None),
+            ('temperature=1', Sampling()),
+            ('temperature=0.5', Sampling(0.5)),
+            ('top_k=8', Sampling(top_k=8)),
+            ('top_p=0.5', Sampling(top_p=0.5))
+    ]:
+        time, texts = run(storage, state_size, tokens, sampling)
+        size = sum(map(len, texts))
+        print('%-16s %8.3fs %10.0f tokens/s  log p: %.3f'
+              % (name, time, size / time,
+                 log_prob(storage, state_size, texts)))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Compare worker processes loading a JSON model and attaching
+to a shared memory segment.
+
+Train a text generator on random words, then start worker processes
+that either load the JSON model or attach to a shared segment
+and generate sentences, and report load time and private memory
+per worker.
+
+Usage: python3 benchmarks/storage_shared.py [words] [workers] [sentences]
+"""
+
+import os
+import sys
+import random
+from multiprocessing import get_context
+from tempfile import TemporaryDirectory
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from markovchain import JsonStorage, SharedStorage  # pylint:disable=wrong-import-position
+from markovchain.text import MarkovText  # pylint:disable=wrong-import-position
+
+
+def random_text(words, seed=0):
+    rnd = random.Random(seed)
+    vocabulary = ['w%d' % i for i in range(words // 20)]
+    return ' '.join(
+        rnd.choice(vocabulary) + ('.' if rnd.random() < 0.05 else '')
+        for _ in range(words)
+    )
+
+
+def private_memory():
+    """Private memory of the current process in MiB (Linux only)."""
+    ret = 0
+    with open('/proc/self/smaps_rollup') as fp:
+        for line in fp:
+            if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                ret += int(line.split()[1])
+    return ret / 1024
+
+
+def worker(args):
+    mode, source, sentences = args
+    base = private_memory()
+    start = default_timer()
+    if mode == 'json':
+        storage = JsonStorage.load(source)
+    else:
+        storage = SharedStorage.attach(source)
+    markov = MarkovText.from_storage(storage)
+    loaded = default_timer() - start
+    start = default_timer()
+    for _ in range(sentences):
+        markov()
+    generated = default_timer() - start
+    memory = private_memory() - base
+    markov.close()
+    return loaded, generated, memory
+
+
+def run(mode, source, workers, sentences):
+    with get_context('spawn').Pool(workers) as pool:
+        res = pool.map(worker, [(mode, source, sentences)] * workers)
+    loaded, generated, memory = (max(x) for x in zip(*res))
+    print('%-6s load %8.3fs, generate %8.3fs, %8.1f MiB per worker'
+          % (mode, loaded, generated, memory))
+
+
+def main(words=1000000, workers=4, sentences=1000):
+    markov = MarkovText(parser=MarkovText.DEFAULT_PARSER(state_sizes=[2]))
+    markov.data(random_text(words))
+    with TemporaryDirectory() as tmp:
+        fname = os.path.join(tmp, 'markov.json')
+        markov.save(fname)
+        storage = SharedStorage.create(JsonStorage.load(fname))
+        print('words: %d, workers: %d, sentences: %d, json: %.1f MiB,'
+              ' shared: %.1f MiB'
+              % (words, workers, sentences,
+                 os.path.getsize(fname) / (1 << 20),
+                 storage.buf.nbytes / (1 << 20)))
+        try:
+            run('json', fname, workers, sentences)
+            run('shared', storage.name, workers, sentences)
+        finally:
+            storage.close()
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
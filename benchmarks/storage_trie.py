@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Compare JSON and trie storage memory usage.
+
+Train text generators with state sizes from 1 to a maximum size
+on random words with Zipf distribution, then report
+allocated memory and generation time.
+
+Usage: python3 benchmarks/storage_trie.py [words] [max_state_size] [sentences]
+"""
+
+import os
+import sys
+import random
+import tracemalloc
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from markovchain import JsonStorage  # pylint:disable=wrong-import-position
+from markovchain.storage import TrieStorage  # pylint:disable=wrong-import-position
+from markovchain.text import MarkovText  # pylint:disable=wrong-import-position
+
+
+def random_text(words, seed=0):
+    rnd = random.Random(seed)
+    size = max(words // 20, 1)
+    weights = [1 / (i + 1) for i in range(size)]
+    vocabulary = ['w%d' % i for i in range(size)]
+    tokens = rnd.choices(vocabulary, weights, k=words)
+    return ' '.join(
+        token + ('.' if rnd.random() < 0.05 else '')
+        for token in tokens
+    )
+
+
+def run(name, storage, text, state_sizes, sentences):
+    tracemalloc.start()
+    start = default_timer()
+    markov = MarkovText(
+        parser=MarkovText.DEFAULT_PARSER(state_sizes=state_sizes),
+        storage=storage
+    )
+    markov.data(text)
+    t_data = default_timer() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    random.seed(0)
+    start = default_timer()
+    for _ in range(sentences):
+        markov(state_size=state_sizes[-1])
+    t_generate = default_timer() - start
+    print('%-5s data %8.3fs, generate %8.3fs, %8.1f MiB'
+          % (name, t_data, t_generate, memory / (1 << 20)))
+
+
+def main(words=300000, max_state_size=3, sentences=2000):
+    state_sizes = list(range(1, max_state_size + 1))
+    text = random_text(words)
+    print('words: %d, state sizes: %s, sentences: %d'
+          % (words, state_sizes, sentences))
+    run('json', JsonStorage(backward=True), text, state_sizes, sentences)
+    run('trie', TrieStorage(backward=True), text, state_sizes, sentences)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Compare backoff generation with separate lookups per state size
+and with a combined backoff index.
+
+Train a text generator with several state sizes on random words,
+then generate tokens falling back to shorter states with one
+``get_links`` call per state size and with ``BackoffIndex``.
+
+Usage: python3 benchmarks/text_backoff.py [words] [max_state_size] [tokens] [min_links]
+"""
+
+import os
+import sys
+import random
+from collections import deque
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from markovchain.text import MarkovText  # pylint:disable=wrong-import-position
+from markovchain.util import state_size_dataset  # pylint:disable=wrong-import-position
+
+
+def random_text(words, seed=0):
+    rnd = random.Random(seed)
+    vocabulary = ['w%d' % i for i in range(words // 20)]
+    return ' '.join(
+        rnd.choice(vocabulary) + ('.' if rnd.random() < 0.05 else '')
+        for _ in range(words)
+    )
+
+
+def generate_lookups(markov, state_sizes, tokens, min_links):
+    """Backoff generation with one lookup per state size."""
+    storage = markov.storage
+    datasets = [
+        (size, storage.get_dataset(state_size_dataset(size)))
+        for size in sorted(state_sizes, reverse=True)
+    ]
+    max_size = datasets[0][0]
+    count = 0
+    while count < tokens:
+        state = deque([''] * max_size, maxlen=max_size)
+        while count < tokens:
+            best = None
+            for size, data in datasets:
+                links = storage.get_links(data, list(state)[max_size - size:])
+                if len(links) >= min_links:
+                    best = links
+                    break
+                if best is None and links:
+                    best = links
+            if best is None:
+                break
+            x = random.randint(0, sum(link[0] for link in best) - 1)
+            for link in best:
+                if x < link[0]:
+                    break
+                x -= link[0]
+            if link[1] is None:
+                break
+            state.append(link[1])
+            count += 1
+    return count
+
+
+def generate_index(markov, state_sizes, tokens, min_links):
+    count = 0
+    while count < tokens:
+        for _ in markov.generate_backoff(state_sizes, min_links=min_links):
+            count += 1
+            if count >= tokens:
+                break
+    return count
+
+
+def main(words=300000, max_state_size=3, tokens=200000, min_links=2):
+    state_sizes = list(range(1, max_state_size + 1))
+    markov = MarkovText(
+        parser=MarkovText.DEFAULT_PARSER(state_sizes=state_sizes)
+    )
+    markov.data(random_text(words))
+
+    start = default_timer()
+    markov.backoff_index(state_sizes)
+    t_build = default_timer() - start
+
+    random.seed(0)
+    start = default_timer()
+    generate_lookups(markov, state_sizes, tokens, min_links)
+    t_lookups = default_timer() - start
+
+    random.seed(0)
+    start = default_timer()
+    generate_index(markov, state_sizes, tokens, min_links)
+    t_index = default_timer() - start
+
+    print('words: %d, state sizes: %s, tokens: %d, min links: %d'
+          % (words, state_sizes, tokens, min_links))
+    print('index build:         %8.3fs' % t_build)
+    print('lookup per size:     %8.3fs %10.0f tokens/s'
+          % (t_lookups, tokens / t_lookups))
+    print('backoff index:       %8.3fs %10.0f tokens/s'
+          % (t_index, tokens / t_index))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
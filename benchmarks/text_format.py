@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Compare text formatter replace rules.
+
+Format long random texts with fused default rules, default rules
+and default rules with the overlap flag.
+
+Usage: python3 benchmarks/text_format.py [words] [count] [repeat]
+"""
+
+import os
+import sys
+import random
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from markovchain.text.formatter import Formatter  # pylint:disable=wrong-import-position
+
+
+WORDS = ['a', 'bb', 'ccc', 'x-y', '-', '+', ',', '.', '(', ')', '!']
+
+
+def random_text(words, rnd):
+    sep = ['', ' ', '  ']
+    return ''.join(rnd.choice(WORDS) + rnd.choice(sep)
+                   for _ in range(words))
+
+
+def timeit(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = default_timer()
+        res = func()
+        elapsed = default_timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, res
+
+
+def main(words=1000, count=200, repeat=3):
+    rnd = random.Random(0)
+    texts = [random_text(words, rnd) for _ in range(count)]
+    overlap = [rule + ('uo',) for rule in Formatter.DEFAULT_REPLACE]
+    formatters = [
+        ('fused', Formatter()),
+        ('default', Formatter(optimize=False)),
+        ('overlap', Formatter(replace=overlap))
+    ]
+    t_init, _ = timeit(lambda: [Formatter(replace=overlap)
+                                for _ in range(1000)], repeat)
+    print('%d texts x %d words' % (count, words))
+    print('%-10s %8.3fs / 1000' % ('init', t_init))
+    for name, fmt in formatters:
+        elapsed, _ = timeit(lambda: [fmt(text) for text in texts], repeat)
+        print('%-10s %8.3fs' % (name, elapsed))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
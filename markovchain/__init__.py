@@ -1,6 +1,14 @@
-from .storage import JsonStorage, SqliteStorage
+from .storage import JsonStorage, SharedStorage, TrieStorage
 from .scanner import Scanner
 from .parser import Parser, LevelParser
 from .base import Markov
 
 Parser.add_class(Parser, LevelParser)
+
+
+def __getattr__(name):
+    if name == 'SqliteStorage':
+        from .storage import SqliteStorage
+        return SqliteStorage
+    raise AttributeError('module {0!r} has no attribute {1!r}'
+                         .format(__name__, name))
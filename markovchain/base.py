@@ -1,4 +1,4 @@
-from .storage import JsonStorage
+from .storage import JsonStorage, BackoffIndex
 from .scanner import Scanner
 from .parser import ParserBase, Parser
 from .util import load, DOC_INHERIT, state_size_dataset
@@ -18,6 +18,10 @@ class Markov(metaclass=DOC_INHERIT):
     scanner : `markovchain.scanner.Scanner`
     parser : `markovchain.parser.ParserBase`
     storage : `markovchain.storage.Storage`
+    generators : `dict` of ((`int`, `str`, `bool`), `markovchain.storage.Generator`)
+        Cached sequence generators.
+    backoff_indexes : `dict` of ((`tuple` of `int`, `str`), `markovchain.storage.BackoffIndex`)
+        Cached backoff indexes.
     """
     DEFAULT_SCANNER = Scanner
     DEFAULT_PARSER = Parser
@@ -45,6 +49,8 @@ class Markov(metaclass=DOC_INHERIT):
         #if parser is None:
         #    scanner = storage.settings.get('parser', None)
         self.storage = storage
+        self.generators = {}
+        self.backoff_indexes = {}
         self.scanner = load(scanner, Scanner, self.DEFAULT_SCANNER)
         self.parser = load(parser, ParserBase, self.DEFAULT_PARSER)
 
@@ -67,16 +73,15 @@ class Markov(metaclass=DOC_INHERIT):
         """
         links = self.parser(self.scanner(data, part), part, dataset)
         self.storage.add_links(links)
+        self.backoff_indexes.clear()
 
-    def generate(self, state_size=None, start=(), dataset='', backward=False):
-        """Generate a sequence.
+    def generator(self, state_size=None, dataset='', backward=False):
+        """Get a cached sequence generator.
 
         Parameters
         ----------
         state_size : `int`, optional
             State size (default: parser.state_sizes[0]).
-        start : `str` or `iterable` of `str`, optional
-            Initial state (default: ()).
         dataset : `str`, optional
             Dataset key prefix.
         backward : `bool`, optional
@@ -84,20 +89,124 @@ class Markov(metaclass=DOC_INHERIT):
 
         Returns
         -------
-        `generator` of `str`
-            State generator.
+        `markovchain.storage.Generator` or `None`
+            Generator or `None` if parser has no state sizes.
         """
         if state_size is None:
             try:
                 state_size = next(iter(self.parser.state_sizes))
             except StopIteration:
-                return
+                return None
         #elif (self.parser is not None
         #      and state_size not in self.parser.state_sizes):
         #    raise ValueError('invalid state size: {0}: not in {1}'
         #                     .format(state_size, self.parser.state_sizes))
-        dataset += state_size_dataset(state_size)
-        return self.storage.generate(start, state_size, dataset, backward)
+        key = (state_size, dataset, backward)
+        try:
+            generator = self.generators[key]
+            if generator.storage is self.storage:
+                return generator
+        except KeyError:
+            pass
+        generator = self.storage.generator(
+            dataset + state_size_dataset(state_size),
+            state_size,
+            backward
+        )
+        self.generators[key] = generator
+        return generator
+
+    def generate(self, state_size=None, start=(), dataset='', backward=False,
+                 sampling=None):
+        """Generate a sequence.
+
+        Parameters
+        ----------
+        state_size : `int`, optional
+            State size (default: parser.state_sizes[0]).
+        start : `str` or `iterable` of `str`, optional
+            Initial state (default: ()).
+        dataset : `str`, optional
+            Dataset key prefix.
+        backward : `bool`, optional
+            Link direction.
+        sampling : `markovchain.storage.Sampling` or `None`, optional
+            Link sampling policy (default: `None`, link count
+            proportional sampling).
+
+        Returns
+        -------
+        `generator` of `str`
+            State generator.
+        """
+        generator = self.generator(state_size, dataset, backward)
+        if generator is None:
+            return None
+        if sampling is None:
+            return generator(start)
+        return generator(start, sampling)
+
+    def backoff_index(self, state_sizes=None, dataset=''):
+        """Get a cached backoff index.
+
+        Indexes are rebuilt after `data` is called.
+
+        Parameters
+        ----------
+        state_sizes : `iterable` of `int`, optional
+            State sizes (default: parser.state_sizes).
+        dataset : `str`, optional
+            Dataset key prefix.
+
+        Returns
+        -------
+        `markovchain.storage.BackoffIndex` or `None`
+            Index or `None` if there are no state sizes.
+        """
+        if state_sizes is None:
+            state_sizes = self.parser.state_sizes
+        key = (tuple(sorted(set(state_sizes))), dataset)
+        if not key[0]:
+            return None
+        try:
+            index = self.backoff_indexes[key]
+            if index.storage is self.storage:
+                return index
+        except KeyError:
+            pass
+        index = BackoffIndex(self.storage, key[0], dataset)
+        self.backoff_indexes[key] = index
+        return index
+
+    def generate_backoff(self, state_sizes=None, start=(), dataset='',
+                         min_links=1):
+        """Generate a sequence using the longest known state.
+
+        Each step uses links of the longest state that has
+        at least `min_links` links, or of the longest known state
+        if there is no such state. Generation stops
+        if no state is known.
+
+        Parameters
+        ----------
+        state_sizes : `iterable` of `int`, optional
+            State sizes (default: parser.state_sizes).
+        start : `str` or `iterable` of `str`, optional
+            Initial state (default: ()).
+        dataset : `str`, optional
+            Dataset key prefix.
+        min_links : `int`, optional
+            Minimum number of links (default: 1).
+
+        Returns
+        -------
+        `generator` of `str`
+            State generator.
+        """
+        index = self.backoff_index(state_sizes, dataset)
+        if index is None:
+            return None
+        return index(start, min_links)
 
     def get_settings_json(self):
         """Convert generator settings to JSON.
@@ -112,6 +221,33 @@ class Markov(metaclass=DOC_INHERIT):
             'parser': None if self.parser is None else self.parser.save()
         }
 
+    def checkpoint(self):
+        """Get scanner and parser state.
+
+        Returns
+        -------
+        `dict`
+            JSON data.
+        """
+        return {
+            'scanner': (None if self.scanner is None
+                        else self.scanner.checkpoint()),
+            'parser': None if self.parser is None else self.parser.checkpoint()
+        }
+
+    def restore(self, state):
+        """Restore scanner and parser state.
+
+        Parameters
+        ----------
+        state : `dict`
+            Scanner and parser state from `checkpoint`.
+        """
+        if self.scanner is not None:
+            self.scanner.restore(state['scanner'])
+        if self.parser is not None:
+            self.parser.restore(state['parser'])
+
     def save(self, fp=None):
         """Save to file.
 
@@ -1,21 +1,29 @@
 from argparse import FileType
 from sys import stderr
-from os import replace, remove, path
+from os import remove, path, cpu_count
 from shutil import copyfile
 from functools import reduce
 from itertools import islice
+from collections import Counter
+from multiprocessing import Pool, Queue
+from threading import Thread
 from PIL import Image
 
-from ..storage import JsonStorage, SqliteStorage
-from ..image import MarkovImage
+from ..storage import JsonStorage
+from ..image import MarkovImage, LevelCache
+from ..image.png import PngWriter
 from ..util import ObjectWrapper, truncate
 from .util import (
-    tqdm, load, save, infiles, outfiles as _outfiles,
+    tqdm, load, load_log, save_log,
+    infiles, outfiles as _outfiles,
     check_output_format, JSON, SQLITE,
     BAR_FORMAT, BAR_DESC_SIZE,
-    save_image
+    save_image, add_prune_args,
+    Checkpoint, add_checkpoint_args, check_checkpoint_args
+)
+from .util import ( # pylint:disable=unused-import
+    cmd_settings, cmd_compact, cmd_prune
 )
-from .util import cmd_settings # pylint:disable=unused-import
 
 
 def create_arg_parser(parent):
@@ -36,9 +44,15 @@ def create_arg_parser(parent):
     arg2.add_argument('-s', '--settings',
                       type=FileType('r'), default=None,
                       help='settings json file')
+    arg2.add_argument('-j', '--jobs',
+                      type=int, default=1,
+                      help='number of worker processes, 0 to use'
+                           ' all processors (default: %(default)s)')
+    add_cache_args(arg2)
     arg2.add_argument('-o', '--output',
                       default=None,
                       help='output file (default: stdout)')
+    add_checkpoint_args(arg2, 'files')
     arg2.add_argument('input', nargs='*',
                       help='input file')
 
@@ -52,11 +66,28 @@ def create_arg_parser(parent):
     arg2.add_argument('-o', '--output',
                       default=None,
                       help='output file (default: rewrite state file)')
+    arg2.add_argument('-L', '--log',
+                      action='store_true',
+                      help='append links to JSON state update log'
+                           ' instead of rewriting state file')
+    arg2.add_argument('-j', '--jobs',
+                      type=int, default=1,
+                      help='number of worker processes, 0 to use'
+                           ' all processors (default: %(default)s)')
+    add_cache_args(arg2)
+    add_checkpoint_args(arg2, 'files')
     arg2.add_argument('state',
                       help='state file')
     arg2.add_argument('input', nargs='*',
                       help='input file')
 
+    arg2 = arg1.add_parser('compact')
+    arg2.add_argument('state',
+                      help='JSON state file')
+
+    arg2 = arg1.add_parser('prune')
+    add_prune_args(arg2)
+
     arg2 = arg1.add_parser('settings')
     arg2.add_argument('state',
                       help='state file')
@@ -80,6 +111,10 @@ def create_arg_parser(parent):
     arg2.add_argument('-c', '--count',
                       type=int, default=1,
                       help='generated image count (default: %(default)s)')
+    arg2.add_argument('-T', '--tiled',
+                      action='store_true',
+                      help='generate images in strips and stream them'
+                           ' to PNG files')
     arg2.add_argument('state',
                       help='state file')
     arg2.add_argument('output',
@@ -107,12 +142,47 @@ def create_arg_parser(parent):
     arg2.add_argument('-c', '--count',
                       type=int, default=1,
                       help='generated image count (default: %(default)s)')
+    add_cache_args(arg2)
     arg2.add_argument('input',
                       help='input image')
     arg2.add_argument('output',
                       help='output file name format string')
 
 
+def add_cache_args(parser):
+    """Add level cache arguments to a command parser.
+
+    Parameters
+    ----------
+    parser : `argparse.ArgumentParser`
+        Command parser.
+    """
+    parser.add_argument('-C', '--cache',
+                        default=None,
+                        help='converted image level cache directory')
+    parser.add_argument('--cache-size', metavar='MB',
+                        type=int, default=1024,
+                        help='maximum cache size in megabytes'
+                             ' (default: %(default)s)')
+
+def get_cache(args):
+    """Get level cache.
+
+    Parameters
+    ----------
+    args : `argparse.Namespace`
+        Command arguments.
+
+    Returns
+    -------
+    `markovchain.image.LevelCache` or `None`
+        Level cache.
+    """
+    if args.cache is None:
+        return None
+    return LevelCache(args.cache, args.cache_size << 20)
+
+
 class TraversalProgressWrapper(ObjectWrapper): # pylint: disable=too-few-public-methods
     """Traversal object wrapper.
 
@@ -148,7 +218,200 @@ class TraversalProgressWrapper(ObjectWrapper): # pylint: disable=too-few-public-
             self.pbar_parent.update(1)
 
 
-def read(fnames, markov, progress, leave=True):
+class TraversalQueueWrapper(ObjectWrapper): # pylint: disable=too-few-public-methods
+    """Traversal object wrapper.
+
+    Reports image traversal progress to a queue.
+
+    Attributes
+    ----------
+    STEP : `int`
+        Number of pixels per progress report.
+    queue : `multiprocessing.Queue`
+        Progress queue.
+    """
+    STEP = 4096
+
+    def __init__(self, obj, queue):
+        super().__init__(obj)
+        self.queue = queue
+
+    def __call__(self, width, height, ends=True):
+        count = 0
+        try:
+            for xy in super().__call__(width, height, ends):
+                if xy is not None:
+                    count += 1
+                    if count == self.STEP:
+                        self.queue.put(count)
+                        count = 0
+                yield xy
+        finally:
+            if count:
+                self.queue.put(count)
+
+
+class LinkCounter:
+    """Link counter used as generator storage by ingestion workers.
+
+    Attributes
+    ----------
+    links : `collections.Counter` of ((`str`, `tuple` of `str`, `str`), `int`)
+        Link counts.
+    """
+    def __init__(self):
+        self.links = Counter()
+
+    def add_links(self, links, dataset_prefix=''):
+        """Count links.
+
+        Parameters
+        ----------
+        links : `generator` of (`str`, `islice` of `str`, `str`)
+            Links to add.
+        dataset_prefix : `str`, optional
+            Dataset key prefix.
+        """
+        self.links.update(
+            (dataset_prefix + dataset, tuple(src), dst)
+            for dataset, src, dst in links
+        )
+
+    def pop(self):
+        """Get and reset link counts.
+
+        Returns
+        -------
+        `list` of (`str`, `tuple` of `str`, `str`, `int`)
+            Links (dataset, source, target, count).
+        """
+        ret = [key + (count,) for key, count in self.links.items()]
+        self.links.clear()
+        return ret
+
+
+def read_image(fname, markov, cache=None):
+    """Read an image and update a generator.
+
+    Parameters
+    ----------
+    fname : `str`
+        File path.
+    markov : `markovchain.image.MarkovImage`
+        Generator to update.
+    cache : `markovchain.image.LevelCache`, optional
+        Converted image level cache.
+    """
+    if cache is None:
+        markov.data(Image.open(fname), False)
+        return
+    key = cache.key(fname, markov)
+    pyramids = cache.get(key)
+    if pyramids is None:
+        pyramids = markov.pyramids(Image.open(fname))
+        cache.put(key, pyramids)
+    markov.data_pyramids(pyramids)
+
+
+WORKER = None
+WORKER_CACHE = None
+
+def init_worker(settings, queue=None, cache=None):
+    """Initialize an ingestion worker process.
+
+    Parameters
+    ----------
+    settings : `dict`
+        Generator settings.
+    queue : `multiprocessing.Queue`, optional
+        Progress queue.
+    cache : `markovchain.image.LevelCache`, optional
+        Converted image level cache.
+    """
+    global WORKER, WORKER_CACHE # pylint: disable=global-statement
+    WORKER = MarkovImage(storage=LinkCounter(), **settings)
+    WORKER_CACHE = cache
+    if queue is not None:
+        tr = WORKER.scanner.traversal
+        tr[0] = TraversalQueueWrapper(tr[0], queue)
+
+def read_worker(fname):
+    """Read an image in an ingestion worker process.
+
+    Parameters
+    ----------
+    fname : `str`
+        File path.
+
+    Returns
+    -------
+    `list` of (`str`, `tuple` of `str`, `str`, `int`)
+        Links (dataset, source, target, count).
+    """
+    read_image(fname, WORKER, WORKER_CACHE)
+    return WORKER.storage.pop()
+
+def read_parallel(fnames, markov, progress, jobs, leave=True, cache=None,
+                  checkpoint=None, start=0):
+    """Read data files in worker processes and update a generator.
+
+    Workers scan and parse images and count links,
+    counts are merged into generator storage in input order.
+
+    Parameters
+    ----------
+    fnames : `list` of `str`
+        File paths.
+    markov : `markovchain.image.MarkovImage`
+        Generator to update.
+    progress : `bool`
+        Show progress bars.
+    jobs : `int`
+        Number of worker processes.
+    leave : `bool`, optional
+        Leave progress bars (default: `True`).
+    cache : `markovchain.image.LevelCache`, optional
+        Converted image level cache.
+    checkpoint : `markovchain.cli.util.Checkpoint`, optional
+        Checkpoint updated after every merged file.
+    start : `int`, optional
+        Index of the first file in input file list (default: 0).
+    """
+    queue = None
+    thread = None
+    if progress:
+        queue = Queue()
+        pbar = tqdm(desc='Scanning', leave=False, unit='px',
+                    unit_scale=True, dynamic_ncols=True)
+
+        def update():
+            for count in iter(queue.get, None):
+                pbar.update(count)
+
+        thread = Thread(target=update, daemon=True)
+        thread.start()
+
+    settings = markov.get_settings_json()
+    try:
+        with Pool(jobs, init_worker, (settings, queue, cache)) as pool:
+            res = pool.imap(read_worker, fnames)
+            if progress:
+                res = tqdm(res, total=len(fnames),
+                           desc='Loading', unit='file',
+                           bar_format=BAR_FORMAT,
+                           leave=leave, dynamic_ncols=True)
+            for i, links in enumerate(res, start + 1):
+                markov.storage.add_link_counts(links)
+                if checkpoint is not None:
+                    checkpoint((i, 0))
+    finally:
+        if thread is not None:
+            queue.put(None)
+            thread.join()
+            pbar.close()
+
+def read(fnames, markov, progress, leave=True, jobs=1, cache=None,
+         checkpoint=None, position=(0, 0)):
     """Read data files and update a generator.
 
     Parameters
@@ -161,9 +424,30 @@ def read(fnames, markov, progress, leave=True):
         Show progress bar.
     leave : `bool`, optional
         Leave progress bars (default: `True`).
+    jobs : `int`, optional
+        Number of worker processes, 0 to use all processors
+        (default: 1).
+    cache : `markovchain.image.LevelCache`, optional
+        Converted image level cache.
+    checkpoint : `markovchain.cli.util.Checkpoint`, optional
+        Checkpoint updated after every file.
+    position : (`int`, `int`), optional
+        Input file index and offset to start from (default: (0, 0)).
     """
+    start = position[0]
+    fnames = fnames[start:]
+    if jobs <= 0:
+        jobs = cpu_count() or 1
+    if jobs > 1 and len(fnames) > 1:
+        read_parallel(fnames, markov, progress, jobs, leave, cache,
+                      checkpoint, start)
+        return
+
     pbar = None
-    channels = markov.imgtype.channels
+    if getattr(markov.scanner, 'fused', False):
+        channels = ['']
+    else:
+        channels = markov.imgtype.channels
 
     tr = markov.scanner.traversal
     if progress and not isinstance(tr[0], TraversalProgressWrapper):
@@ -172,7 +456,7 @@ def read(fnames, markov, progress, leave=True):
 
     try:
         with infiles(fnames, progress, leave) as fnames:
-            for fname in fnames:
+            for i, fname in enumerate(fnames, start + 1):
                 if progress:
                     title = truncate(fname, BAR_DESC_SIZE - 1, False)
                     pbar = tqdm(
@@ -181,9 +465,11 @@ def read(fnames, markov, progress, leave=True):
                         bar_format=BAR_FORMAT, dynamic_ncols=True
                     )
                     tr.pbar_parent = pbar
-                markov.data(Image.open(fname), False)
+                read_image(fname, markov, cache)
                 if progress:
                     pbar.close()
+                if checkpoint is not None:
+                    checkpoint((i, 0))
     finally:
         if pbar is not None:
             pbar.close()
@@ -245,16 +531,30 @@ def cmd_create(args):
     args : `argparse.Namespace`
         Command arguments.
     """
-    if args.type == SQLITE:
-        if path.exists(args.output):
-            remove(args.output)
-        storage = SqliteStorage(db=args.output, settings=args.settings)
+    check_checkpoint_args(args.output, args)
+    if args.resume:
+        markov = load(MarkovImage, args.output, args)
+        if args.type == SQLITE:
+            markov.storage.bulk_journal = True
+            markov.storage.begin_bulk()
     else:
-        storage = JsonStorage(settings=args.settings)
+        if args.type == SQLITE:
+            from ..storage.sqlite import SqliteStorage
+            if path.exists(args.output):
+                remove(args.output)
+            storage = SqliteStorage(
+                db=args.output, settings=args.settings, bulk=True,
+                bulk_journal=args.checkpoint is not None
+            )
+        else:
+            storage = JsonStorage(settings=args.settings)
+        markov = MarkovImage.from_storage(storage)
 
-    markov = MarkovImage.from_storage(storage)
-    read(args.input, markov, args.progress)
-    save(markov, args.output, args)
+    checkpoint = Checkpoint(markov, args.output, args, args.checkpoint)
+    read(args.input, markov, args.progress,
+         jobs=args.jobs, cache=get_cache(args),
+         checkpoint=checkpoint, position=checkpoint.restore())
+    checkpoint.finish()
 
 def cmd_update(args):
     """Update a generator.
@@ -264,55 +564,136 @@ def cmd_update(args):
     args : `argparse.Namespace`
         Command arguments.
     """
+    output = args.state if args.output is None else args.output
+    check_checkpoint_args(output, args)
+
+    if args.log:
+        markov = load_log(MarkovImage, args.state, args)
+        read(args.input, markov, args.progress,
+             jobs=args.jobs, cache=get_cache(args))
+        save_log(markov, args.state)
+        return
+
     if args.type == SQLITE and args.output is not None:
-        copyfile(args.state, args.output)
+        if not args.resume:
+            copyfile(args.state, args.output)
         args.state = args.output
 
-    markov = load(MarkovImage, args.state, args)
+    markov = load(MarkovImage, output if args.resume else args.state, args)
 
-    read(args.input, markov, args.progress)
+    checkpoint = Checkpoint(markov, output, args, args.checkpoint)
+    read(args.input, markov, args.progress,
+         jobs=args.jobs, cache=get_cache(args),
+         checkpoint=checkpoint, position=checkpoint.restore())
+    checkpoint.finish()
 
-    if args.output is None:
-        if args.type == SQLITE:
-            save(markov, None, args)
-        elif args.type == JSON:
-            name, ext = path.splitext(args.state)
-            tmp = name + '.tmp' + ext
-            save(markov, tmp, args)
-            replace(tmp, args.state)
-    else:
-        save(markov, args.output, args)
-
-def cmd_generate(args):
-    """Generate images.
+def get_size(markov, size, level):
+    """Get generated image start level size.
 
     Parameters
     ----------
-    args : `argparse.Namespace`
-        Command arguments.
-    """
-    check_output_format(args.output, args.count)
+    markov : `markovchain.image.MarkovImage`
+        Generator.
+    size : (`int`, `int`) or `None`
+        Image size (`None` to use scanner resize setting).
+    level : `int` or `None`
+        Image levels (`None` to use scanner levels).
+
+    Raises
+    ------
+    ValueError
+        If image size is unknown.
 
-    markov = load(MarkovImage, args.state, args)
-
-    if args.size is None:
+    Returns
+    -------
+    (`int`, `int`)
+        Start level width and height.
+    """
+    if size is None:
         if markov.scanner.resize is None:
-            print('Unknown output image size', file=stderr)
-            exit(1)
+            raise ValueError('Unknown output image size')
         width, height = markov.scanner.resize
     else:
-        width, height = args.size
+        width, height = size
 
-    if args.level is None:
+    if level is None:
         scale = markov.scanner.min_size
     else:
         scale = reduce(
             lambda x, y: x * y,
-            islice(markov.scanner.level_scale, 0, args.level - 1),
+            islice(markov.scanner.level_scale, 0, level - 1),
             1
         )
 
-    width, height = width // scale, height // scale
+    return width // scale, height // scale
+
+def save_tiled(markov, width, height, fname, args):
+    """Generate an image in strips and write it to a PNG file.
+
+    Parameters
+    ----------
+    markov : `markovchain.image.MarkovImage`
+        Generator.
+    width : `int`
+        Start level width.
+    height : `int`
+        Start level height.
+    fname : `str`
+        Output file path.
+    args : `argparse.Namespace`
+        Command arguments.
+    """
+    width, height, strips = markov.strips(
+        width, height,
+        state_size=args.state_size,
+        levels=args.level
+    )
+    pbar = None
+    if args.progress:
+        title = truncate(fname, BAR_DESC_SIZE - 1, False)
+        pbar = tqdm(total=height, desc=title, leave=False, unit='row',
+                    bar_format=BAR_FORMAT, dynamic_ncols=True)
+    try:
+        with open(fname, 'wb') as fp:
+            with PngWriter(fp, width, height, markov.imgtype.mode,
+                           getattr(markov.imgtype, 'palette', None)) as png:
+                for strip in strips:
+                    png.write(strip)
+                    if pbar is not None:
+                        pbar.update(strip.size[1])
+    finally:
+        if pbar is not None:
+            pbar.close()
+
+def cmd_generate(args):
+    """Generate images.
+
+    Parameters
+    ----------
+    args : `argparse.Namespace`
+        Command arguments.
+    """
+    check_output_format(args.output, args.count)
+
+    if args.tiled:
+        _, ext = path.splitext(args.output)
+        if ext.lower() not in ('', '.png'):
+            raise ValueError('Tiled output format is not PNG: '
+                             + args.output)
+
+    markov = load(MarkovImage, args.state, args)
+
+    try:
+        width, height = get_size(markov, args.size, args.level)
+    except ValueError as err:
+        print(str(err), file=stderr)
+        exit(1)
+
+    if args.tiled:
+        with _outfiles(args.output, args.count, args.progress) as fnames:
+            for fname in fnames:
+                save_tiled(markov, width, height, fname, args)
+        return
 
     markov.scanner.traversal[0].show_progress = args.progress
 
@@ -344,9 +725,11 @@ def cmd_filter(args):
         if args.type == JSON:
             storage = JsonStorage(settings=args.settings)
         else:
+            from ..storage.sqlite import SqliteStorage
             storage = SqliteStorage(settings=args.settings)
         markov = MarkovImage.from_storage(storage)
-        read([args.input], markov, args.progress, False)
+        read([args.input], markov, args.progress, False,
+             cache=get_cache(args))
 
     args.level = min(args.level, markov.levels - 1) - 1
 
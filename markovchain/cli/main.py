@@ -1,14 +1,47 @@
 import sys
 from argparse import ArgumentParser
+from importlib import import_module
+from importlib.util import find_spec
 
-from . import text
 from .util import set_args
 from ..info import CLI_VERSION
 
-try:
-    from . import image
-except ImportError:
-    image = None
+
+def get_commands():
+    """Get available command module names.
+
+    Command modules are imported only when a command is used.
+
+    Returns
+    -------
+    `list` of `str`
+        Command names.
+    """
+    ret = ['text']
+    if find_spec('PIL') is not None:
+        ret.append('image')
+    ret.append('serve')
+    return ret
+
+def get_command(args, commands):
+    """Get command name from CLI arguments.
+
+    Parameters
+    ----------
+    args : `list` of `str`
+        CLI arguments.
+    commands : `list` of `str`
+        Command names.
+
+    Returns
+    -------
+    `str` or `None`
+        Command name.
+    """
+    for arg in args:
+        if not arg.startswith('-'):
+            return arg if arg in commands else None
+    return None
 
 def main(args=None):
     """CLI main function.
@@ -24,19 +57,22 @@ def main(args=None):
 
     parsers = parser.add_subparsers(dest='dtype')
 
-    text.create_arg_parser(parsers.add_parser('text'))
-    if image is not None:
-        image.create_arg_parser(parsers.add_parser('image'))
+    commands = get_commands()
+    command = get_command(sys.argv[1:] if args is None else args, commands)
+    for name in commands:
+        subparser = parsers.add_parser(name)
+        if name == command:
+            module = import_module('.' + name, __package__)
+            module.create_arg_parser(subparser)
 
     if len(sys.argv if args is None else args) <= 1:
         parser.print_help()
         sys.exit(1)
 
     args = parser.parse_args(args)
-    dtype = globals()[args.dtype]
     try:
         set_args(args)
-        cmd = getattr(dtype, 'cmd_' + args.command)
+        cmd = getattr(module, 'cmd_' + args.command)
         cmd(args)
     except ValueError as err:
         print(str(err), file=sys.stderr)
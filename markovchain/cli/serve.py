@@ -0,0 +1,484 @@
+import sys
+import json
+from argparse import FileType, Namespace
+from io import BytesIO
+from queue import Queue
+from threading import Lock
+from timeit import default_timer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ..storage import BeamSearch
+from ..text import MarkovText
+from .util import load, get_file_type, SQLITE
+from .text import get_reply_args, get_sampling
+
+try:
+    from ..image import MarkovImage
+    from .image import get_size
+except ImportError:
+    MarkovImage = None
+
+
+def create_arg_parser(parent):
+    """Create command parser.
+
+    Parameters
+    ----------
+    parent : `argparse.ArgumentParser`
+        Command parser.
+    """
+    parent.add_argument('-s', '--settings',
+                        type=FileType('r'), default=None,
+                        help='settings json file')
+    parent.add_argument('-H', '--host',
+                        default='127.0.0.1',
+                        help='server address (default: %(default)s)')
+    parent.add_argument('-p', '--port',
+                        type=int, default=8080,
+                        help='server port (default: %(default)s)')
+    parent.add_argument('-c', '--concurrency',
+                        type=int, default=1,
+                        help='generator instances per model'
+                             ' sharing loaded state (default: %(default)s)')
+    parent.add_argument('-t', '--text',
+                        metavar='NAME=STATE', action='append', default=[],
+                        help='text generator state file')
+    parent.add_argument('-i', '--image',
+                        metavar='NAME=STATE', action='append', default=[],
+                        help='image generator state file')
+    parent.set_defaults(command='serve')
+
+
+class Histogram:
+    """Latency histogram.
+
+    Attributes
+    ----------
+    BUCKETS : `tuple` of `float`
+        Bucket upper bounds in seconds.
+    counts : `list` of `int`
+        Observation counts per bucket.
+    count : `int`
+        Observation count.
+    sum : `float`
+        Sum of observations.
+    """
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.counts = [0] * len(self.BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.lock = Lock()
+
+    def observe(self, value):
+        """Add an observation.
+
+        Parameters
+        ----------
+        value : `float`
+            Value.
+        """
+        with self.lock:
+            for i, bound in enumerate(self.BUCKETS):
+                if value <= bound:
+                    self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def format(self, name, labels):
+        """Format histogram in Prometheus text format.
+
+        Parameters
+        ----------
+        name : `str`
+            Metric name.
+        labels : `str`
+            Metric labels.
+
+        Returns
+        -------
+        `list` of `str`
+            Lines.
+        """
+        with self.lock:
+            ret = [
+                '%s_bucket{%s,le="%s"} %d' % (name, labels, bound, count)
+                for bound, count in zip(self.BUCKETS, self.counts)
+            ]
+            ret.append('%s_bucket{%s,le="+Inf"} %d'
+                       % (name, labels, self.count))
+            ret.append('%s_sum{%s} %f' % (name, labels, self.sum))
+            ret.append('%s_count{%s} %d' % (name, labels, self.count))
+        return ret
+
+
+class Model:
+    """Pool of generator instances.
+
+    Instances of a model share storage loaded from a JSON state file.
+    Instances of SQLite models have separate connections.
+
+    Attributes
+    ----------
+    name : `str`
+        Model name.
+    dtype : `str`
+        Model type ('text' or 'image').
+    pool : `queue.Queue` of `markovchain.Markov`
+        Idle generator instances.
+    latency : `markovchain.cli.serve.Histogram`
+        Request latency histogram.
+    """
+    def __init__(self, name, dtype, instances):
+        """Model constructor.
+
+        Parameters
+        ----------
+        name : `str`
+            Model name.
+        dtype : `str`
+            Model type.
+        instances : `list` of `markovchain.Markov`
+            Generator instances.
+        """
+        self.name = name
+        self.dtype = dtype
+        self.pool = Queue()
+        for markov in instances:
+            self.pool.put(markov)
+        self.latency = Histogram()
+
+    def __call__(self, func, *args):
+        """Call a function with an idle generator instance.
+
+        Blocks until an instance is available.
+
+        Parameters
+        ----------
+        func : `function`
+            Function to call.
+        *args
+            Function arguments.
+
+        Returns
+        -------
+        `object`
+            Function result.
+        """
+        markov = self.pool.get()
+        try:
+            return func(markov, *args)
+        finally:
+            self.pool.put(markov)
+
+
+def generate_text(markov, params):
+    """Generate text.
+
+    Parameters
+    ----------
+    markov : `markovchain.text.MarkovText`
+        Generator.
+    params : `dict`
+        Request parameters.
+
+    Raises
+    ------
+    ValueError
+        If parameters are invalid.
+
+    Returns
+    -------
+    `dict`
+        Response data.
+    """
+    if not isinstance(params, dict):
+        raise ValueError('invalid request: expected an object')
+    reply_to, reply_mode = get_reply_args(
+        params.get('start'), params.get('end'), params.get('reply')
+    )
+    forbidden = params.get('exclude')
+    if forbidden is not None:
+        if not isinstance(forbidden, list):
+            raise ValueError('invalid exclude: expected an array')
+        forbidden = [token for word in forbidden
+                     for token in markov.get_tokens(str(word))]
+    max_length = params.get('words', 256)
+    sampling = get_sampling(
+        params.get('temperature'), params.get('top_k'), params.get('top_p'),
+        forbidden, max_length if params.get('terminate') else None
+    )
+    beam = params.get('beam')
+    if beam is not None:
+        beam = BeamSearch(beam)
+    formatter = markov.formatter
+    if not params.get('format', True):
+        markov.formatter = lambda x: x
+    try:
+        text = [
+            markov(
+                max_length,
+                state_size=params.get('state_size'),
+                reply_to=reply_to,
+                reply_mode=reply_mode,
+                backoff=params.get('backoff'),
+                sampling=sampling,
+                beam=beam
+            )
+            for _ in range(params.get('count', 1))
+        ]
+    finally:
+        markov.formatter = formatter
+    return {'text': text}
+
+def generate_image(markov, params):
+    """Generate an image.
+
+    Parameters
+    ----------
+    markov : `markovchain.image.MarkovImage`
+        Generator.
+    params : `dict`
+        Request parameters.
+
+    Raises
+    ------
+    ValueError
+        If parameters are invalid.
+
+    Returns
+    -------
+    `bytes`
+        PNG image.
+    """
+    if not isinstance(params, dict):
+        raise ValueError('invalid request: expected an object')
+    size = params.get('size')
+    level = params.get('level')
+    width, height = get_size(markov, size, level)
+    img = markov(
+        width, height,
+        state_size=params.get('state_size'),
+        levels=level
+    )
+    fp = BytesIO()
+    img.save(fp, 'png')
+    return fp.getvalue()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """Generator HTTP request handler.
+
+    Endpoints:
+
+    - ``GET /models``: list loaded models.
+    - ``GET /metrics``: request latency histograms.
+    - ``POST /text/<name>``: generate text. Request body is a JSON
+      object or a list of objects (batch).
+    - ``POST /image/<name>``: generate a PNG image.
+    """
+    server_version = 'markovchain'
+
+    def log_message(self, format, *args): # pylint:disable=redefined-builtin
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def send(self, status, data, content_type='application/json'):
+        """Send a response.
+
+        Parameters
+        ----------
+        status : `int`
+            HTTP status.
+        data : `bytes` or `object`
+            Response body or JSON data.
+        content_type : `str`, optional
+            Content type (default: 'application/json').
+        """
+        if not isinstance(data, bytes):
+            data = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_error_json(self, status, message):
+        """Send an error response.
+
+        Parameters
+        ----------
+        status : `int`
+            HTTP status.
+        message : `str`
+            Error message.
+        """
+        self.send(status, {'error': message})
+
+    def do_GET(self): # pylint:disable=invalid-name
+        if self.path == '/models':
+            models = {'text': [], 'image': []}
+            for model in self.server.models.values():
+                models[model.dtype].append(model.name)
+            self.send(200, models)
+        elif self.path == '/metrics':
+            self.send(200, self.server.metrics().encode('utf-8'),
+                      'text/plain; version=0.0.4')
+        else:
+            self.send_error_json(404, 'not found: ' + self.path)
+
+    def do_POST(self): # pylint:disable=invalid-name
+        try:
+            model = self.server.models[self.path.strip('/')]
+        except KeyError:
+            self.send_error_json(404, 'not found: ' + self.path)
+            return
+
+        start = default_timer()
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(length)
+            params = json.loads(body.decode('utf-8')) if body else {}
+            if model.dtype == 'text':
+                if isinstance(params, list):
+                    res = model(
+                        lambda markov: [generate_text(markov, x)
+                                        for x in params]
+                    )
+                else:
+                    res = model(generate_text, params)
+                self.send(200, res)
+            else:
+                res = model(generate_image, params)
+                self.send(200, res, 'image/png')
+        except (ValueError, TypeError, KeyError) as err:
+            self.send_error_json(400, str(err))
+        except Exception as err: # pylint:disable=broad-except
+            self.send_error_json(500, str(err))
+        finally:
+            model.latency.observe(default_timer() - start)
+
+
+class Server(ThreadingHTTPServer):
+    """Generator HTTP server.
+
+    Attributes
+    ----------
+    models : `dict` of (`str`, `markovchain.cli.serve.Model`)
+        Models by path ('<type>/<name>').
+    quiet : `bool`
+        If `True`, disable request logging.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, models, quiet=False):
+        """Server constructor.
+
+        Parameters
+        ----------
+        address : (`str`, `int`)
+            Server address.
+        models : `iterable` of `markovchain.cli.serve.Model`
+            Models.
+        quiet : `bool`, optional
+            Disable request logging (default: `False`).
+        """
+        super().__init__(address, RequestHandler)
+        self.models = dict(
+            (model.dtype + '/' + model.name, model)
+            for model in models
+        )
+        self.quiet = quiet
+
+    def metrics(self):
+        """Format metrics in Prometheus text format.
+
+        Returns
+        -------
+        `str`
+        """
+        name = 'markovchain_request_duration_seconds'
+        lines = [
+            '# HELP %s Generation request latency.' % name,
+            '# TYPE %s histogram' % name
+        ]
+        for model in self.models.values():
+            labels = 'type="%s",model="%s"' % (model.dtype, model.name)
+            lines.extend(model.latency.format(name, labels))
+        return '\n'.join(lines) + '\n'
+
+
+def load_models(dtype, specs, args):
+    """Load models.
+
+    Parameters
+    ----------
+    dtype : `str`
+        Model type ('text' or 'image').
+    specs : `list` of `str`
+        Model specifications ('<name>=<state file>').
+    args : `argparse.Namespace`
+        Command arguments.
+
+    Raises
+    ------
+    ValueError
+        If a model specification is invalid.
+
+    Returns
+    -------
+    `list` of `markovchain.cli.serve.Model`
+    """
+    if dtype == 'text':
+        cls = MarkovText
+    elif MarkovImage is None:
+        raise ValueError('image generators are not available')
+    else:
+        cls = MarkovImage
+
+    ret = []
+    for spec in specs:
+        name, sep, fname = spec.partition('=')
+        if not sep or not name or not fname:
+            raise ValueError('invalid model: %s: expected NAME=STATE' % spec)
+        load_args = Namespace(
+            type=get_file_type(fname),
+            progress=False,
+            settings=args.settings
+        )
+        markov = load(cls, fname, load_args, check_same_thread=False)
+        instances = [markov]
+        for _ in range(args.concurrency - 1):
+            if load_args.type == SQLITE:
+                instances.append(
+                    load(cls, fname, load_args, check_same_thread=False)
+                )
+            else:
+                instances.append(cls.from_storage(markov.storage))
+        ret.append(Model(name, dtype, instances))
+    return ret
+
+def cmd_serve(args):
+    """Serve generators over HTTP.
+
+    Parameters
+    ----------
+    args : `argparse.Namespace`
+        Command arguments.
+    """
+    if args.concurrency <= 0:
+        raise ValueError('concurrency <= 0')
+    if not args.text and not args.image:
+        raise ValueError('no models')
+    models = (load_models('text', args.text, args)
+              + load_models('image', args.image, args))
+    server = Server((args.host, args.port), models)
+    print('Serving on http://%s:%d/' % server.server_address[:2],
+          file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,14 +1,19 @@
 from argparse import FileType
-from os import replace, remove, path, SEEK_SET, SEEK_END
+from os import remove, path, SEEK_SET, SEEK_END
 
-from ..storage import JsonStorage, SqliteStorage
+from ..storage import (
+    JsonStorage, Sampling, Constraint, BeamSearch
+)
 from ..text import MarkovText, ReplyMode
 from ..util import truncate
 from .util import (
-    load, save, infiles, JSON, SQLITE,
-    tqdm, BAR_FORMAT, BAR_DESC_SIZE
+    load, load_log, save_log, infiles, SQLITE,
+    tqdm, BAR_FORMAT, BAR_DESC_SIZE, add_prune_args,
+    Checkpoint, add_checkpoint_args, check_checkpoint_args
+)
+from .util import ( # pylint:disable=unused-import
+    cmd_settings, cmd_compact, cmd_prune
 )
-from .util import cmd_settings # pylint:disable=unused-import
 
 
 def create_arg_parser(parent):
@@ -32,6 +37,7 @@ def create_arg_parser(parent):
     arg2.add_argument('-o', '--output',
                       default=None,
                       help='output file (default: stdout)')
+    add_checkpoint_args(arg2, 'bytes')
     arg2.add_argument('input', nargs='*',
                       help='input file (default: stdin)')
 
@@ -45,11 +51,23 @@ def create_arg_parser(parent):
     arg2.add_argument('-o', '--output',
                       default=None,
                       help='output file (default: rewrite state file)')
+    arg2.add_argument('-L', '--log',
+                      action='store_true',
+                      help='append links to JSON state update log'
+                           ' instead of rewriting state file')
+    add_checkpoint_args(arg2, 'bytes')
     arg2.add_argument('state',
                       help='state file')
     arg2.add_argument('input', nargs='*',
                       help='input file (default: stdin)')
 
+    arg2 = arg1.add_parser('compact')
+    arg2.add_argument('state',
+                      help='JSON state file')
+
+    arg2 = arg1.add_parser('prune')
+    add_prune_args(arg2)
+
     arg2 = arg1.add_parser('settings')
     arg2.add_argument('state',
                       help='state file')
@@ -68,6 +86,30 @@ def create_arg_parser(parent):
     arg2.add_argument('-ss', '--state-size',
                       type=int, default=None,
                       help='generator state size')
+    arg2.add_argument('-b', '--backoff',
+                      metavar='MIN_LINKS', type=int, default=None,
+                      help='use shorter states if a state is unknown'
+                           ' or has less than MIN_LINKS links')
+    arg2.add_argument('-t', '--temperature',
+                      type=float, default=None,
+                      help='link sampling temperature')
+    arg2.add_argument('-k', '--top-k',
+                      metavar='K', type=int, default=None,
+                      help='sample from K most frequent links')
+    arg2.add_argument('-p', '--top-p',
+                      metavar='P', type=float, default=None,
+                      help='sample from most frequent links'
+                           ' with total probability P')
+    arg2.add_argument('-x', '--exclude',
+                      metavar='WORD', action='append', default=None,
+                      help='do not generate WORD (can be repeated)')
+    arg2.add_argument('-T', '--terminate',
+                      action='store_true',
+                      help='prefer texts that end within max text size')
+    arg2.add_argument('-B', '--beam',
+                      metavar='WIDTH', type=int, default=None,
+                      help='generate most likely texts'
+                           ' with beam search of width WIDTH')
     arg2.add_argument('-S', '--start',
                       default=None,
                       help='text start')
@@ -91,7 +133,7 @@ def create_arg_parser(parent):
 
     arg2.set_defaults(format=True)
 
-def read(fnames, markov, progress):
+def read(fnames, markov, progress, checkpoint=None, position=(0, 0)):
     """Read data files and update a generator.
 
     Parameters
@@ -102,31 +144,41 @@ def read(fnames, markov, progress):
         Generator to update.
     progress : `bool`
         Show progress bar.
+    checkpoint : `markovchain.cli.util.Checkpoint`, optional
+        Checkpoint updated after every line.
+    position : (`int`, `int`), optional
+        Input file index and offset to start from (default: (0, 0)).
     """
+    if checkpoint is not None and checkpoint.interval is None:
+        checkpoint = None
     with infiles(fnames, progress) as fnames:
-        for fname in fnames:
+        for i, fname in enumerate(fnames):
+            if i < position[0]:
+                continue
             with open(fname, 'r') as fp:
+                prev = position[1] if i == position[0] else 0
                 if progress:
                     fp.seek(0, SEEK_END)
                     total = fp.tell()
                     title = truncate(fname, BAR_DESC_SIZE - 1, False)
-                    pbar = tqdm(total=total, desc=title,
+                    pbar = tqdm(total=total, initial=prev, desc=title,
                                 leave=False, unit='byte',
                                 bar_format=BAR_FORMAT, dynamic_ncols=True)
-                    fp.seek(0, SEEK_SET)
-                    prev = 0
                 else:
                     pbar = None
+                fp.seek(prev, SEEK_SET)
 
                 try:
                     line = fp.readline()
                     while line:
                         markov.data(line, True)
-                        if pbar is not None:
+                        if pbar is not None or checkpoint is not None:
                             pos = fp.tell()
-                            if pos <= total:
+                            if pbar is not None and pos <= total:
                                 pbar.update(pos - prev)
-                                prev = pos
+                            if checkpoint is not None:
+                                checkpoint((i, pos), pos - prev)
+                            prev = pos
                         line = fp.readline()
                 finally:
                     if pbar is not None:
@@ -142,15 +194,28 @@ def cmd_create(args):
     args : `argparse.Namespace`
         Command arguments.
     """
-    if args.type == SQLITE:
-        if args.output is not None and path.exists(args.output):
-            remove(args.output)
-        storage = SqliteStorage(db=args.output, settings=args.settings)
+    check_checkpoint_args(args.output, args)
+    if args.resume:
+        markov = load(MarkovText, args.output, args)
+        if args.type == SQLITE:
+            markov.storage.bulk_journal = True
+            markov.storage.begin_bulk()
     else:
-        storage = JsonStorage(settings=args.settings)
-    markov = MarkovText.from_storage(storage)
-    read(args.input, markov, args.progress)
-    save(markov, args.output, args)
+        if args.type == SQLITE:
+            from ..storage.sqlite import SqliteStorage
+            if args.output is not None and path.exists(args.output):
+                remove(args.output)
+            storage = SqliteStorage(
+                db=args.output, settings=args.settings, bulk=True,
+                bulk_journal=args.checkpoint is not None
+            )
+        else:
+            storage = JsonStorage(settings=args.settings)
+        markov = MarkovText.from_storage(storage)
+    checkpoint = Checkpoint(markov, args.output, args, args.checkpoint)
+    read(args.input, markov, args.progress,
+         checkpoint, checkpoint.restore())
+    checkpoint.finish()
 
 def cmd_update(args):
     """Update a generator.
@@ -162,18 +227,96 @@ def cmd_update(args):
     """
     #args.output = None
 
-    markov = load(MarkovText, args.state, args)
-    read(args.input, markov, args.progress)
-    if args.output is None:
-        if args.type == SQLITE:
-            save(markov, None, args)
-        elif args.type == JSON:
-            name, ext = path.splitext(args.state)
-            tmp = name + '.tmp' + ext
-            save(markov, tmp, args)
-            replace(tmp, args.state)
+    if args.output is None or args.type == SQLITE:
+        output = args.state
     else:
-        save(markov, args.output, args)
+        output = args.output
+    check_checkpoint_args(output, args)
+
+    if args.log:
+        markov = load_log(MarkovText, args.state, args)
+        read(args.input, markov, args.progress)
+        save_log(markov, args.state)
+        return
+
+    markov = load(MarkovText, output if args.resume else args.state, args)
+    checkpoint = Checkpoint(markov, output, args, args.checkpoint)
+    read(args.input, markov, args.progress,
+         checkpoint, checkpoint.restore())
+    checkpoint.finish()
+
+def get_reply_args(start, end, reply):
+    """Convert text input arguments to reply arguments.
+
+    Parameters
+    ----------
+    start : `str` or `None`
+        Text start.
+    end : `str` or `None`
+        Text end.
+    reply : `str` or `None`
+        Reply to text.
+
+    Raises
+    ------
+    ValueError
+        If multiple input arguments are not `None`.
+
+    Returns
+    -------
+    (`str` or `None`, `markovchain.text.util.ReplyMode`)
+        Input string and reply mode.
+    """
+    if start:
+        if end or reply:
+            raise ValueError('multiple input arguments')
+        return start, ReplyMode.END
+    elif end:
+        if reply:
+            raise ValueError('multiple input arguments')
+        return end, ReplyMode.START
+    elif reply:
+        return reply, ReplyMode.REPLY
+    return None, ReplyMode.END
+
+def get_sampling(temperature=None, top_k=None, top_p=None,
+                 forbidden=None, max_length=None):
+    """Create a link sampling policy.
+
+    Parameters
+    ----------
+    temperature : `float` or `None`, optional
+        Sampling temperature.
+    top_k : `int` or `None`, optional
+        Maximum number of links.
+    top_p : `float` or `None`, optional
+        Minimum link probability.
+    forbidden : `iterable` of `str` or `None`, optional
+        Forbidden tokens.
+    max_length : `int` or `None`, optional
+        Maximum text length.
+
+    Raises
+    ------
+    ValueError
+        If arguments are invalid.
+
+    Returns
+    -------
+    `markovchain.storage.Sampling` or `None`
+        Sampling policy (`markovchain.storage.Constraint`
+        if `forbidden` or `max_length` is set) or `None`
+        if all arguments are `None`.
+    """
+    constraint = bool(forbidden) or max_length is not None
+    if temperature is None:
+        if top_k is None and top_p is None and not constraint:
+            return None
+        temperature = 1.0
+    if constraint:
+        return Constraint(temperature, top_k, top_p,
+                          forbidden or (), max_length)
+    return Sampling(temperature, top_k, top_p)
 
 def cmd_generate(args):
     """Generate text.
@@ -184,25 +327,21 @@ def cmd_generate(args):
         Command arguments.
     """
 
-    if args.start:
-        if args.end or args.reply:
-            raise ValueError('multiple input arguments')
-        args.reply_to = args.start
-        args.reply_mode = ReplyMode.END
-    elif args.end:
-        if args.reply:
-            raise ValueError('multiple input arguments')
-        args.reply_to = args.end
-        args.reply_mode = ReplyMode.START
-    elif args.reply:
-        args.reply_to = args.reply
-        args.reply_mode = ReplyMode.REPLY
-    else:
-        args.reply_to = None
-        args.reply_mode = ReplyMode.END
+    args.reply_to, args.reply_mode = get_reply_args(
+        args.start, args.end, args.reply
+    )
 
     markov = load(MarkovText, args.state, args)
 
+    forbidden = None
+    if args.exclude:
+        forbidden = [token for word in args.exclude
+                     for token in markov.get_tokens(word)]
+    sampling = get_sampling(args.temperature, args.top_k, args.top_p,
+                            forbidden,
+                            args.words if args.terminate else None)
+    beam = None if args.beam is None else BeamSearch(args.beam)
+
     ss = range(args.count)
     if args.progress:
         title = truncate(args.output.name, BAR_DESC_SIZE - 1, False)
@@ -217,7 +356,10 @@ def cmd_generate(args):
             args.words,
             state_size=args.state_size,
             reply_to=args.reply_to,
-            reply_mode=args.reply_mode
+            reply_mode=args.reply_mode,
+            backoff=args.backoff,
+            sampling=sampling,
+            beam=beam
         )
         if data:
             print(data)
@@ -2,22 +2,18 @@ import os
 import json
 import sys
 import bz2
+import shutil
 from contextlib import contextmanager
 
-try:
-    from tqdm import tqdm
-    TQDM_IMPORT_ERROR = None
-except ImportError as err:
-    tqdm = None
-    TQDM_IMPORT_ERROR = err
-
-from ..storage import JsonStorage, SqliteStorage
+from ..storage import JsonStorage
 from ..util import extend
 
 
 JSON = 0
 SQLITE = 1
 
+CONTAINER_EXT = '.jsons'
+
 BAR_DESC_SIZE = 12
 BAR_N_SIZE = 8
 BAR_RATE_SIZE = 14
@@ -75,8 +71,26 @@ def no_tqdm(iterable=None, *args, **kwargs): # pylint: disable=unused-argument
         return iterable
     return NoProgressBar()
 
-if tqdm is None:
-    tqdm = no_tqdm # pylint: disable=invalid-name
+TQDM = None
+TQDM_IMPORT_ERROR = None
+
+def tqdm(*args, **kwargs):
+    """Create a progress bar.
+
+    `tqdm` is imported on first call.
+
+    Returns
+    -------
+    `tqdm.tqdm` or `iterable` or `markovchain.cli.util.NoProgressBar`
+    """
+    global TQDM, TQDM_IMPORT_ERROR # pylint: disable=global-statement
+    if TQDM is None:
+        try:
+            from tqdm import tqdm as TQDM
+        except ImportError as err:
+            TQDM_IMPORT_ERROR = err
+            TQDM = no_tqdm
+    return TQDM(*args, **kwargs)
 
 def pprint(data, indent=0, end='\n'):
     """Pretty print JSON data.
@@ -115,7 +129,64 @@ def pprint(data, indent=0, end='\n'):
     else:
         print(json.dumps(data), end=end)
 
-def load(cls, fname, args):
+def get_file_type(fname):
+    """Get generator file type from file name.
+
+    Parameters
+    ----------
+    fname : `str` or `None`
+        File path.
+
+    Returns
+    -------
+    `int`
+        `JSON` or `SQLITE`.
+    """
+    if (fname is None
+            or fname.endswith('.json')
+            or fname.endswith('.json.bz2')
+            or fname.endswith(CONTAINER_EXT)):
+        return JSON
+    return SQLITE
+
+def is_container(fname):
+    """Check if a JSON generator file is a container file.
+
+    Container datasets are loaded on first access.
+
+    Parameters
+    ----------
+    fname : `str` or `None`
+        File path.
+
+    Returns
+    -------
+    `bool`
+    """
+    return fname is not None and fname.endswith(CONTAINER_EXT)
+
+def load_json(fname):
+    """Load JSON storage.
+
+    Parameters
+    ----------
+    fname : `str`
+        File path.
+
+    Returns
+    -------
+    `markovchain.storage.JsonStorage`
+    """
+    if is_container(fname):
+        return JsonStorage.load(fname)
+    if fname.endswith('.bz2'):
+        open_ = bz2.open
+    else:
+        open_ = open
+    with open_(fname, 'rt') as fp:
+        return JsonStorage.load(fp)
+
+def load(cls, fname, args, check_same_thread=True):
     """Load a generator.
 
     Parameters
@@ -126,6 +197,9 @@ def load(cls, fname, args):
         Input file path.
     args : `argparse.Namespace`
         Command arguments.
+    check_same_thread : `bool`, optional
+        If `False`, SQLite connection can be used by multiple threads
+        (default: `True`).
 
     Returns
     -------
@@ -133,24 +207,118 @@ def load(cls, fname, args):
     """
 
     if args.type == JSON:
-        if fname.endswith('.bz2'):
-            open_ = bz2.open
-        else:
-            open_ = open
-
         if args.progress:
             print('Loading JSON data...')
 
-        with open_(fname, 'rt') as fp:
-            storage = JsonStorage.load(fp)
-    else:
+        storage = load_json(fname)
+
+        log = log_path(fname)
+        if os.path.exists(log):
+            if args.progress:
+                print('Loading update log...')
+            storage.load_log(log)
+    elif check_same_thread:
+        from ..storage.sqlite import SqliteStorage
         storage = SqliteStorage.load(fname)
+    else:
+        import sqlite3
+        from ..storage.sqlite import SqliteStorage
+        storage = SqliteStorage.load(sqlite3.connect(
+            fname,
+            isolation_level='IMMEDIATE',
+            check_same_thread=False
+        ))
 
     if args.settings is not None:
         extend(storage.settings, args.settings)
 
     return cls.from_storage(storage)
 
+def log_path(fname):
+    """Get JSON generator update log path.
+
+    Parameters
+    ----------
+    fname : `str`
+        State file path.
+
+    Returns
+    -------
+    `str`
+        Log file path.
+    """
+    return fname + '.log'
+
+def remove_log(fname):
+    """Remove JSON generator update log if it exists.
+
+    Parameters
+    ----------
+    fname : `str`
+        State file path.
+    """
+    try:
+        os.remove(log_path(fname))
+    except FileNotFoundError:
+        pass
+
+def load_log(cls, fname, args):
+    """Create an empty generator with settings from a state file.
+
+    Backward links are logged if the state file has backward nodes.
+    State files saved without the backward nodes flag in settings
+    are loaded to check for backward nodes.
+
+    Parameters
+    ----------
+    cls : `type`
+        Generator class.
+    fname : `str`
+        JSON state file path.
+    args : `argparse.Namespace`
+        Command arguments.
+
+    Raises
+    ------
+    ValueError
+        If state file is not JSON or output file is set.
+
+    Returns
+    -------
+    `cls`
+    """
+    if args.type != JSON:
+        raise ValueError('update log requires a JSON state file')
+    if args.output is not None:
+        raise ValueError('update log can not be written to output file')
+
+    if fname.endswith('.bz2'):
+        with bz2.open(fname, 'rt') as fp:
+            settings = JsonStorage.load_settings(fp) or {}
+    else:
+        settings = JsonStorage.load_settings(fname) or {}
+
+    storage = settings.setdefault('storage', {})
+    if 'backward' not in storage:
+        state = load_json(fname)
+        storage['backward'] = state.backward is not None
+        state.close()
+
+    extend(settings, args.settings)
+    return cls.from_storage(JsonStorage(settings=settings))
+
+def save_log(markov, fname):
+    """Append generator links to update log.
+
+    Parameters
+    ----------
+    markov : `markovchain.Markov`
+        Generator created by `load_log`.
+    fname : `str`
+        State file path.
+    """
+    markov.storage.save_log(log_path(fname))
+
 def save(markov, fname, args):
     """Save a generator.
 
@@ -164,8 +332,13 @@ def save(markov, fname, args):
         Command arguments.
     """
     if isinstance(markov.storage, JsonStorage):
+        markov.storage.container = is_container(fname)
         if fname is None:
             markov.save(sys.stdout)
+        elif markov.storage.container:
+            if args.progress:
+                print('Saving JSON data...')
+            markov.save(fname)
         else:
             if fname.endswith('.bz2'):
                 open_ = bz2.open
@@ -178,6 +351,178 @@ def save(markov, fname, args):
     else:
         markov.save()
 
+class Checkpoint:
+    """Periodic ingestion checkpoint.
+
+    Generator state is saved to the output file with
+    input position and scanner and parser state
+    in storage settings. In SQLite bulk load mode, staged links
+    are committed with settings and merged by `finish`.
+
+    Attributes
+    ----------
+    markov : `markovchain.Markov`
+        Generator.
+    fname : `str`
+        Output file path.
+    args : `argparse.Namespace`
+        Command arguments.
+    interval : `int` or `None`
+        Input size between checkpoints.
+    size : `int`
+        Input size read since the last checkpoint.
+    """
+    def __init__(self, markov, fname, args, interval=None):
+        """Checkpoint constructor.
+
+        Parameters
+        ----------
+        markov : `markovchain.Markov`
+            Generator.
+        fname : `str`
+            Output file path.
+        args : `argparse.Namespace`
+            Command arguments.
+        interval : `int` or `None`, optional
+            Input size between checkpoints (default: `None`).
+        """
+        self.markov = markov
+        self.fname = fname
+        self.args = args
+        self.interval = interval
+        self.size = 0
+
+    def __call__(self, position, size=1):
+        """Update input size and save a checkpoint if necessary.
+
+        Parameters
+        ----------
+        position : (`int`, `int`)
+            Input file index and offset.
+        size : `int`, optional
+            Input size read (default: 1).
+        """
+        if self.interval is None:
+            return
+        self.size += size
+        if self.size >= self.interval:
+            self.save(position)
+
+    def save(self, position):
+        """Save a checkpoint.
+
+        Parameters
+        ----------
+        position : (`int`, `int`)
+            Input file index and offset.
+        """
+        markov = self.markov
+        markov.storage.settings['checkpoint'] = {
+            'input': self.args.input,
+            'position': list(position),
+            'markov': markov.checkpoint()
+        }
+        if getattr(markov.storage, 'bulk', False):
+            markov.storage.commit_bulk()
+        else:
+            self.write()
+        self.size = 0
+
+    def write(self):
+        """Save generator to output file.
+
+        JSON files are replaced after saving, and the update log
+        of the output file is removed.
+        """
+        markov = self.markov
+        if self.fname is None or not isinstance(markov.storage, JsonStorage):
+            save(markov, self.fname, self.args)
+            return
+        name, ext = os.path.splitext(self.fname)
+        tmp = name + '.tmp' + ext
+        save(markov, tmp, self.args)
+        os.replace(tmp, self.fname)
+        remove_log(self.fname)
+
+    def restore(self):
+        """Restore generator state from the last checkpoint
+        if resuming.
+
+        Raises
+        ------
+        ValueError
+            If resuming and there is no checkpoint or input files
+            do not match, or if not resuming and there is a checkpoint.
+
+        Returns
+        -------
+        (`int`, `int`)
+            Input file index and offset.
+        """
+        data = self.markov.storage.settings.get('checkpoint')
+        if not self.args.resume:
+            if data is not None:
+                raise ValueError('unfinished checkpoint in {0}: use --resume'
+                                 .format(self.fname))
+            return 0, 0
+        if data is None:
+            raise ValueError('no checkpoint in {0}'.format(self.fname))
+        if data['input'] != self.args.input:
+            raise ValueError('input files do not match checkpoint: {0}'
+                             .format(data['input']))
+        self.markov.restore(data['markov'])
+        return tuple(data['position'])
+
+    def finish(self):
+        """Remove checkpoint from storage settings
+        and save generator to output file.
+        """
+        self.markov.storage.settings.pop('checkpoint', None)
+        self.write()
+
+def add_checkpoint_args(parser, unit):
+    """Add checkpoint arguments to a command parser.
+
+    Parameters
+    ----------
+    parser : `argparse.ArgumentParser`
+        Command parser.
+    unit : `str`
+        Checkpoint interval unit.
+    """
+    parser.add_argument('--checkpoint', metavar='N',
+                        type=int, default=None,
+                        help='save state to output file after reading'
+                             ' every N input %s' % unit)
+    parser.add_argument('--resume',
+                        action='store_true',
+                        help='continue from the last checkpoint'
+                             ' in output file')
+
+def check_checkpoint_args(fname, args):
+    """Validate checkpoint arguments.
+
+    Parameters
+    ----------
+    fname : `str` or `None`
+        Output file path.
+    args : `argparse.Namespace`
+        Command arguments.
+
+    Raises
+    ------
+    ValueError
+        If checkpoint interval <= 0 or output file is stdout
+        or update log is enabled.
+    """
+    if args.checkpoint is not None or args.resume:
+        if args.checkpoint is not None and args.checkpoint <= 0:
+            raise ValueError('checkpoint interval <= 0')
+        if fname is None:
+            raise ValueError('checkpoint requires an output file')
+        if getattr(args, 'log', False):
+            raise ValueError('checkpoint can not be used with update log')
+
 def save_image(img, fname):
     """Save an image.
 
@@ -225,10 +570,7 @@ def set_args(args):
             except AttributeError:
                 fname = '.json'
 
-    if fname is None or fname.endswith('.json') or fname.endswith('.json.bz2'):
-        args.type = JSON
-    else:
-        args.type = SQLITE
+    args.type = get_file_type(fname)
 
     settings = {}
     try:
@@ -339,6 +681,113 @@ def outfiles(fmt, nfiles, progress, leave=True):
     if progress:
         fnames.close()
 
+def cmd_compact(args):
+    """Merge JSON generator update log into state file.
+
+    Parameters
+    ----------
+    args : `argparse.Namespace`
+        Command arguments.
+
+    Raises
+    ------
+    ValueError
+        If state file is not JSON.
+    """
+    if args.type != JSON:
+        raise ValueError('update log requires a JSON state file')
+    log = log_path(args.state)
+    if not os.path.exists(log):
+        return
+
+    storage = load_json(args.state)
+    storage.load_log(log)
+
+    name, ext = os.path.splitext(args.state)
+    tmp = name + '.tmp' + ext
+    if is_container(args.state):
+        storage.container = True
+        storage.save(tmp)
+    else:
+        if args.state.endswith('.bz2'):
+            open_ = bz2.open
+        else:
+            open_ = open
+        with open_(tmp, 'wt') as fp:
+            storage.save(fp)
+    storage.close()
+    os.replace(tmp, args.state)
+    remove_log(args.state)
+
+def add_prune_args(parser):
+    """Add prune command arguments.
+
+    Parameters
+    ----------
+    parser : `argparse.ArgumentParser`
+        Command parser.
+    """
+    parser.add_argument('-m', '--min-count',
+                        type=int, default=2,
+                        help='minimum link count (default: %(default)s)')
+    parser.add_argument('-k', '--top',
+                        type=int, default=None,
+                        help='maximum number of links per state')
+    parser.add_argument('-q', '--quantize',
+                        type=int, default=None, choices=(8, 16),
+                        help='scale link counts to fit in QUANTIZE bits')
+    parser.add_argument('-o', '--output',
+                        default=None,
+                        help='output file (default: rewrite state file)')
+    parser.add_argument('state',
+                        help='state file')
+
+def cmd_prune(args):
+    """Remove rare links and print statistics.
+
+    Parameters
+    ----------
+    args : `argparse.Namespace`
+        Command arguments.
+    """
+    output = args.state if args.output is None else args.output
+    size = os.path.getsize(args.state)
+
+    if args.type == SQLITE:
+        from ..storage.sqlite import SqliteStorage
+        if output != args.state:
+            shutil.copyfile(args.state, output)
+        storage = SqliteStorage.load(output)
+        stats = storage.prune(args.min_count, args.top, args.quantize)
+        storage.cursor.execute('VACUUM')
+        storage.close()
+    else:
+        storage = load_json(args.state)
+        log = log_path(args.state)
+        if os.path.exists(log):
+            storage.load_log(log)
+        stats = storage.prune(args.min_count, args.top, args.quantize)
+        name, ext = os.path.splitext(output)
+        tmp = name + '.tmp' + ext
+        storage.container = is_container(output)
+        if storage.container:
+            storage.save(tmp)
+        else:
+            if output.endswith('.bz2'):
+                open_ = bz2.open
+            else:
+                open_ = open
+            with open_(tmp, 'wt') as fp:
+                storage.save(fp)
+        storage.close()
+        os.replace(tmp, output)
+        remove_log(output)
+
+    for key in ('states', 'links', 'count'):
+        print('%s: %d -> %d' % ((key,) + stats[key]))
+    print('size: %d -> %d' % (size, os.path.getsize(output)))
+    print('distance: %.6f' % stats['distance'])
+
 def cmd_settings(args):
     """Print generator settings.
 
@@ -348,6 +797,7 @@ def cmd_settings(args):
         Command arguments.
     """
     if args.type == SQLITE:
+        from ..storage.sqlite import SqliteStorage
         storage = SqliteStorage
     else:
         storage = JsonStorage
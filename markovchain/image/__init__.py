@@ -2,6 +2,7 @@ from .markov import MarkovImage
 from .scanner import ImageScanner
 from .traversal import Traversal, HLines, VLines, Spiral, Blocks, Hilbert
 from .type import ImageType, RGB, Grayscale, Indexed
+from .cache import LevelCache
 
 from ..scanner import Scanner
 from ..parser import Parser, LevelParser
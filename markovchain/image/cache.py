@@ -0,0 +1,205 @@
+import os
+import json
+import zlib
+from hashlib import sha256
+from tempfile import mkstemp
+
+from PIL import Image
+
+
+class LevelCache:
+    """On-disk cache of converted image levels.
+
+    Entries are keyed by input file content and conversion settings
+    and evicted in least recently used order.
+
+    Attributes
+    ----------
+    VERSION : `int`
+        Cache file format version.
+    SUFFIX : `str`
+        Cache file name suffix.
+    CHUNK_SIZE : `int`
+        Input file read chunk size.
+    directory : `str`
+        Cache directory.
+    max_size : `int`
+        Maximum cache size in bytes.
+    """
+
+    VERSION = 1
+    SUFFIX = '.levels'
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, directory, max_size=1 << 30):
+        """Level cache constructor.
+
+        Parameters
+        ----------
+        directory : `str`
+            Cache directory.
+        max_size : `int`, optional
+            Maximum cache size in bytes (default: 1 GiB).
+        """
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, fname, markov):
+        """Get cache key.
+
+        Parameters
+        ----------
+        fname : `str`
+            Input file path.
+        markov : `markovchain.image.MarkovImage`
+            Generator.
+
+        Returns
+        -------
+        `str`
+            Cache key.
+        """
+        scanner = markov.scanner
+        settings = {
+            'version': self.VERSION,
+            'imgtype': markov.imgtype.save(),
+            'resize': scanner.resize,
+            'levels': scanner.levels,
+            'level_scale': scanner.level_scale,
+            'scale': int(scanner.scale)
+        }
+        digest = sha256(json.dumps(settings, sort_keys=True).encode('utf-8'))
+        with open(fname, 'rb') as fp:
+            for chunk in iter(lambda: fp.read(self.CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def path(self, key):
+        """Get cache file path.
+
+        Parameters
+        ----------
+        key : `str`
+            Cache key.
+
+        Returns
+        -------
+        `str`
+            File path.
+        """
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def get(self, key):
+        """Get cached level images.
+
+        Parameters
+        ----------
+        key : `str`
+            Cache key.
+
+        Returns
+        -------
+        `list` of `list` of `PIL.Image` or `None`
+            Level images for each channel
+            or `None` if key is not in the cache.
+        """
+        fname = self.path(key)
+        try:
+            with open(fname, 'rb') as fp:
+                data = zlib.decompress(fp.read())
+        except (OSError, zlib.error):
+            return None
+        try:
+            os.utime(fname)
+        except OSError:
+            pass
+        offset = data.index(b'\n') + 1
+        header = data[:offset]
+        ret = []
+        for levels in json.loads(header.decode('utf-8')):
+            channel = []
+            for mode, width, height, size in levels:
+                channel.append(Image.frombytes(
+                    mode, (width, height), data[offset:offset + size]
+                ))
+                offset += size
+            ret.append(channel)
+        return ret
+
+    def put(self, key, pyramids):
+        """Add level images to the cache.
+
+        Parameters
+        ----------
+        key : `str`
+            Cache key.
+        pyramids : `list` of `list` of `PIL.Image`
+            Level images for each channel.
+        """
+        header = []
+        data = []
+        for levels in pyramids:
+            channel = []
+            for img in levels:
+                img_data = img.tobytes()
+                channel.append((img.mode, img.size[0], img.size[1],
+                                len(img_data)))
+                data.append(img_data)
+            header.append(channel)
+        data.insert(0, json.dumps(header).encode('utf-8') + b'\n')
+
+        fd, tmp = mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(zlib.compress(b''.join(data), 1))
+            os.replace(tmp, self.path(key))
+        except BaseException:
+            os.remove(tmp)
+            raise
+        self.evict()
+
+    def size(self):
+        """Get cache size.
+
+        Returns
+        -------
+        `int`
+            Total cache file size in bytes.
+        """
+        return sum(size for _, _, size in self._entries())
+
+    def evict(self):
+        """Remove least recently used entries until cache size
+        does not exceed `max_size`.
+        """
+        entries = sorted(self._entries())
+        size = sum(size for _, _, size in entries)
+        for _, fname, entry_size in entries:
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(fname)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+
+    def _entries(self):
+        """Get cache entries.
+
+        Returns
+        -------
+        `list` of (`float`, `str`, `int`)
+            Last use time, path and size of cache files.
+        """
+        ret = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(self.SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                ret.append((stat.st_mtime, entry.path, stat.st_size))
+        return ret
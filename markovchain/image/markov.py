@@ -61,9 +61,55 @@ class MarkovImage(Markov):
         #if self.parser is None:
         #    raise ValueError('no parser')
         imgs = self.imgtype.convert(data)
-        for channel, data in zip(self.imgtype.channels, imgs):
+        if isinstance(self.scanner, ImageScanner):
+            imgs = self.scanner.scan_channels(imgs, part)
+        else:
+            imgs = (self.scanner(img, part) for img in imgs)
+        self._add_channels(imgs, part, dataset)
+
+    def pyramids(self, img):
+        """Convert an image to channel level images.
+
+        Parameters
+        ----------
+        img : `PIL.Image`
+            Input image.
+
+        Returns
+        -------
+        `list` of `list` of `PIL.Image`
+            Level images for each channel.
+        """
+        return [self.scanner.pyramid(self.scanner.input(channel))
+                for channel in self.imgtype.convert(img)]
+
+    def data_pyramids(self, pyramids, dataset=''):
+        """Parse channel level images.
+
+        Parameters
+        ----------
+        pyramids : `list` of `list` of `PIL.Image`
+            Level images for each channel (see `pyramids`).
+        dataset : `str`, optional
+            Dataset key prefix (default: '').
+        """
+        self._add_channels(self.scanner.scan_pyramids(pyramids),
+                           False, dataset)
+
+    def _add_channels(self, channels, part, dataset):
+        """Parse scanned channels.
+
+        Parameters
+        ----------
+        channels : `iterable` of `iterable` of `iterable` of `str`
+            Level tokens for each channel.
+        part : `bool`
+            True if data is partial.
+        dataset : `str`
+            Dataset key prefix.
+        """
+        for channel, data in zip(self.imgtype.channels, channels):
             key = dataset + channel
-            data = self.scanner(data, part)
             if isinstance(self.parser, LevelParser):
                 self.storage.add_links(self.parser(data, part, key))
             else:
@@ -111,6 +157,117 @@ class MarkovImage(Markov):
         `PIL.Image`
             Generated image.
 
+        Raises
+        ------
+        ValueError
+        """
+        args = self._generate_args(width, height, state_size, levels,
+                                   start_level, start_image)
+        if not isinstance(args, tuple):
+            return args
+        width, height, state_sizes, start_level, start_images = args
+
+        channels = [
+            self._channel(
+                width, height, state_sizes,
+                start_level, img, dataset + channel
+            )
+            for channel, img in zip(self.imgtype.channels, start_images)
+        ]
+
+        return self.imgtype.merge(channels)
+
+    def strips(self, width, height,
+               state_size=None, levels=None,
+               start_level=-1, start_image=None,
+               dataset=''):
+        """Generate an image in horizontal strips.
+
+        Only the initial level image and one strip per level
+        are kept in memory. Each strip of a level is generated
+        from a row of the previous level, so the output is different
+        from the output of `__call__` with the same random state.
+
+        Parameters
+        ----------
+        width : `int`
+            Image width.
+        height : `int`
+            Image height.
+        state_size : `None` or `int` or `list` of `int`, optional
+            State size (default: `None`).
+        levels : `int`, optional
+            Number of levels to generate (default: `self.scanner.levels`).
+        start_level : `int`, optional
+            Initial level (default: -1).
+        start_image : `PIL.Image` or `None`
+            Initial level image (default: `None`).
+        dataset : `str`, optional
+            Dataset key prefix (default: '').
+
+        Returns
+        -------
+        (`int`, `int`, `generator` of `PIL.Image`)
+            Generated image width, height and strips.
+
+        Raises
+        ------
+        ValueError
+        """
+        args = self._generate_args(width, height, state_size, levels,
+                                   start_level, start_image)
+        if not isinstance(args, tuple):
+            return args.size[0], args.size[1], iter([args])
+        width, height, state_sizes, start_level, start_images = args
+
+        level = start_level + 1
+        if start_level < 0:
+            level += 1
+        out_width, out_height = width, height
+        for scale in islice(self.scanner.level_scale, level - 1,
+                            start_level + len(state_sizes)):
+            out_width *= scale
+            out_height *= scale
+
+        channels = [
+            self._channel_strips(
+                width, height, state_sizes,
+                start_level, img, dataset + channel
+            )
+            for channel, img in zip(self.imgtype.channels, start_images)
+        ]
+
+        return (
+            out_width, out_height,
+            (self.imgtype.merge(list(strips)) for strips in zip(*channels))
+        )
+
+    def _generate_args(self, width, height, state_size, levels,
+                       start_level, start_image):
+        """Get image generation arguments.
+
+        Parameters
+        ----------
+        width : `int`
+            Image width.
+        height : `int`
+            Image height.
+        state_size : `None` or `int` or `list` of `int`
+            State size.
+        levels : `int` or `None`
+            Number of levels to generate.
+        start_level : `int`
+            Initial level.
+        start_image : `PIL.Image` or `None`
+            Initial level image.
+
+        Returns
+        -------
+        (`int`, `int`, `list` of `int`, `int`, `iterable` of (`PIL.Image` or `None`)) or `PIL.Image`
+            Initial level width and height, level state sizes,
+            initial level and initial channel images,
+            or start image if there are no levels to generate.
+
         Raises
         ------
         ValueError
@@ -146,15 +303,7 @@ class MarkovImage(Markov):
                 else:
                     state_sizes[i] = self.parser.state_sizes[0]
 
-        channels = [
-            self._channel(
-                width, height, state_sizes,
-                start_level, img, dataset + channel
-            )
-            for channel, img in zip(self.imgtype.channels, start_image)
-        ]
-
-        return self.imgtype.merge(channels)
+        return width, height, state_sizes, start_level, start_image
 
     def _imgdata(self, width, height,
                  state_size=None, start='', dataset=''):
@@ -188,10 +337,11 @@ class MarkovImage(Markov):
             yield state_to_pixel(start)
             size -= 1
 
+        generate = self.generator(state_size, dataset)
         while size > 0:
             prev_size = size
 
-            pixels = self.generate(state_size, start, dataset)
+            pixels = generate(start)
             pixels = islice(pixels, 0, size)
 
             for pixel in pixels:
@@ -277,3 +427,71 @@ class MarkovImage(Markov):
                     self._write_imgdata(ret, data, blk, x, y)
             start_image = ret
         return ret
+
+    def _channel_strips(self, width, height, state_sizes,
+                        start_level, start_image, dataset):
+        """Generate a channel in horizontal strips.
+
+        Parameters
+        ----------
+        width : `int`
+            Image width.
+        height : `int`
+            Image height.
+        state_sizes : `list` of (`int` or `None`)
+            Level state sizes.
+        start_level : `int`
+            Initial level.
+        start_image : `PIL.Image` or `None`
+            Initial level image.
+        dataset : `str`
+            Dataset key prefix.
+
+        Returns
+        -------
+        `generator` of `PIL.Image`
+            Generated image strips.
+        """
+        if start_image is None:
+            start_image = self._channel(width, height, state_sizes[:1],
+                                        -1, None, dataset)
+            state_sizes = state_sizes[1:]
+            start_level = 0
+        strips = iter([start_image])
+        for level, state_size in enumerate(state_sizes, start_level + 1):
+            key = dataset + level_dataset(level)
+            strips = self._level_strips(strips, level, state_size, key)
+        return strips
+
+    def _level_strips(self, parents, level, state_size, dataset):
+        """Generate level strips.
+
+        Parameters
+        ----------
+        parents : `iterable` of `PIL.Image`
+            Previous level strips.
+        level : `int`
+            Level number.
+        state_size : `int`
+            Level state size.
+        dataset : `str`
+            Level dataset key.
+
+        Returns
+        -------
+        `generator` of `PIL.Image`
+            Level strips, one for each previous level row.
+        """
+        scale = self.scanner.level_scale[level - 1]
+        for parent in parents:
+            width, height = parent.size
+            pixels = parent.load()
+            for y in range(height):
+                ret = self.imgtype.create_channel(width * scale, scale)
+                for x in range(width):
+                    start = pixel_to_state(pixels[x, y])
+                    data = self._imgdata(scale, scale, state_size,
+                                         start, dataset)
+                    blk = self.scanner.traversal[level](scale, scale, False)
+                    self._write_imgdata(ret, data, blk, x * scale)
+                yield ret
@@ -0,0 +1,171 @@
+import zlib
+from struct import pack
+
+
+class PngWriter:
+    """Streaming PNG image writer.
+
+    Image data is written in horizontal strips,
+    so the whole image does not have to be kept in memory.
+
+    Attributes
+    ----------
+    SIGNATURE : `bytes`
+        PNG file signature.
+    COLOR_TYPES : `dict` of (`str`, (`int`, `int`))
+        PNG color types and bytes per pixel by image mode.
+    CHUNK_SIZE : `int`
+        Maximum compressed image data chunk size.
+    fp : `file`
+        Output file.
+    width : `int`
+        Image width.
+    height : `int`
+        Image height.
+    mode : `str`
+        Image mode.
+    rows : `int`
+        Number of rows written.
+    """
+
+    SIGNATURE = b'\x89PNG\r\n\x1a\n'
+    COLOR_TYPES = {
+        'L': (0, 1),
+        'RGB': (2, 3),
+        'P': (3, 1)
+    }
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, fp, width, height, mode, palette=None, level=6):
+        """PNG writer constructor.
+
+        Parameters
+        ----------
+        fp : `file`
+            Output file opened in binary mode.
+        width : `int`
+            Image width.
+        height : `int`
+            Image height.
+        mode : `str`
+            Image mode ('L', 'RGB' or 'P').
+        palette : `list` of `int`, optional
+            Image palette (required if mode is 'P').
+        level : `int`, optional
+            Compression level (default: 6).
+
+        Raises
+        ------
+        ValueError
+            If image mode is not supported or palette is missing.
+        """
+        try:
+            color_type, self._bpp = self.COLOR_TYPES[mode]
+        except KeyError:
+            raise ValueError('unsupported image mode: {0}'.format(mode))
+        if mode == 'P' and palette is None:
+            raise ValueError('no palette')
+
+        self.fp = fp
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.rows = 0
+        self._compress = zlib.compressobj(level)
+        self._data = []
+        self._data_size = 0
+
+        fp.write(self.SIGNATURE)
+        self._chunk(b'IHDR', pack('>IIBBBBB', width, height,
+                                  8, color_type, 0, 0, 0))
+        if mode == 'P':
+            self._chunk(b'PLTE', bytes(palette[:768]))
+
+    def _chunk(self, tag, data):
+        """Write a chunk.
+
+        Parameters
+        ----------
+        tag : `bytes`
+            Chunk type.
+        data : `bytes`
+            Chunk data.
+        """
+        self.fp.write(pack('>I', len(data)))
+        self.fp.write(tag)
+        self.fp.write(data)
+        self.fp.write(pack('>I', zlib.crc32(data, zlib.crc32(tag))))
+
+    def _write_data(self, data):
+        """Write compressed image data.
+
+        Parameters
+        ----------
+        data : `bytes`
+            Compressed image data.
+        """
+        if data:
+            self._data.append(data)
+            self._data_size += len(data)
+            if self._data_size >= self.CHUNK_SIZE:
+                self._flush()
+
+    def _flush(self):
+        """Write buffered image data chunk.
+        """
+        if self._data:
+            self._chunk(b'IDAT', b''.join(self._data))
+            self._data = []
+            self._data_size = 0
+
+    def write(self, img):
+        """Write an image strip.
+
+        Parameters
+        ----------
+        img : `PIL.Image`
+            Image strip.
+
+        Raises
+        ------
+        ValueError
+            If strip mode or width is invalid or image is complete.
+        """
+        width, height = img.size
+        if img.mode != self.mode:
+            raise ValueError('invalid strip mode: {0} != {1}'
+                             .format(img.mode, self.mode))
+        if width != self.width:
+            raise ValueError('invalid strip width: {0} != {1}'
+                             .format(width, self.width))
+        if self.rows + height > self.height:
+            raise ValueError('image height exceeded')
+
+        data = img.tobytes()
+        stride = width * self._bpp
+        rows = b''.join(b'\0' + data[i:i + stride]
+                        for i in range(0, len(data), stride))
+        self._write_data(self._compress.compress(rows))
+        self.rows += height
+
+    def close(self):
+        """Finish the image.
+
+        Raises
+        ------
+        ValueError
+            If not all rows were written.
+        """
+        if self.rows != self.height:
+            raise ValueError('incomplete image: {0} / {1} rows'
+                             .format(self.rows, self.height))
+        self._write_data(self._compress.flush())
+        self._flush()
+        self._chunk(b'IEND', b'')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.close()
@@ -2,23 +2,28 @@ from math import floor
 from itertools import islice
 from functools import reduce
 
-
 from ..scanner import Scanner
-from ..util import fill, to_list, load
+from ..util import fill, to_list, load, lazy_import
 from .traversal import Traversal, HLines
 from .util import get_image_scale, pixel_to_state, Resampling
 
+np = lazy_import('numpy') # pylint:disable=invalid-name
+
 
 class ImageScanner(Scanner):
     """Image scanner class.
 
     Attributes
     ----------
+    fused : `bool`
+        `True` if `scan_channels` traverses all channels at once
+        (requires numpy).
     resize : (`int`, `int`) or `None`
         If not None, resize images before scanning.
     min_size : `int`
         Minimum image size.
     """
+    fused = np is not None
     def __init__(self,
                  resize=None,
                  levels=1,
@@ -182,6 +187,29 @@ class ImageScanner(Scanner):
             img = img.resize((width // scale, height // scale), self.scale)
         return img
 
+    def pyramid(self, img):
+        """Get all image levels.
+
+        Each level is downscaled from the next one.
+
+        Parameters
+        ----------
+        img : `PIL.Image`
+            Input image.
+
+        Returns
+        -------
+        `list` of `PIL.Image`
+            Level images.
+        """
+        ret = [img]
+        for scale in reversed(self.level_scale):
+            width, height = img.size
+            img = img.resize((width // scale, height // scale), self.scale)
+            ret.append(img)
+        ret.reverse()
+        return ret
+
     def _scan_level(self, level, prev, img):
         """Scan a level.
 
@@ -199,6 +227,7 @@ class ImageScanner(Scanner):
         `generator` of (`str` or `markovchain.scanner.Scanner.END` or (`markovchain.scanner.Scanner.START`, `str`))
             Token generator.
         """
+        pixels = img.load()
         if level == 0:
             width, height = img.size
         else:
@@ -210,26 +239,207 @@ class ImageScanner(Scanner):
                 if xy is None:
                     yield self.END
                 else:
-                    yield pixel_to_state(img.getpixel(xy))
+                    yield pixel_to_state(pixels[xy])
             yield self.END
         else:
+            prev_pixels = prev.load()
             scale = self.level_scale[level - 1]
             for xy in tr:
                 x0 = xy[0] * scale
                 y0 = xy[1] * scale
                 start = (
                     self.START,
-                    pixel_to_state(prev.getpixel(xy))
+                    pixel_to_state(prev_pixels[xy])
                 )
                 yield start
                 for dxy in self.traversal[level](scale, scale, True):
                     if dxy is None:
                         yield start
+                        continue
                     yield pixel_to_state(
-                        img.getpixel((x0 + dxy[0], y0 + dxy[1]))
+                        pixels[x0 + dxy[0], y0 + dxy[1]]
                     )
                 yield self.END
 
+    def _level_template(self, level, size, prev_size):
+        """Get level token layout.
+
+        Parameters
+        ----------
+        level : `int`
+            Level number.
+        size : (`int`, `int`)
+            Level image size.
+        prev_size : (`int`, `int`) or `None`
+            Previous level image size.
+
+        Returns
+        -------
+        (`int`, `numpy.ndarray`, `numpy.ndarray`, `numpy.ndarray`, `numpy.ndarray`, `numpy.ndarray`)
+            Token count, pixel indices, pixel token positions,
+            start token positions, start pixel indices in previous level
+            and end token positions.
+        """
+        width = size[0]
+        if level == 0:
+            pixels = []
+            pixel_pos = []
+            end_pos = []
+            pos = 0
+            for xy in self.traversal[0](width, size[1], True):
+                if xy is None:
+                    end_pos.append(pos)
+                else:
+                    pixels.append(xy[1] * width + xy[0])
+                    pixel_pos.append(pos)
+                pos += 1
+            end_pos.append(pos)
+            empty = np.zeros(0, dtype=np.intp)
+            return (
+                pos + 1,
+                np.array(pixels, dtype=np.intp),
+                np.array(pixel_pos, dtype=np.intp),
+                empty,
+                empty,
+                np.array(end_pos, dtype=np.intp)
+            )
+
+        scale = self.level_scale[level - 1]
+        block_pixels = []
+        block_pixel_pos = []
+        block_start_pos = [0]
+        pos = 1
+        for dxy in self.traversal[level](scale, scale, True):
+            if dxy is None:
+                block_start_pos.append(pos)
+            else:
+                block_pixels.append(dxy[1] * width + dxy[0])
+                block_pixel_pos.append(pos)
+            pos += 1
+        block_size = pos + 1
+
+        prev_width = prev_size[0]
+        blocks = []
+        prev_pixels = []
+        for x, y in self.traversal[0](prev_width, prev_size[1], False):
+            blocks.append(y * scale * width + x * scale)
+            prev_pixels.append(y * prev_width + x)
+        nblocks = len(blocks)
+        blocks = np.array(blocks, dtype=np.intp)[:, None]
+        block_pos = np.arange(0, nblocks * block_size, block_size,
+                              dtype=np.intp)
+        return (
+            nblocks * block_size,
+            (blocks + block_pixels).ravel(),
+            (block_pos[:, None] + block_pixel_pos).ravel(),
+            (block_pos[:, None] + block_start_pos).ravel(),
+            np.repeat(np.array(prev_pixels, dtype=np.intp),
+                      len(block_start_pos)),
+            block_pos + block_size - 1
+        )
+
+    def scan_channels(self, imgs, part=False):
+        """Scan image channels.
+
+        Parameters
+        ----------
+        imgs : `iterable` of `PIL.Image`
+            Channel images with 8-bit pixels.
+        part : `bool`, optional
+            True if data is partial.
+
+        Raises
+        ------
+        NotImplementedError
+            If `part` is `True`.
+
+        Returns
+        -------
+        `list` of `generator` of `list` of (`str` or `markovchain.scanner.Scanner.END` or (`markovchain.scanner.Scanner.START`, `str`))
+            Token generators for each channel.
+        """
+        if part:
+            raise NotImplementedError()
+        if not self.fused:
+            return [self(img) for img in imgs]
+        return self.scan_pyramids(
+            [self.pyramid(self.input(img)) for img in imgs]
+        )
+
+    def scan_pyramids(self, pyramids):
+        """Scan image channel levels.
+
+        If numpy is available, each level is traversed once
+        for all channels and pixel values are gathered
+        from a multi-channel array.
+
+        Parameters
+        ----------
+        pyramids : `list` of `list` of `PIL.Image`
+            Level images with 8-bit pixels for each channel
+            (see `pyramid`).
+
+        Returns
+        -------
+        `list` of `generator` of `list` of (`str` or `markovchain.scanner.Scanner.END` or (`markovchain.scanner.Scanner.START`, `str`))
+            Token generators for each channel.
+        """
+        if not self.fused:
+            return [self._scan_pyramid(levels) for levels in pyramids]
+
+        levels = list(zip(*pyramids))
+        arrays = [None] * len(levels)
+        tokens = np.empty(256, dtype=object)
+        tokens[:] = [pixel_to_state(px) for px in range(256)]
+        start_tokens = np.empty(256, dtype=object)
+        start_tokens[:] = [(self.START, token) for token in tokens]
+
+        def get_array(level):
+            if arrays[level] is None:
+                arr = np.stack([np.asarray(img) for img in levels[level]],
+                               axis=-1)
+                arrays[level] = arr.reshape(-1, arr.shape[-1])
+            return arrays[level]
+
+        templates = []
+        prev_size = None
+        for level, imgs in enumerate(levels):
+            size = imgs[0].size
+            templates.append(self._level_template(level, size, prev_size))
+            prev_size = size
+
+        def scan(channel):
+            for level, template in enumerate(templates):
+                count, pixels, pixel_pos, start_pos, start_pixels, end_pos = \
+                    template
+                ret = np.empty(count, dtype=object)
+                ret[pixel_pos] = tokens[get_array(level)[pixels, channel]]
+                if level > 0:
+                    prev = get_array(level - 1)[start_pixels, channel]
+                    ret[start_pos] = start_tokens[prev]
+                ret[end_pos] = self.END
+                yield ret.tolist()
+
+        return [scan(channel) for channel in range(len(pyramids))]
+
+    def _scan_pyramid(self, levels):
+        """Scan image levels.
+
+        Parameters
+        ----------
+        levels : `list` of `PIL.Image`
+            Level images.
+
+        Returns
+        -------
+        `generator` of `generator` of (`str` or `markovchain.scanner.Scanner.END` or (`markovchain.scanner.Scanner.START`, `str`))
+            Level token generators.
+        """
+        prev = None
+        for level, img in enumerate(levels):
+            yield self._scan_level(level, prev, img)
+            prev = img
+
     def __call__(self, img, part=False):
         """Scan an image.
 
@@ -252,14 +462,7 @@ class ImageScanner(Scanner):
         """
         if part:
             raise NotImplementedError()
-
-        prev = None
-        resized = self.input(img)
-
-        for level in range(self.levels):
-            img = self.level(resized, level)
-            yield self._scan_level(level, prev, img)
-            prev = img
+        yield from self._scan_pyramid(self.pyramid(self.input(img)))
 
     def __eq__(self, scanner):
         return (self.resize == scanner.resize
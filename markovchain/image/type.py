@@ -38,7 +38,9 @@ class ImageType(SaveLoad):
         -------
         `tuple` of `PIL.Image.Image`
         """
-        return (img.convert(self.mode),)
+        if img.mode != self.mode:
+            img = img.convert(self.mode)
+        return (img,)
 
     def create(self, width, height):
         """Create an image of type.
@@ -112,7 +114,9 @@ class RGB(ImageType):
     channels = ['_R', '_G', '_B']
 
     def convert(self, img):
-        return img.convert(self.mode).split()
+        if img.mode != self.mode:
+            img = img.convert(self.mode)
+        return img.split()
 
 
 class Indexed(ImageType):
@@ -54,6 +54,26 @@ class ParserBase(SaveLoad):
         """
         return self.parse(data)
 
+    def checkpoint(self):
+        """Get parser state.
+
+        Returns
+        -------
+        `object`
+            JSON data.
+        """
+        return None
+
+    def restore(self, state):
+        """Restore parser state.
+
+        Parameters
+        ----------
+        state : `object`
+            Parser state from `checkpoint`.
+        """
+        pass
+
 
 class Parser(ParserBase):
     """Default parser class.
@@ -139,6 +159,22 @@ class Parser(ParserBase):
             self.state.extend(repeat('', self.state_size))
         self.end = True
 
+    def checkpoint(self):
+        return {'state': list(self.state), 'end': self.end}
+
+    def restore(self, state):
+        """
+        Raises
+        ------
+        ValueError
+            If state size is invalid.
+        """
+        if len(state['state']) != self.state_size:
+            raise ValueError('invalid parser state size: {0} != {1}'
+                             .format(len(state['state']), self.state_size))
+        self.state.extend(state['state'])
+        self.end = state['end']
+
     def __call__(self, data, part=False, dataset=''):
         """Parse tokens.
 
@@ -269,6 +305,13 @@ class LevelParser(ParserBase):
         for parser in self.parsers:
             parser.reset()
 
+    def checkpoint(self):
+        return [parser.checkpoint() for parser in self.parsers]
+
+    def restore(self, state):
+        for parser, parser_state in zip(self.parsers, state):
+            parser.restore(parser_state)
+
     def __call__(self, data, part=False, dataset=''):
         """Parse tokens.
 
@@ -58,3 +58,23 @@ class Scanner(SaveLoad):
         """Reset scanner state.
         """
         pass
+
+    def checkpoint(self):
+        """Get scanner state.
+
+        Returns
+        -------
+        `object`
+            JSON data.
+        """
+        return None
+
+    def restore(self, state):
+        """Restore scanner state.
+
+        Parameters
+        ----------
+        state : `object`
+            Scanner state from `checkpoint`.
+        """
+        pass
@@ -1,3 +1,16 @@
-from .base import Storage
+from .base import Storage, Generator
+from .sampling import Sampling
+from .constraint import Constraint
+from .beam import BeamSearch
+from .backoff import BackoffIndex
 from .json import JsonStorage
-from .sqlite import SqliteStorage
+from .shared import SharedStorage
+from .trie import TrieStorage
+
+
+def __getattr__(name):
+    if name == 'SqliteStorage':
+        from .sqlite import SqliteStorage
+        return SqliteStorage
+    raise AttributeError('module {0!r} has no attribute {1!r}'
+                         .format(__name__, name))
@@ -0,0 +1,149 @@
+from bisect import bisect_right
+from collections import deque
+from itertools import accumulate, chain, repeat
+from random import randint
+
+from ..util import state_size_dataset
+
+
+class BackoffIndex:
+    """Combined index of forward links of several state sizes.
+
+    States of all sizes are stored in a trie keyed by state tokens
+    from last to first, so that a single walk from the last generated
+    token finds the longest known state.
+
+    Attributes
+    ----------
+    storage : `markovchain.storage.Storage`
+        Storage.
+    dataset : `str`
+        Dataset key prefix.
+    state_sizes : `list` of `int`
+        State sizes.
+    state_size : `int`
+        Maximum state size.
+    root : `list`
+        Trie root. Trie nodes are lists of links
+        ((`list` of `int`, `list` of `str`) (cumulative counts,
+        values) or `None`) and children (`dict` of (`str`, `list`)).
+    """
+
+    def __init__(self, storage, state_sizes, dataset=''):
+        """Backoff index constructor.
+
+        Parameters
+        ----------
+        storage : `markovchain.storage.Storage`
+            Storage.
+        state_sizes : `iterable` of `int`
+            State sizes.
+        dataset : `str`, optional
+            Dataset key prefix.
+        """
+        self.storage = storage
+        self.dataset = dataset
+        self.state_sizes = sorted(set(state_sizes))
+        self.state_size = self.state_sizes[-1]
+        self.root = [None, {}]
+        for size in self.state_sizes:
+            self.add_dataset(dataset + state_size_dataset(size), size)
+
+    def add_dataset(self, key, size):
+        """Add states of a dataset.
+
+        Parameters
+        ----------
+        key : `str`
+            Dataset key.
+        size : `int`
+            State size.
+        """
+        storage = self.storage
+        try:
+            data = storage.get_dataset(key)
+        except KeyError:
+            return
+        for state in storage.get_states(key, ''):
+            state = storage.split_state(state)
+            links = storage.get_links(data, storage.get_state(state, size))
+            if not links:
+                continue
+            node = self.root
+            for token in reversed(state[-size:]):
+                try:
+                    node = node[1][token]
+                except KeyError:
+                    child = [None, {}]
+                    node[1][token] = child
+                    node = child
+            for _ in range(size - len(state)):
+                node = node[1].setdefault('', [None, {}])
+            node[0] = (
+                list(accumulate(link[0] for link in links)),
+                [link[1] for link in links]
+            )
+
+    def find(self, state, min_links=1):
+        """Find links of the longest known state.
+
+        Parameters
+        ----------
+        state : `collections.deque` of `str`
+            State.
+        min_links : `int`, optional
+            Minimum number of links (default: 1). Shorter states
+            are used if a longer state has fewer links.
+
+        Returns
+        -------
+        (`list` of `int`, `list` of `str`) or `None`
+            Cumulative link counts and values or `None`
+            if state is unknown.
+        """
+        node = self.root
+        best = None
+        longest = None
+        for token in reversed(state):
+            node = node[1].get(token)
+            if node is None:
+                break
+            links = node[0]
+            if links is not None:
+                longest = links
+                if len(links[1]) >= min_links:
+                    best = links
+        if best is None:
+            return longest
+        return best
+
+    def __call__(self, state=(), min_links=1):
+        """Generate a sequence.
+
+        Parameters
+        ----------
+        state : `str` or `iterable` of `str`, optional
+            Initial state (default: ()).
+        min_links : `int`, optional
+            Minimum number of links (default: 1).
+
+        Returns
+        -------
+        `generator` of `str`
+            Node value generator.
+        """
+        if isinstance(state, str):
+            state = self.storage.split_state(state)
+        state = deque(chain(repeat('', self.state_size), state),
+                      maxlen=self.state_size)
+        find = self.find
+        while True:
+            links = find(state, min_links)
+            if links is None:
+                return
+            counts, values = links
+            value = values[bisect_right(counts, randint(0, counts[-1] - 1))]
+            if value is None:
+                return
+            yield value
+            state.append(value)
@@ -1,9 +1,123 @@
 from abc import abstractmethod
 from random import randint
+from itertools import repeat
 
 from ..util import DOC_INHERIT_ABSTRACT
 
 
+class Generator:
+    """Sequence generator bound to a storage dataset.
+
+    Dataset handle and initial states are resolved once and reused
+    by subsequent calls.
+
+    Attributes
+    ----------
+    STATE_CACHE_SIZE : `int`
+        Maximum number of cached initial states.
+    storage : `markovchain.storage.Storage`
+        Storage.
+    dataset : `str`
+        Dataset key.
+    size : `int`
+        State size.
+    backward : `bool`
+        Link direction.
+    """
+    STATE_CACHE_SIZE = 4096
+
+    def __init__(self, storage, dataset, size, backward=False):
+        """Sequence generator constructor.
+
+        Parameters
+        ----------
+        storage : `markovchain.storage.Storage`
+            Storage.
+        dataset : `str`
+            Dataset key.
+        size : `int`
+            State size.
+        backward : `bool`, optional
+            Link direction.
+        """
+        self.storage = storage
+        self.dataset = dataset
+        self.size = size
+        self.backward = backward
+        self._data = None
+        self._states = {}
+
+    @property
+    def data(self):
+        """`object` : Dataset from `storage.get_dataset()`.
+
+        Raises
+        ------
+        KeyError
+            If dataset does not exist.
+        """
+        if self._data is None:
+            self._data = self.storage.get_dataset(self.dataset)
+        return self._data
+
+    def reset(self):
+        """Clear resolved dataset and states.
+        """
+        self._data = None
+        self._states.clear()
+
+    def get_state(self, state):
+        """Convert initial state.
+
+        Parameters
+        ----------
+        state : `str` or `iterable` of `str`
+            Initial state.
+
+        Returns
+        -------
+        `object`
+            State from `storage.get_state()`.
+        """
+        storage = self.storage
+        key = None
+        if isinstance(state, (str, tuple)):
+            try:
+                return storage.copy_state(self._states[state])
+            except KeyError:
+                key = state
+        if isinstance(state, str):
+            state = storage.split_state(state)
+        state = storage.get_state(state, self.size)
+        if key is not None and state is not None:
+            if len(self._states) >= self.STATE_CACHE_SIZE:
+                self._states.clear()
+            self._states[key] = storage.copy_state(state)
+        return state
+
+    def __call__(self, state=(), sampling=None):
+        """Generate a sequence.
+
+        Parameters
+        ----------
+        state : `str` or `iterable` of `str`, optional
+            Initial state (default: ()).
+        sampling : `markovchain.storage.Sampling` or `None`, optional
+            Link sampling policy (default: `None`, link count
+            proportional sampling).
+
+        Returns
+        -------
+        `generator` of `str`
+            Node value generator.
+        """
+        state = self.get_state(state)
+        if sampling is None:
+            return self.storage.do_generate(self.data, state, self.backward)
+        return self.storage.do_generate(self.data, state,
+                                        self.backward, sampling)
+
+
 class Storage(metaclass=DOC_INHERIT_ABSTRACT):
     """Storage base class.
 
@@ -11,6 +125,8 @@ class Storage(metaclass=DOC_INHERIT_ABSTRACT):
     ----------
     settings : `dict`
     state_separator : `str`
+    generators : `dict` of ((`str`, `int`, `bool`), `markovchain.storage.Generator`)
+        Cached sequence generators.
     """
 
     def __init__(self, settings=None):
@@ -23,6 +139,7 @@ class Storage(metaclass=DOC_INHERIT_ABSTRACT):
         if settings is None:
             settings = {}
         self.settings = settings
+        self.generators = {}
         sep = settings.get('storage', {}).get('state_separator', ' ')
         self._state_separator = sep
 
@@ -40,6 +157,8 @@ class Storage(metaclass=DOC_INHERIT_ABSTRACT):
         if self._state_separator is not None:
             self.replace_state_separator(self._state_separator, separator)
         self._state_separator = separator
+        for generator in self.generators.values():
+            generator.reset()
 
     def split_state(self, state):
         """Split state string.
@@ -69,7 +188,25 @@ class Storage(metaclass=DOC_INHERIT_ABSTRACT):
         """
         return self.state_separator.join(state)
 
-    def random_link(self, dataset, state, backward=False):
+    def copy_state(self, state):
+        """Copy a state from `self.get_state()`.
+
+        States that are modified by `self.follow_link()`
+        have to be copied before reuse.
+
+        Parameters
+        ----------
+        state : `object`
+            State.
+
+        Returns
+        -------
+        `object`
+            State copy.
+        """
+        return state
+
+    def random_link(self, dataset, state, backward=False, sampling=None):
         """Get a random link.
 
         Parameters
@@ -80,6 +217,9 @@ class Storage(metaclass=DOC_INHERIT_ABSTRACT):
             Link source.
         backward : `bool`, optional
             Link direction.
+        sampling : `markovchain.storage.Sampling` or `None`, optional
+            Link sampling policy (default: `None`, link count
+            proportional sampling).
 
         Raises
         ------
@@ -91,6 +231,8 @@ class Storage(metaclass=DOC_INHERIT_ABSTRACT):
         (`str` or `None`, `object` or `None`)
             Link value and next state.
         """
+        if sampling is not None:
+            return sampling.random_link(self, dataset, state, backward)
         links = self.get_links(dataset, state, backward)
         if not links:
             return None, None
@@ -102,7 +244,31 @@ class Storage(metaclass=DOC_INHERIT_ABSTRACT):
             x -= count
         raise RuntimeError('invalid link sum')
 
-    def generate(self, state, size, dataset, backward=False):
+    def generator(self, dataset, size, backward=False):
+        """Get a cached sequence generator.
+
+        Parameters
+        ----------
+        dataset : `str`
+            Dataset key.
+        size : `int`
+            State size.
+        backward : `bool`, optional
+            Link direction.
+
+        Returns
+        -------
+        `markovchain.storage.Generator`
+        """
+        key = (dataset, size, backward)
+        try:
+            return self.generators[key]
+        except KeyError:
+            generator = Generator(self, dataset, size, backward)
+            self.generators[key] = generator
+            return generator
+
+    def generate(self, state, size, dataset, backward=False, sampling=None):
         """Generate a sequence.
 
         Parameters
@@ -115,22 +281,168 @@ class Storage(metaclass=DOC_INHERIT_ABSTRACT):
             Dataset key.
         backward : `bool`, optional
             Link direction.
+        sampling : `markovchain.storage.Sampling` or `None`, optional
+            Link sampling policy.
 
         Returns
         -------
         `generator` of `str`
             Node value generator.
         """
-        if isinstance(state, str):
-            state = self.split_state(state)
-        state = self.get_state(state, size)
-        dataset = self.get_dataset(dataset)
+        generator = self.generator(dataset, size, backward)
+        if sampling is None:
+            return generator(state)
+        return generator(state, sampling)
+
+    def do_generate(self, dataset, state, backward=False, sampling=None):
+        """Generate a sequence.
+
+        Parameters
+        ----------
+        dataset : `object`
+            Dataset from `self.get_dataset()`.
+        state : `object`
+            State from `self.get_state()`.
+        backward : `bool`, optional
+            Link direction.
+        sampling : `markovchain.storage.Sampling` or `None`, optional
+            Link sampling policy.
+
+        Returns
+        -------
+        `generator` of `str`
+            Node value generator.
+        """
+        if sampling is not None:
+            yield from sampling.generate(self, dataset, state, backward)
+            return
+        random_link = self.random_link
         while True:
-            link, state = self.random_link(dataset, state, backward)
+            link, state = random_link(dataset, state, backward)
             if link is None or backward and link == '':
                 return
             yield link
 
+    def add_link_counts(self, links, dataset_prefix=''):
+        """Add links with counts.
+
+        Parameters
+        ----------
+        links : `iterable` of (`str`, `tuple` of `str`, `str`, `int`)
+            Links to add (dataset, source, target, count).
+        dataset_prefix : `str`, optional
+            Dataset key prefix.
+        """
+        for dataset, src, dst, count in links:
+            self.add_links(repeat((dataset, src, dst), count), dataset_prefix)
+
+    @staticmethod
+    def prune_counts(counts, min_count=1, top=None, quantize=None):
+        """Prune and quantize link counts of a state.
+
+        Parameters
+        ----------
+        counts : `list` of `int`
+            Link counts.
+        min_count : `int`, optional
+            Minimum link count (default: 1).
+        top : `int` or `None`, optional
+            Maximum number of links (default: unlimited).
+            Links with equal counts are kept in order.
+        quantize : `int` or `None`, optional
+            Count size in bits (default: no quantization).
+            Counts are scaled so that the largest count
+            is at most 2 ** quantize - 1.
+
+        Returns
+        -------
+        `list` of `int`
+            New link counts (0 if a link is removed).
+        """
+        ret = [count if count >= min_count else 0 for count in counts]
+        if top is not None and len(ret) - ret.count(0) > top:
+            order = sorted(range(len(ret)), key=lambda i: -ret[i])
+            for i in order[top:]:
+                ret[i] = 0
+        if quantize is not None:
+            limit = (1 << quantize) - 1
+            high = max(ret, default=0)
+            if high > limit:
+                ret = [max(1, round(count * limit / high)) if count else 0
+                       for count in ret]
+        return ret
+
+    def prune(self, min_count=1, top=None, quantize=None):
+        """Remove rare links and states without links.
+
+        Statistics are computed for forward links. Distance is
+        the mean total variation distance between old and new link
+        distributions of states weighted by state link count.
+        States without links have distance 1.
+
+        Parameters
+        ----------
+        min_count : `int`, optional
+            Minimum link count (default: 1).
+        top : `int` or `None`, optional
+            Maximum number of links per state (default: unlimited).
+        quantize : `int` or `None`, optional
+            Count size in bits (default: no quantization).
+
+        Raises
+        ------
+        ValueError
+            If arguments are invalid.
+
+        Returns
+        -------
+        `dict`
+            Statistics: 'states', 'links' and 'count' as
+            (`int`, `int`) (before and after), 'distance' as `float`.
+        """
+        if min_count < 1:
+            raise ValueError('min_count < 1')
+        if top is not None and top < 1:
+            raise ValueError('top < 1')
+        if quantize is not None and not 0 < quantize <= 64:
+            raise ValueError('invalid quantization: %r' % quantize)
+
+        states = [0, 0]
+        links = [0, 0]
+        total = [0, 0]
+        distance = [0.0]
+
+        def prune_state(counts, backward=False):
+            ret = self.prune_counts(counts, min_count, top, quantize)
+            if backward:
+                return ret
+            old = sum(counts)
+            new = sum(ret)
+            states[0] += 1
+            links[0] += len(counts)
+            total[0] += old
+            total[1] += new
+            if new:
+                states[1] += 1
+                links[1] += len(ret) - ret.count(0)
+                distance[0] += sum(
+                    abs(count / old - count2 / new)
+                    for count, count2 in zip(counts, ret)
+                ) * old / 2
+            else:
+                distance[0] += old
+            return ret
+
+        self.do_prune(prune_state)
+        for generator in self.generators.values():
+            generator.reset()
+        return {
+            'states': tuple(states),
+            'links': tuple(links),
+            'count': tuple(total),
+            'distance': distance[0] / total[0] if total[0] else 0.0
+        }
+
     def save(self, fp=None):
         """Update settings JSON data and save to file.
 
@@ -274,6 +586,18 @@ class Storage(metaclass=DOC_INHERIT_ABSTRACT):
         """
         pass
 
+    @abstractmethod
+    def do_prune(self, prune_state):
+        """Prune links.
+
+        Parameters
+        ----------
+        prune_state : `function`
+            Function that takes link counts of a state and link
+            direction and returns new counts (0 if a link is removed).
+        """
+        pass
+
     @abstractmethod
     def do_save(self, fp=None):
         """Save to file.
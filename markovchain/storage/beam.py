@@ -0,0 +1,195 @@
+from heapq import nlargest
+from math import log
+
+from .sampling import Sampling
+
+
+class BeamSearch:
+    """Beam search sequence generator.
+
+    Keeps `width` most likely partial sequences and expands them
+    by following their links until `width` sequences end or
+    `max_length` is reached. Sequences are compared by
+    log-likelihood divided by (length + 1) ** `alpha`.
+
+    State expansions (`width` most likely links of a state and their
+    log-probabilities) are computed once and shared by all beams
+    in the same state. The expansion cache is not updated when
+    storage changes.
+
+    Attributes
+    ----------
+    CACHE_SIZE : `int`
+        Maximum number of cached states.
+    width : `int`
+        Beam width.
+    alpha : `float`
+        Length normalization exponent (0 to compare log-likelihoods,
+        1 to compare mean log-probabilities of links).
+    max_length : `int`
+        Maximum sequence length.
+    cache : `dict` of (`tuple`, (`object`, `list` of (`float`, `tuple`)))
+        Datasets and expansions by dataset, link direction and state.
+    """
+
+    CACHE_SIZE = 65536
+
+    def __init__(self, width=4, alpha=1.0, max_length=256):
+        """Beam search constructor.
+
+        Parameters
+        ----------
+        width : `int`, optional
+            Beam width (default: 4).
+        alpha : `float`, optional
+            Length normalization exponent (default: 1.0).
+        max_length : `int`, optional
+            Maximum sequence length (default: 256).
+
+        Raises
+        ------
+        ValueError
+            If width < 1, alpha < 0 or max_length < 0.
+        """
+        if width < 1:
+            raise ValueError('width < 1')
+        if alpha < 0:
+            raise ValueError('alpha < 0')
+        if max_length < 0:
+            raise ValueError('max_length < 0')
+        self.width = width
+        self.alpha = alpha
+        self.max_length = max_length
+        self.cache = {}
+
+    def clear(self):
+        """Clear cached expansions.
+        """
+        self.cache.clear()
+
+    def score(self, log_prob, length):
+        """Get normalized sequence score.
+
+        Parameters
+        ----------
+        log_prob : `float`
+            Sequence log-likelihood.
+        length : `int`
+            Sequence length.
+
+        Returns
+        -------
+        `float`
+        """
+        if not self.alpha:
+            return log_prob
+        return log_prob / (length + 1) ** self.alpha
+
+    def expand(self, storage, dataset, state, backward=False):
+        """Get cached state expansion.
+
+        Parameters
+        ----------
+        storage : `markovchain.storage.Storage`
+            Storage.
+        dataset : `object`
+            Dataset from `storage.get_dataset()`.
+        state : `object`
+            State from `storage.get_state()`.
+        backward : `bool`, optional
+            Link direction.
+
+        Returns
+        -------
+        `list` of (`float`, (`int`, `str`, ...))
+            `width` most likely links and their log-probabilities.
+        """
+        key = Sampling.key(dataset, state, backward)
+        try:
+            return self.cache[key][1]
+        except KeyError:
+            links = storage.get_links(dataset, state, backward)
+            total = sum(link[0] for link in links)
+            links = nlargest(self.width, links, key=lambda link: link[0])
+            ret = [(log(link[0] / total), link) for link in links]
+            if len(self.cache) >= self.CACHE_SIZE:
+                self.cache.clear()
+            self.cache[key] = (dataset, ret)
+            return ret
+
+    def search(self, storage, dataset, state, backward=False,
+               max_length=None):
+        """Find most likely sequences.
+
+        Parameters
+        ----------
+        storage : `markovchain.storage.Storage`
+            Storage.
+        dataset : `object`
+            Dataset from `storage.get_dataset()`.
+        state : `object`
+            State from `storage.get_state()`.
+        backward : `bool`, optional
+            Link direction.
+        max_length : `int` or `None`, optional
+            Maximum sequence length (default: `self.max_length`).
+
+        Returns
+        -------
+        `list` of (`float`, `list` of `str`)
+            Up to `width` sequences and their scores, best first.
+            If no sequence ends, last beams are returned.
+        """
+        if max_length is None:
+            max_length = self.max_length
+        width = self.width
+        beams = [(0.0, [], state)]
+        finished = []
+        for length in range(max_length + 1):
+            candidates = []
+            for log_prob, tokens, state in beams:
+                for link_log_prob, link in self.expand(storage, dataset,
+                                                       state, backward):
+                    value = link[1]
+                    log_prob2 = log_prob + link_log_prob
+                    if value is None or backward and value == '':
+                        finished.append((self.score(log_prob2, length),
+                                         tokens))
+                    elif length < max_length:
+                        candidates.append((log_prob2, tokens, state, link))
+            if len(finished) >= width or not candidates:
+                break
+            beams = [
+                (log_prob, tokens + [link[1]],
+                 storage.follow_link(link, storage.copy_state(state),
+                                     backward))
+                for log_prob, tokens, state, link
+                in nlargest(width, candidates, key=lambda beam: beam[0])
+            ]
+        if not finished:
+            finished = [(self.score(log_prob, len(tokens)), tokens)
+                        for log_prob, tokens, _ in beams]
+        return nlargest(width, finished, key=lambda seq: seq[0])
+
+    def generate(self, storage, dataset, state, backward=False):
+        """Generate the most likely sequence.
+
+        Parameters
+        ----------
+        storage : `markovchain.storage.Storage`
+            Storage.
+        dataset : `object`
+            Dataset from `storage.get_dataset()`.
+        state : `object`
+            State from `storage.get_state()`.
+        backward : `bool`, optional
+            Link direction.
+
+        Returns
+        -------
+        `generator` of `str`
+            Node value generator.
+        """
+        res = self.search(storage, dataset, state, backward)
+        if res:
+            yield from res[0][1]
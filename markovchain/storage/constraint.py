@@ -0,0 +1,237 @@
+from bisect import bisect_right
+from heapq import heappush, heappop
+from itertools import count
+from math import inf
+from random import random
+
+from .sampling import Sampling
+
+
+class Constraint(Sampling):
+    """Constrained link sampling policy.
+
+    Links to forbidden tokens are removed before sampling.
+    If `max_length` is set, a distance table (minimum number
+    of tokens to the end of a sequence) is built for states
+    reachable from initial states, and links that can not end
+    a sequence within the remaining length are skipped.
+    If no link can end a sequence in time, links with
+    the shortest distance are used.
+
+    Distance tables are built on first use by following links
+    with `get_links` and `follow_link` and are not updated when
+    storage changes.
+
+    Attributes
+    ----------
+    forbidden : `frozenset` of `str`
+        Forbidden tokens.
+    max_length : `int` or `None`
+        Maximum sequence length.
+    distances : `dict` of (`tuple`, (`float`, `list` of `float`, `float`))
+        Distances, link distances and maximum link distances
+        by dataset, link direction and state.
+
+    Examples
+    --------
+    >>> constraint = Constraint(forbidden=['z'])
+    >>> constraint.links([(1, 'x'), (3, 'y'), (2, 'z')])
+    ([3, 4], [(3, 'y'), (1, 'x')])
+    """
+
+    def __init__(self, temperature=1.0, top_k=None, top_p=None,
+                 forbidden=(), max_length=None):
+        """Constrained sampling policy constructor.
+
+        Parameters
+        ----------
+        temperature : `float`, optional
+            Sampling temperature (default: 1.0).
+        top_k : `int` or `None`, optional
+            Maximum number of links (default: `None`, no limit).
+        top_p : `float` or `None`, optional
+            Minimum link weight fraction (default: `None`, no limit).
+        forbidden : `iterable` of `str`, optional
+            Forbidden tokens (default: ()).
+        max_length : `int` or `None`, optional
+            Maximum sequence length (default: `None`, no limit).
+
+        Raises
+        ------
+        ValueError
+            If sampling arguments are invalid or max_length < 0.
+        """
+        super().__init__(temperature, top_k, top_p)
+        if max_length is not None and max_length < 0:
+            raise ValueError('max_length < 0')
+        self.forbidden = frozenset(forbidden)
+        self.max_length = max_length
+        self.distances = {}
+
+    def clear(self):
+        """Clear cached links and distances.
+        """
+        super().clear()
+        self.distances.clear()
+
+    def links(self, links):
+        forbidden = self.forbidden
+        if forbidden:
+            links = [link for link in links if link[1] not in forbidden]
+        return super().links(links)
+
+    @staticmethod
+    def is_end(link, backward=False):
+        """Check if a link ends a sequence.
+
+        Parameters
+        ----------
+        link : (`int`, `str`, ...)
+            Link.
+        backward : `bool`, optional
+            Link direction.
+
+        Returns
+        -------
+        `bool`
+        """
+        return link[1] is None or backward and link[1] == ''
+
+    def distance(self, storage, dataset, state, backward=False):
+        """Get distance to the end of a sequence.
+
+        Parameters
+        ----------
+        storage : `markovchain.storage.Storage`
+            Storage.
+        dataset : `object`
+            Dataset from `storage.get_dataset()`.
+        state : `object`
+            State from `storage.get_state()`.
+        backward : `bool`, optional
+            Link direction.
+
+        Returns
+        -------
+        (`float`, `list` of `float`, `float`)
+            Minimum number of tokens to the end of a sequence
+            (`math.inf` if the end is unreachable), numbers
+            of tokens to the end of a sequence by link
+            and their maximum.
+        """
+        key = self.key(dataset, state, backward)
+        try:
+            return self.distances[key]
+        except KeyError:
+            pass
+
+        distances = self.distances
+        graph = {key: None}
+        stack = [(key, storage.copy_state(state))]
+        while stack:
+            src, state = stack.pop()
+            _, links = self.get_links(storage, dataset, state, backward)
+            children = []
+            for link in links:
+                if self.is_end(link, backward):
+                    children.append(None)
+                    continue
+                dst = storage.follow_link(link, storage.copy_state(state),
+                                          backward)
+                dst_key = self.key(dataset, dst, backward)
+                children.append(dst_key)
+                if dst_key not in distances and dst_key not in graph:
+                    graph[dst_key] = None
+                    stack.append((dst_key, dst))
+            graph[src] = children
+
+        parents = {}
+        dist = {}
+        queue = []
+        order = count()
+        for src, children in graph.items():
+            value = inf
+            for dst in children:
+                if dst is None:
+                    value = 0
+                elif dst in graph:
+                    parents.setdefault(dst, []).append(src)
+                else:
+                    value = min(value, distances[dst][0] + 1)
+            dist[src] = value
+            if value < inf:
+                heappush(queue, (value, next(order), src))
+        while queue:
+            value, _, dst = heappop(queue)
+            if value > dist[dst]:
+                continue
+            value += 1
+            for src in parents.get(dst, ()):
+                if value < dist[src]:
+                    dist[src] = value
+                    heappush(queue, (value, next(order), src))
+
+        for src, children in graph.items():
+            link_dist = [
+                0 if dst is None
+                else (dist[dst] if dst in dist else distances[dst][0]) + 1
+                for dst in children
+            ]
+            distances[src] = (dist[src], link_dist, max(link_dist, default=0))
+        return distances[key]
+
+    def generate(self, storage, dataset, state, backward=False):
+        """Generate a sequence.
+
+        Sequences are truncated to `max_length` tokens.
+
+        Parameters
+        ----------
+        storage : `markovchain.storage.Storage`
+            Storage.
+        dataset : `object`
+            Dataset from `storage.get_dataset()`.
+        state : `object`
+            State from `storage.get_state()`.
+        backward : `bool`, optional
+            Link direction.
+
+        Returns
+        -------
+        `generator` of `str`
+            Node value generator.
+        """
+        if self.max_length is None:
+            yield from super().generate(storage, dataset, state, backward)
+            return
+        remaining = self.max_length
+        while remaining > 0:
+            cumulative, links = self.get_links(storage, dataset,
+                                               state, backward)
+            if not links:
+                return
+            distance, link_dist, max_dist = self.distance(
+                storage, dataset, state, backward
+            )
+            if max_dist <= remaining:
+                idx = bisect_right(cumulative, random() * cumulative[-1])
+                idx = min(idx, len(links) - 1)
+            else:
+                limit = max(remaining, distance)
+                allowed = [i for i, value in enumerate(link_dist)
+                           if value <= limit]
+                weights = [
+                    cumulative[i] - cumulative[i - 1] if i else cumulative[0]
+                    for i in allowed
+                ]
+                x = random() * sum(weights)
+                for idx, weight in zip(allowed, weights):
+                    if x < weight:
+                        break
+                    x -= weight
+            link = links[idx]
+            if self.is_end(link, backward):
+                return
+            remaining -= 1
+            state = storage.follow_link(link, state, backward)
+            yield link[1]
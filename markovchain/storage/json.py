@@ -1,26 +1,141 @@
+import io
+import re
 import sys
 import json
+from random import randint
 from collections import deque
-from itertools import chain, repeat, tee
+from itertools import chain, repeat, tee, islice
+from os import SEEK_END
+from threading import Lock
 
 from .base import Storage
 
 
+class LazyDatasets(dict):
+    """Datasets loaded from a container file on first access.
+
+    Iteration, length and comparison load all datasets.
+    Datasets can be loaded by multiple threads.
+
+    Attributes
+    ----------
+    fp : `file`
+        Binary container file.
+    offsets : `dict` of (`str`, (`int`, `int`))
+        Offsets and sizes of datasets that are not loaded.
+    lock : `threading.Lock`
+        Container file lock.
+    """
+    def __init__(self, fp, offsets):
+        """Lazy datasets constructor.
+
+        Parameters
+        ----------
+        fp : `file`
+            Binary container file.
+        offsets : `dict` of (`str`, (`int`, `int`))
+            Dataset offsets and sizes.
+        """
+        super().__init__()
+        self.fp = fp
+        self.offsets = dict(offsets)
+        self.lock = Lock()
+
+    def __missing__(self, key):
+        with self.lock:
+            data = super().get(key)
+            if data is not None:
+                return data
+            offset, size = self.offsets[key]
+            self.fp.seek(offset)
+            data = json.loads(self.fp.read(size).decode('utf-8'))
+            self[key] = data
+            del self.offsets[key]
+            return data
+
+    def load_all(self):
+        """Load all datasets.
+        """
+        for key in list(self.offsets):
+            self[key] # pylint:disable=pointless-statement
+
+    def __contains__(self, key):
+        return super().__contains__(key) or key in self.offsets
+
+    def __iter__(self):
+        self.load_all()
+        return super().__iter__()
+
+    def __len__(self):
+        return super().__len__() + len(self.offsets)
+
+    def __eq__(self, data):
+        self.load_all()
+        return super().__eq__(data)
+
+    def __ne__(self, data):
+        return not self == data
+
+    def __repr__(self):
+        self.load_all()
+        return super().__repr__()
+
+    __hash__ = None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        self.load_all()
+        return super().keys()
+
+    def values(self):
+        self.load_all()
+        return super().values()
+
+    def items(self):
+        self.load_all()
+        return super().items()
+
+
 class JsonStorage(Storage):
     """JSON storage.
 
     Attributes
     ----------
+    SETTINGS_CHUNK_SIZE : `int`
+        Initial read size for `load_settings`.
+    RE_SETTINGS : `_sre.SRE_Pattern`
+        Settings key at the start of a file.
+    RE_FIRST_KEY : `_sre.SRE_Pattern`
+        First key at the start of a file.
+    CONTAINER_MAGIC : `bytes`
+        Container file header.
     nodes : `dict` of `dict` of ([`int`, `str`] or [`list` of `int`, `list` of `str`])
     backward : `None` or `dict` of `dict` of ([`int`, `str`] or [`list` of `int`, `list` of `str`])
+    container : `bool`
+        If `True`, save to container file.
+    file : `file` or `None`
+        Container file used for loading datasets.
     """
-    def __init__(self, nodes=None, backward=None, settings=None):
+    SETTINGS_CHUNK_SIZE = 65536
+    CONTAINER_MAGIC = b'markovchain-json-container 1\n'
+    RE_SETTINGS = re.compile(r'\s*\{\s*"settings"\s*:\s*')
+    RE_FIRST_KEY = re.compile(r'\s*\{\s*"(?:[^"\\]|\\.)*"\s*:')
+
+    def __init__(self, nodes=None, backward=None, settings=None,
+                 container=False):
         """JSON storage constructor.
 
         Parameters
         ----------
             nodes : `dict` of `dict` of ([`int`, `str`] or [`list` of `int`, `list` of `str`]), optional
             backward : `bool` or `dict` of `dict` of ([`int`, `str`] or [`list` of `int`, `list` of `str`]), optional
+            container : `bool`, optional
+                Save to container file (default: `False`).
         """
         if nodes is None:
             nodes = {}
@@ -40,6 +155,8 @@ class JsonStorage(Storage):
         super().__init__(settings)
         self.nodes = nodes
         self.backward = backward
+        self.container = container
+        self.file = None
 
     def __eq__(self, storage):
         return (self.nodes == storage.nodes
@@ -157,9 +274,20 @@ class JsonStorage(Storage):
             src = self.join_state(src)
             self.add_link(forward, src, dst)
 
+    def add_link_counts(self, links, dataset_prefix=''):
+        for dataset, src, dst, count in links:
+            forward, backward = self.get_dataset(dataset_prefix + dataset, True)
+            if backward is not None and dst is not None:
+                src2 = self.join_state(chain(islice(src, 1, None), (dst,)))
+                self.add_link(backward, src2, src[0], count)
+            self.add_link(forward, self.join_state(src), dst, count)
+
     def get_state(self, state, size):
         return deque(chain(repeat('', size), state), maxlen=size)
 
+    def copy_state(self, state):
+        return state.copy()
+
     def get_states(self, dataset, string):
         dataset = self.get_dataset(dataset)[0]
         string = string.lower()
@@ -190,14 +318,99 @@ class JsonStorage(Storage):
             state.append(value)
         return state
 
+    def do_generate(self, dataset, state, backward=False, sampling=None):
+        """Generate a sequence.
+
+        Looks up nodes and selects links directly without
+        `get_links` and `follow_link` calls. Random numbers
+        are consumed in the same way as in
+        `markovchain.storage.Storage.do_generate`.
+        Generation with a sampling policy uses
+        `markovchain.storage.Storage.do_generate`.
+
+        Raises
+        ------
+        ValueError
+            If backward == `True` and self.backward is `None`.
+        """
+        if sampling is not None:
+            yield from super().do_generate(dataset, state, backward, sampling)
+            return
+        if backward and self.backward is None:
+            raise ValueError('no backward nodes')
+        get_node = dataset[int(backward)].get
+        join = self.state_separator.join
+        if backward:
+            append = state.appendleft
+        else:
+            append = state.append
+        while True:
+            node = get_node(join(state))
+            if node is None:
+                return
+            counts, link = node
+            if isinstance(counts, list):
+                x = randint(0, sum(counts) - 1)
+                for i, count in enumerate(counts):
+                    if x < count:
+                        break
+                    x -= count
+                else:
+                    raise RuntimeError('invalid link sum')
+                link = link[i]
+            else:
+                randint(0, counts - 1)
+            if link is None or backward and link == '':
+                return
+            append(link)
+            yield link
+
+    def do_prune(self, prune_state):
+        for backward, data in enumerate((self.nodes, self.backward)):
+            if data is None:
+                continue
+            for dataset in data.values():
+                for key, node in list(dataset.items()):
+                    values, links = node
+                    if not isinstance(links, list):
+                        values = [values]
+                        links = [links]
+                    counts = prune_state(values, bool(backward))
+                    node = [
+                        (count, link)
+                        for count, link in zip(counts, links)
+                        if count
+                    ]
+                    if not node:
+                        del dataset[key]
+                    elif len(node) == 1:
+                        dataset[key] = list(node[0])
+                    else:
+                        dataset[key] = [list(x) for x in zip(*node)]
+
     def do_save(self, fp=None):
         """Save to file.
 
+        Backward nodes flag is added to storage settings.
+
         Parameters
         ----------
         fp : `file` or `str`, optional
             Output file (default: stdout).
         """
+        self.load_datasets()
+        self.settings.setdefault('storage', {})['backward'] = \
+            self.backward is not None
+
+        if self.container:
+            if fp is None:
+                self.save_container(sys.stdout.buffer)
+            elif isinstance(fp, str):
+                with open(fp, 'wb') as fp2:
+                    self.save_container(fp2)
+            else:
+                self.save_container(fp)
+            return
 
         data = {
             'settings': self.settings,
@@ -213,14 +426,246 @@ class JsonStorage(Storage):
         else:
             json.dump(data, fp, ensure_ascii=False)
 
+    @staticmethod
+    def iter_links(data):
+        """Iterate over links.
+
+        Parameters
+        ----------
+        data : `dict` of `dict` of ([`int`, `str`] or [`list` of `int`, `list` of `str`])
+            Data.
+
+        Returns
+        -------
+        `generator` of (`str`, `str`, `str` or `None`, `int`)
+            Links (dataset, source, target, count).
+        """
+        for key, dataset in data.items():
+            for source, (counts, targets) in dataset.items():
+                if isinstance(targets, list):
+                    for count, target in zip(counts, targets):
+                        yield key, source, target, count
+                else:
+                    yield key, source, targets, counts
+
+    def save_log(self, fp):
+        """Append links to an update log.
+
+        Each line of the log is a JSON array
+        [direction, dataset, source, target, count],
+        direction is 0 for forward links and 1 for backward links.
+
+        Parameters
+        ----------
+        fp : `file` or `str`
+            Log file or path.
+        """
+        if isinstance(fp, str):
+            with open(fp, 'at') as fp2:
+                self.save_log(fp2)
+            return
+        for direction, data in enumerate((self.nodes, self.backward)):
+            if data is None:
+                continue
+            for link in self.iter_links(data):
+                fp.write(json.dumps((direction,) + link, ensure_ascii=False))
+                fp.write('\n')
+
+    def load_log(self, fp):
+        """Replay an update log.
+
+        Backward links are skipped if backward nodes are disabled.
+
+        Parameters
+        ----------
+        fp : `file` or `str`
+            Log file or path.
+
+        Raises
+        ------
+        ValueError
+            If the log is invalid.
+        """
+        if isinstance(fp, str):
+            with open(fp, 'rt') as fp2:
+                self.load_log(fp2)
+            return
+        for lineno, line in enumerate(fp, 1):
+            if not line.strip():
+                continue
+            try:
+                direction, key, source, target, count = json.loads(line)
+            except ValueError as err:
+                raise ValueError('invalid update log line %d: %s'
+                                 % (lineno, err))
+            data = self.backward if direction else self.nodes
+            if data is not None:
+                self.add_link(self.do_get_dataset(data, key, True),
+                              source, target, count)
+
+    def save_container(self, fp):
+        """Save to container file.
+
+        Container file consists of `CONTAINER_MAGIC`, JSON datasets,
+        a header line with settings and dataset offsets
+        and a 20-digit header offset line.
+
+        Parameters
+        ----------
+        fp : `file`
+            Binary output file.
+        """
+        fp.write(self.CONTAINER_MAGIC)
+        offset = len(self.CONTAINER_MAGIC)
+        tables = []
+        for data in (self.nodes, self.backward):
+            if data is None:
+                tables.append(None)
+                continue
+            table = {}
+            for key, dataset in data.items():
+                dataset = json.dumps(dataset, ensure_ascii=False)
+                dataset = dataset.encode('utf-8')
+                table[key] = (offset, len(dataset))
+                fp.write(dataset)
+                offset += len(dataset)
+            tables.append(table)
+        header = {
+            'settings': self.settings,
+            'nodes': tables[0],
+            'backward': tables[1]
+        }
+        fp.write(json.dumps(header, ensure_ascii=False).encode('utf-8'))
+        fp.write(b'\n%020d\n' % offset)
+
+    def load_datasets(self):
+        """Load all datasets from container file.
+        """
+        for data in (self.nodes, self.backward):
+            if isinstance(data, LazyDatasets):
+                data.load_all()
+
+    @classmethod
+    def load_container_header(cls, fp):
+        """Load container file header.
+
+        Parameters
+        ----------
+        fp : `file`
+            Binary seekable input file.
+
+        Returns
+        -------
+        `dict`
+            Header.
+        """
+        fp.seek(-21, SEEK_END)
+        offset = int(fp.read(20))
+        fp.seek(offset)
+        return json.loads(fp.readline().decode('utf-8'))
+
+    @classmethod
+    def load_container(cls, fp):
+        """Load from container file.
+
+        Datasets are loaded on first access.
+        The file is closed by `close`.
+
+        Parameters
+        ----------
+        fp : `file`
+            Binary seekable input file.
+
+        Returns
+        -------
+        `markovchain.storage.JsonStorage`
+        """
+        header = cls.load_container_header(fp)
+        backward = header['backward']
+        if backward is not None:
+            backward = LazyDatasets(fp, backward)
+        ret = cls(
+            nodes=LazyDatasets(fp, header['nodes']),
+            backward=backward,
+            settings=header['settings'],
+            container=True
+        )
+        ret.file = fp
+        return ret
+
+    @classmethod
+    def is_container(cls, fp):
+        """Check if a file is a container file.
+
+        Parameters
+        ----------
+        fp : `file`
+            Binary input file.
+
+        Returns
+        -------
+        `bool`
+        """
+        magic = fp.read(len(cls.CONTAINER_MAGIC))
+        fp.seek(0)
+        return magic == cls.CONTAINER_MAGIC
+
     def close(self):
-        pass
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    @classmethod
+    def load_settings(cls, fp):
+        """Load settings without loading nodes.
+
+        Only the beginning of the file is read if
+        settings are stored before nodes. Only the header
+        is read from container files.
+
+        Parameters
+        ----------
+        fp : `file` or `str`
+            Input file or path.
+
+        Returns
+        -------
+        `dict` or `None`
+            Settings.
+        """
+        if isinstance(fp, str):
+            with open(fp, 'rb') as fp2:
+                if cls.is_container(fp2):
+                    return cls.load_container_header(fp2)['settings']
+                return cls.load_settings(io.TextIOWrapper(fp2))
+        decoder = json.JSONDecoder()
+        size = cls.SETTINGS_CHUNK_SIZE
+        data = ''
+        while True:
+            chunk = fp.read(size)
+            data += chunk
+            size *= 2
+            match = cls.RE_SETTINGS.match(data)
+            if match is not None:
+                try:
+                    return decoder.raw_decode(data, match.end())[0]
+                except ValueError:
+                    if not chunk:
+                        raise
+            elif cls.RE_FIRST_KEY.match(data) is not None or not chunk:
+                data += fp.read()
+                return json.loads(data).get('settings')
 
     @classmethod
     def load(cls, fp):
         if isinstance(fp, str):
-            with open(fp, 'rt') as fp2:
+            fp2 = open(fp, 'rb')
+            if cls.is_container(fp2):
+                return cls.load_container(fp2)
+            with io.TextIOWrapper(fp2) as fp2:
                 data = json.load(fp2)
+        elif isinstance(fp, io.BufferedIOBase) and cls.is_container(fp):
+            return cls.load_container(fp)
         else:
             data = json.load(fp)
         return cls(**data)
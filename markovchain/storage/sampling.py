@@ -0,0 +1,215 @@
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import accumulate
+from random import random
+
+
+class Sampling:
+    """Link sampling policy.
+
+    Links of a state are sorted by count in descending order.
+    Link weights are counts scaled by `temperature`
+    (count ** (1 / temperature)). Top-k sampling keeps `top_k`
+    most frequent links, top-p (nucleus) sampling keeps
+    most frequent links with total weight of at least
+    `top_p` of the weight of the remaining links.
+
+    Sorted links and cumulative weights are cached by state,
+    so that a link is selected in logarithmic time.
+    The cache is not updated when storage changes.
+
+    Attributes
+    ----------
+    CACHE_SIZE : `int`
+        Maximum number of cached states.
+    temperature : `float`
+        Sampling temperature.
+    top_k : `int` or `None`
+        Maximum number of links.
+    top_p : `float` or `None`
+        Minimum link weight fraction.
+    cache : `dict` of (`tuple`, (`object`, `list` of `float`, `list` of `tuple`))
+        Datasets, cumulative link weights and links
+        by dataset, link direction and state.
+
+    Examples
+    --------
+    >>> sampling = Sampling(top_k=2)
+    >>> sampling.links([(1, 'x'), (3, 'y'), (2, 'z')])
+    ([3, 5], [(3, 'y'), (2, 'z')])
+    >>> sampling = Sampling(top_p=0.5)
+    >>> sampling.links([(1, 'x'), (3, 'y'), (2, 'z')])
+    ([3], [(3, 'y')])
+    """
+
+    CACHE_SIZE = 65536
+
+    def __init__(self, temperature=1.0, top_k=None, top_p=None):
+        """Sampling policy constructor.
+
+        Parameters
+        ----------
+        temperature : `float`, optional
+            Sampling temperature (default: 1.0). Temperatures
+            less than 1 favor frequent links.
+        top_k : `int` or `None`, optional
+            Maximum number of links (default: `None`, no limit).
+        top_p : `float` or `None`, optional
+            Minimum link weight fraction (default: `None`, no limit).
+
+        Raises
+        ------
+        ValueError
+            If temperature <= 0, top_k < 1 or top_p is not in (0, 1].
+        """
+        if temperature <= 0:
+            raise ValueError('temperature <= 0')
+        if top_k is not None and top_k < 1:
+            raise ValueError('top_k < 1')
+        if top_p is not None and not 0 < top_p <= 1:
+            raise ValueError('top_p not in (0, 1]')
+        self.temperature = temperature
+        self.top_k = top_k
+        self.top_p = top_p
+        self.cache = {}
+
+    def clear(self):
+        """Clear cached links.
+        """
+        self.cache.clear()
+
+    def links(self, links):
+        """Sort, filter and weight links.
+
+        Parameters
+        ----------
+        links : `list` of (`int`, `str`, ...)
+            Links from `markovchain.storage.Storage.get_links`.
+
+        Returns
+        -------
+        (`list` of `float`, `list` of (`int`, `str`, ...))
+            Cumulative link weights and links.
+        """
+        links = sorted(links, key=lambda link: link[0], reverse=True)
+        if self.top_k is not None:
+            del links[self.top_k:]
+        if not links:
+            return [], []
+        if self.temperature == 1:
+            weights = [link[0] for link in links]
+        else:
+            exp = 1 / self.temperature
+            max_count = links[0][0] or 1
+            weights = [(link[0] / max_count) ** exp for link in links]
+        cumulative = list(accumulate(weights))
+        if self.top_p is not None:
+            size = bisect_left(cumulative, self.top_p * cumulative[-1]) + 1
+            del cumulative[size:]
+            del links[size:]
+        return cumulative, links
+
+    @staticmethod
+    def key(dataset, state, backward=False):
+        """Get a cache key.
+
+        Parameters
+        ----------
+        dataset : `object`
+            Dataset from `storage.get_dataset()`.
+        state : `object`
+            State from `storage.get_state()`.
+        backward : `bool`, optional
+            Link direction.
+
+        Returns
+        -------
+        `tuple`
+            Cache key.
+        """
+        if isinstance(state, (deque, list)):
+            return (id(dataset), backward, tuple(state))
+        return (id(dataset), backward, state)
+
+    def get_links(self, storage, dataset, state, backward=False):
+        """Get cached links.
+
+        Parameters
+        ----------
+        storage : `markovchain.storage.Storage`
+            Storage.
+        dataset : `object`
+            Dataset from `storage.get_dataset()`.
+        state : `object`
+            Link source.
+        backward : `bool`, optional
+            Link direction.
+
+        Returns
+        -------
+        (`list` of `float`, `list` of (`int`, `str`, ...))
+            Cumulative link weights and links.
+        """
+        key = self.key(dataset, state, backward)
+        try:
+            return self.cache[key][1:]
+        except KeyError:
+            cumulative, links = self.links(
+                storage.get_links(dataset, state, backward)
+            )
+            if len(self.cache) >= self.CACHE_SIZE:
+                self.cache.clear()
+            self.cache[key] = (dataset, cumulative, links)
+            return cumulative, links
+
+    def random_link(self, storage, dataset, state, backward=False):
+        """Get a random link.
+
+        Parameters
+        ----------
+        storage : `markovchain.storage.Storage`
+            Storage.
+        dataset : `object`
+            Dataset from `storage.get_dataset()`.
+        state : `object`
+            Link source.
+        backward : `bool`, optional
+            Link direction.
+
+        Returns
+        -------
+        (`str` or `None`, `object` or `None`)
+            Link value and next state.
+        """
+        cumulative, links = self.get_links(storage, dataset, state, backward)
+        if not links:
+            return None, None
+        idx = bisect_right(cumulative, random() * cumulative[-1])
+        link = links[min(idx, len(links) - 1)]
+        return link[1], storage.follow_link(link, state, backward)
+
+    def generate(self, storage, dataset, state, backward=False):
+        """Generate a sequence.
+
+        Parameters
+        ----------
+        storage : `markovchain.storage.Storage`
+            Storage.
+        dataset : `object`
+            Dataset from `storage.get_dataset()`.
+        state : `object`
+            State from `storage.get_state()`.
+        backward : `bool`, optional
+            Link direction.
+
+        Returns
+        -------
+        `generator` of `str`
+            Node value generator.
+        """
+        random_link = self.random_link
+        while True:
+            link, state = random_link(storage, dataset, state, backward)
+            if link is None or backward and link == '':
+                return
+            yield link
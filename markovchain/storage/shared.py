@@ -0,0 +1,534 @@
+import sys
+import json
+import mmap
+from array import array
+from bisect import bisect_right
+from collections import deque
+from copy import deepcopy
+from itertools import accumulate, chain, repeat
+from random import randint
+from struct import pack, unpack_from
+from zlib import crc32
+
+from .base import Storage
+
+
+class SharedStorage(Storage):
+    """Read-only storage backed by a shared memory segment or a file.
+
+    Link tables of a `markovchain.storage.JsonStorage` are compacted
+    into a single buffer that processes attach to by name
+    and read without copying. Buffer consists of `MAGIC`,
+    header size, JSON header with settings, tokens and dataset tables,
+    and arrays in native byte order:
+
+    * slots - state hash table (node index or -1);
+    * key_offsets - node offsets in keys (node count + 1);
+    * link_offsets - node offsets in counts and targets (node count + 1);
+    * counts - link counts;
+    * targets - link target token indices (-1 for `None`);
+    * keys - UTF-8 encoded states.
+
+    Attributes
+    ----------
+    MAGIC : `bytes`
+        Buffer header.
+    SECTIONS : `list` of (`str`, `str`)
+        Array names and type codes.
+    buf : `memoryview`
+        Buffer.
+    handle : `multiprocessing.shared_memory.SharedMemory` or `mmap.mmap` or `None`
+        Buffer owner.
+    owner : `bool`
+        If `True`, unlink shared memory segment on `close`.
+    tokens : `list` of `str`
+        Link target tokens.
+    datasets : (`dict`, `dict` or `None`)
+        Forward and backward tables (node start, node end,
+        slot start, slot mask) by dataset key.
+    sections : `dict` of (`str`, (`int`, `int`))
+        Array offsets and sizes.
+    """
+    MAGIC = b'markovchain-shared 1\n'
+    SECTIONS = [
+        ('slots', 'q'),
+        ('key_offsets', 'Q'),
+        ('link_offsets', 'Q'),
+        ('counts', 'Q'),
+        ('targets', 'q'),
+        ('keys', 'B')
+    ]
+    _created = set()
+
+    def __init__(self, buf, handle=None, owner=False):
+        """Shared storage constructor.
+
+        Parameters
+        ----------
+        buf : `bytes` or `memoryview`
+            Buffer created by `dump`.
+        handle : `multiprocessing.shared_memory.SharedMemory` or `mmap.mmap`, optional
+            Buffer owner closed by `close`.
+        owner : `bool`, optional
+            Unlink shared memory segment on `close` (default: `False`).
+
+        Raises
+        ------
+        ValueError
+            If buffer is invalid.
+        """
+        buf = memoryview(buf)
+        if buf[:len(self.MAGIC)] != self.MAGIC:
+            buf.release()
+            raise ValueError('invalid shared storage header')
+        offset = len(self.MAGIC)
+        size, = unpack_from('=Q', buf, offset)
+        offset += 8
+        header = json.loads(bytes(buf[offset:offset + size]).decode('utf-8'))
+        offset = self._align(offset + size)
+
+        super().__init__(header['settings'])
+        self.buf = buf
+        self.handle = handle
+        self.owner = owner
+        self.tokens = header['tokens']
+        self.datasets = tuple(header['datasets'])
+        self.sections = header['sections']
+        self._views = []
+        size = max(self._align(start + length)
+                   for start, length in self.sections.values())
+        self._data = buf[offset:offset + size]
+        for name, typecode in self.SECTIONS:
+            start, length = self.sections[name]
+            view = self._data[start:start + length].cast(typecode)
+            self._views.append(view)
+            setattr(self, '_' + name, view)
+
+    def __eq__(self, storage):
+        return (isinstance(storage, SharedStorage)
+                and self.tokens == storage.tokens
+                and self.datasets == storage.datasets
+                and self._data == storage._data
+                and super().__eq__(storage))
+
+    @staticmethod
+    def _align(offset):
+        return (offset + 7) & ~7
+
+    @property
+    def name(self):
+        """`str` or `None` : Shared memory segment name.
+        """
+        return getattr(self.handle, 'name', None)
+
+    @classmethod
+    def dump(cls, storage):
+        """Compact JSON storage.
+
+        Parameters
+        ----------
+        storage : `markovchain.storage.JsonStorage`
+            Storage.
+
+        Returns
+        -------
+        `bytes`
+            Buffer.
+        """
+        storage.load_datasets()
+        settings = deepcopy(storage.settings)
+        settings['storage'] = dict(settings.get('storage', {}),
+                                   state_separator=storage.state_separator)
+
+        tokens = {}
+        arrays = dict(
+            (name, array(typecode))
+            for name, typecode in cls.SECTIONS
+        )
+        arrays['key_offsets'].append(0)
+        arrays['link_offsets'].append(0)
+        node = 0
+        datasets = []
+
+        for data in (storage.nodes, storage.backward):
+            if data is None:
+                datasets.append(None)
+                continue
+            tables = {}
+            for key, dataset in data.items():
+                slot_count = 2
+                while slot_count < 2 * len(dataset):
+                    slot_count *= 2
+                mask = slot_count - 1
+                slot_start = len(arrays['slots'])
+                slots = [-1] * slot_count
+                tables[key] = (node, node + len(dataset), slot_start, mask)
+
+                for state, (counts, targets) in dataset.items():
+                    if not isinstance(targets, list):
+                        counts = [counts]
+                        targets = [targets]
+                    state = state.encode('utf-8')
+                    idx = crc32(state) & mask
+                    while slots[idx] >= 0:
+                        idx = (idx + 1) & mask
+                    slots[idx] = node
+                    node += 1
+                    arrays['keys'].frombytes(state)
+                    arrays['key_offsets'].append(len(arrays['keys']))
+                    arrays['counts'].extend(counts)
+                    arrays['targets'].extend(
+                        -1 if target is None
+                        else tokens.setdefault(target, len(tokens))
+                        for target in targets
+                    )
+                    arrays['link_offsets'].append(len(arrays['counts']))
+
+                arrays['slots'].extend(slots)
+            datasets.append(tables)
+
+        sections = {}
+        data = []
+        offset = 0
+        for name, _ in cls.SECTIONS:
+            section = arrays[name].tobytes()
+            sections[name] = (offset, len(section))
+            padding = cls._align(len(section)) - len(section)
+            data.append(section)
+            data.append(bytes(padding))
+            offset += len(section) + padding
+
+        header = {
+            'settings': settings,
+            'tokens': list(tokens),
+            'datasets': datasets,
+            'sections': sections
+        }
+        return cls._pack(header, data)
+
+    @classmethod
+    def _pack(cls, header, data):
+        """Pack buffer.
+
+        Parameters
+        ----------
+        header : `dict`
+            Header.
+        data : `list` of `bytes`
+            Arrays.
+
+        Returns
+        -------
+        `bytes`
+        """
+        header = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        offset = len(cls.MAGIC) + 8 + len(header)
+        padding = bytes(cls._align(offset) - offset)
+        return b''.join(chain(
+            (cls.MAGIC, pack('=Q', len(header)), header, padding),
+            data
+        ))
+
+    @classmethod
+    def create(cls, storage, name=None):
+        """Create a shared memory segment.
+
+        The segment is unlinked when the returned storage is closed.
+
+        Parameters
+        ----------
+        storage : `markovchain.storage.JsonStorage`
+            Storage.
+        name : `str`, optional
+            Segment name (default: random name).
+
+        Returns
+        -------
+        `markovchain.storage.SharedStorage`
+        """
+        from multiprocessing.shared_memory import SharedMemory
+        data = cls.dump(storage)
+        shm = SharedMemory(name, create=True, size=len(data))
+        try:
+            shm.buf[:len(data)] = data
+            ret = cls(shm.buf, shm, True)
+            cls._created.add(shm.name)
+            return ret
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to a shared memory segment.
+
+        Parameters
+        ----------
+        name : `str`
+            Segment name.
+
+        Raises
+        ------
+        FileNotFoundError
+            If segment does not exist.
+
+        Returns
+        -------
+        `markovchain.storage.SharedStorage`
+        """
+        from multiprocessing import parent_process
+        from multiprocessing.shared_memory import SharedMemory
+        if sys.version_info >= (3, 13):
+            shm = SharedMemory(name, track=False)
+        else:
+            shm = SharedMemory(name)
+            if parent_process() is None and name not in cls._created:
+                # Resource tracker of an unrelated process
+                # would unlink the segment on exit.
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(
+                    shm._name, # pylint:disable=protected-access
+                    'shared_memory'
+                )
+        try:
+            return cls(shm.buf, shm)
+        except BaseException:
+            shm.close()
+            raise
+
+    def close(self):
+        if self.buf is None:
+            return
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._data.release()
+        self.buf.release()
+        self.buf = None
+        if self.handle is not None:
+            self.handle.close()
+            if self.owner:
+                self._created.discard(self.handle.name)
+                self.handle.unlink()
+            self.handle = None
+
+    def replace_state_separator(self, old_separator, new_separator):
+        """
+        Raises
+        ------
+        ValueError
+            Storage is read-only.
+        """
+        raise ValueError('read-only storage')
+
+    def get_dataset(self, key, create=False):
+        """
+        Raises
+        ------
+        ValueError
+            If dataset does not exist and `create` == `True`.
+        """
+        forward, backward = self.datasets
+        try:
+            table = tuple(forward[key])
+        except KeyError:
+            if create:
+                raise ValueError('read-only storage')
+            raise
+        if backward is not None:
+            try:
+                return table, tuple(backward[key])
+            except KeyError:
+                pass
+        return table, None
+
+    def add_links(self, links, dataset_prefix=''):
+        """
+        Raises
+        ------
+        ValueError
+            Storage is read-only.
+        """
+        raise ValueError('read-only storage')
+
+    def add_link_counts(self, links, dataset_prefix=''):
+        """
+        Raises
+        ------
+        ValueError
+            Storage is read-only.
+        """
+        raise ValueError('read-only storage')
+
+    def get_state(self, state, size):
+        return deque(chain(repeat('', size), state), maxlen=size)
+
+    def copy_state(self, state):
+        return state.copy()
+
+    def get_states(self, dataset, string):
+        start, end, _, _ = self.get_dataset(dataset)[0]
+        offsets = self._key_offsets
+        keys = self._keys
+        string = string.lower()
+        ret = []
+        for node in range(start, end):
+            key = str(keys[offsets[node]:offsets[node + 1]], 'utf-8')
+            if string in key.lower():
+                ret.append(key)
+        return ret
+
+    def find_node(self, table, state):
+        """Find a state.
+
+        Parameters
+        ----------
+        table : (`int`, `int`, `int`, `int`)
+            Dataset table.
+        state : `str`
+            Joined state.
+
+        Returns
+        -------
+        `int`
+            Node index or -1 if state does not exist.
+        """
+        _, _, start, mask = table
+        slots = self._slots
+        offsets = self._key_offsets
+        keys = self._keys
+        state = state.encode('utf-8')
+        idx = crc32(state) & mask
+        while True:
+            node = slots[start + idx]
+            if node < 0 or keys[offsets[node]:offsets[node + 1]] == state:
+                return node
+            idx = (idx + 1) & mask
+
+    def find_links(self, dataset, state, backward=False):
+        """Find links of a state.
+
+        Parameters
+        ----------
+        dataset : `object`
+            Dataset from `self.get_dataset()`.
+        state : `object`
+            State from `self.get_state()`.
+        backward : `bool`, optional
+            Link direction.
+
+        Raises
+        ------
+        ValueError
+            If backward == `True` and backward nodes are disabled.
+
+        Returns
+        -------
+        (`int`, `int`)
+            Link offsets in `counts` and `targets`.
+        """
+        if backward and self.datasets[1] is None:
+            raise ValueError('no backward nodes')
+        table = dataset[int(backward)]
+        if table is None:
+            return 0, 0
+        node = self.find_node(table, self.join_state(state))
+        if node < 0:
+            return 0, 0
+        return self._link_offsets[node], self._link_offsets[node + 1]
+
+    def get_links(self, dataset, state, backward=False):
+        """
+        Raises
+        ------
+        ValueError
+            If backward == `True` and backward nodes are disabled.
+        """
+        start, end = self.find_links(dataset, state, backward)
+        tokens = self.tokens
+        return [
+            (count, tokens[target] if target >= 0 else None)
+            for count, target in zip(self._counts[start:end],
+                                     self._targets[start:end])
+        ]
+
+    def random_link(self, dataset, state, backward=False, sampling=None):
+        if sampling is not None:
+            return sampling.random_link(self, dataset, state, backward)
+        start, end = self.find_links(dataset, state, backward)
+        if start == end:
+            return None, None
+        counts = self._counts[start:end]
+        x = randint(0, sum(counts) - 1)
+        idx = bisect_right(list(accumulate(counts)), x)
+        target = self._targets[start + idx]
+        value = self.tokens[target] if target >= 0 else None
+        return value, self.follow_link((None, value), state, backward)
+
+    def follow_link(self, link, state, backward=False):
+        value = link[1]
+        if backward:
+            state.appendleft(value)
+        else:
+            state.append(value)
+        return state
+
+    def do_prune(self, prune_state):
+        """
+        Raises
+        ------
+        ValueError
+            Storage is read-only.
+        """
+        raise ValueError('read-only storage')
+
+    def do_save(self, fp=None):
+        """Save to file.
+
+        Parameters
+        ----------
+        fp : `file` or `str`, optional
+            Binary output file (default: stdout).
+        """
+        if fp is None:
+            self.do_save(sys.stdout.buffer)
+            return
+        if isinstance(fp, str):
+            with open(fp, 'wb') as fp2:
+                self.do_save(fp2)
+            return
+        header = {
+            'settings': self.settings,
+            'tokens': self.tokens,
+            'datasets': self.datasets,
+            'sections': self.sections
+        }
+        fp.write(self._pack(header, (self._data,)))
+
+    @classmethod
+    def load(cls, fp):
+        """Load from file.
+
+        File is mapped into memory and shared
+        between processes by the operating system.
+
+        Parameters
+        ----------
+        fp : `file` or `str`
+            Binary input file or path.
+
+        Returns
+        -------
+        `markovchain.storage.SharedStorage`
+            Loaded storage.
+        """
+        if isinstance(fp, str):
+            with open(fp, 'rb') as fp2:
+                return cls.load(fp2)
+        handle = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(handle, handle)
+        except BaseException:
+            handle.close()
+            raise
@@ -1,7 +1,8 @@
 import json
 import sqlite3
 from collections import deque
-from itertools import chain, repeat, islice
+from itertools import chain, repeat, islice, groupby
+from operator import itemgetter
 
 from .base import Storage
 
@@ -11,12 +12,45 @@ class SqliteStorage(Storage):
 
     Attributes
     ----------
+    VERSION : `int`
+        Database schema version.
+    BULK_PRAGMAS : `list` of (`str`, `object`)
+        Pragmas set in bulk load mode.
+    DEFAULT_PRAGMAS : `list` of (`str`, `object`)
+        Pragmas restored after bulk load.
+    JOURNAL_PRAGMAS : `tuple` of `str`
+        Pragmas that can not be changed in a transaction.
     db : `sqlite3.Connection`
         Database connection.
     cursor
         Database cursor.
+    bulk : `bool`
+        `True` if bulk load mode is enabled.
+    bulk_size : `int`
+        Number of distinct links buffered in bulk load mode.
+    bulk_journal : `bool`
+        `True` if journaling and synchronous writes are not disabled
+        in bulk load mode.
+        Staged links are committed only by `commit_bulk`
+        and `end_bulk`, and are kept by `begin_bulk`.
     """
-    def __init__(self, db=':memory:', settings=None):
+    VERSION = 2
+    BULK_PRAGMAS = [
+        ('journal_mode', 'OFF'),
+        ('synchronous', 'OFF'),
+        ('cache_size', -262144),
+        ('temp_store', 'MEMORY')
+    ]
+    DEFAULT_PRAGMAS = [
+        ('journal_mode', 'DELETE'),
+        ('synchronous', 'FULL'),
+        ('cache_size', -2000),
+        ('temp_store', 'DEFAULT')
+    ]
+    JOURNAL_PRAGMAS = ('journal_mode', 'synchronous')
+
+    def __init__(self, db=':memory:', settings=None,
+                 bulk=False, bulk_size=100000, bulk_journal=False):
         """SQLite storage constructor.
 
         Parameters
@@ -24,15 +58,31 @@ class SqliteStorage(Storage):
         db : `str` or `sqlite3.Connection`, optional
             Database path or connection (default: ':memory:').
         settings: `dict`, optional
+        bulk : `bool`, optional
+            Enable bulk load mode (default: `False`).
+        bulk_size : `int`, optional
+            Number of distinct links buffered in bulk load mode
+            (default: 100000).
+        bulk_journal : `bool`, optional
+            Do not disable journaling and synchronous writes
+            in bulk load mode (default: `False`).
         """
         super().__init__(settings)
         if isinstance(db, str):
             db = sqlite3.connect(db, isolation_level='IMMEDIATE')
         self.db = db
         self.cursor = db.cursor()
+        self.bulk = False
+        self.bulk_size = bulk_size
+        self.bulk_journal = bulk_journal
+        self._bulk_nodes = None
+        self._bulk_tokens = None
+        self._bulk_links = None
         self.create_tables()
         self.cursor.execute('SELECT key, id FROM datasets')
         self.datasets = dict(self.cursor.fetchall())
+        if bulk:
+            self.begin_bulk()
 
     def __eq__(self, markov):
         raise NotImplementedError()
@@ -59,28 +109,214 @@ class SqliteStorage(Storage):
             return ret
 
     def add_links(self, links, dataset_prefix=''):
-        for dataset, src, dst in links:
+        self.add_link_counts(
+            ((dataset, src, dst, 1) for dataset, src, dst in links),
+            dataset_prefix
+        )
+
+    def add_link_counts(self, links, dataset_prefix=''):
+        if self.bulk:
+            self.add_link_counts_bulk(links, dataset_prefix)
+            return
+        for dataset, src, dst, count in links:
             src = list(src)
             source = self.get_node(self.join_state(src))
             if dst is None:
-                target = None
+                target = 0
+                token = 0
             else:
                 target = self.get_node(self.join_state(
                     chain(islice(src, 1, None), (dst,))
                 ))
+                token = self.get_token(dst)
+            btoken = self.get_token(src[0])
             dataset = self.get_dataset(dataset_prefix + dataset, True)
             self.cursor.execute(
                 '''UPDATE links
-                   SET count = count + 1
-                   WHERE source=? AND target=? AND dataset=?''',
-                (source, target, dataset)
+                   SET count = count + ?
+                   WHERE dataset=? AND source=? AND target=?''',
+                (count, dataset, source, target)
             )
             self.cursor.execute(
-                '''INSERT INTO links (dataset, source, target, value, bvalue)
-                   SELECT ?, ?, ?, ?, ?
+                '''INSERT INTO links
+                   (dataset, source, target, token, btoken, count)
+                   SELECT ?, ?, ?, ?, ?, ?
                    WHERE (SELECT Changes() = 0)''',
-                (dataset, source, target, dst, src[0])
+                (dataset, source, target, token, btoken, count)
+            )
+
+    def add_link_counts_bulk(self, links, dataset_prefix=''):
+        """Add links with counts in bulk load mode.
+
+        Link counts are accumulated in memory and written
+        to the staging table every `bulk_size` distinct links.
+
+        Parameters
+        ----------
+        links : `iterable` of (`str`, `iterable` of `str`, `str`, `int`)
+            Links to add (dataset, source, target, count).
+        dataset_prefix : `str`, optional
+            Dataset key prefix.
+        """
+        buf = self._bulk_links
+        for dataset, src, dst, count in links:
+            src = list(src)
+            source = self.get_node(self.join_state(src))
+            if dst is None:
+                target = 0
+                token = 0
+            else:
+                target = self.get_node(self.join_state(
+                    chain(islice(src, 1, None), (dst,))
+                ))
+                token = self.get_token(dst)
+            dataset = self.get_dataset(dataset_prefix + dataset, True)
+            key = (dataset, source, target)
+            try:
+                buf[key][0] += count
+            except KeyError:
+                buf[key] = [count, token, self.get_token(src[0])]
+                if len(buf) >= self.bulk_size:
+                    self.flush_bulk()
+
+    def flush_bulk(self):
+        """Write buffered links to the staging table.
+
+        Links are committed if `bulk_journal` is not set.
+        """
+        self.cursor.executemany(
+            'INSERT INTO links_bulk'
+            ' (dataset, source, target, token, btoken, count)'
+            ' VALUES (?, ?, ?, ?, ?, ?)',
+            (key + (token, btoken, count)
+             for key, (count, token, btoken) in self._bulk_links.items())
+        )
+        self._bulk_links.clear()
+        if not self.bulk_journal:
+            self.db.commit()
+
+    def commit_bulk(self):
+        """Write buffered links to the staging table
+        and generator settings to database in one transaction.
+
+        Staged links are not merged and indexes are not rebuilt.
+        """
+        self.flush_bulk()
+        self.update_main_table()
+        self.db.commit()
+
+    def begin_bulk(self):
+        """Enable bulk load mode.
+
+        Drop indexes, disable journaling and synchronous writes
+        (unless `bulk_journal` is set) and buffer added links.
+        Links added in bulk load mode are not visible to queries
+        until `end_bulk` is called. Links left in the staging table
+        by an interrupted bulk load are kept if `bulk_journal` is set
+        (they were committed with generator settings by `commit_bulk`)
+        and discarded otherwise.
+        """
+        if self.bulk:
+            return
+        self.db.commit()
+        self.set_pragmas(self.get_bulk_pragmas(self.BULK_PRAGMAS))
+        self.cursor.execute('DROP INDEX IF EXISTS node')
+        self.cursor.execute('DROP INDEX IF EXISTS token')
+        self.cursor.execute('DROP INDEX IF EXISTS link_target')
+        if not self.bulk_journal:
+            self.cursor.execute('DROP TABLE IF EXISTS links_bulk')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS links_bulk (
+                dataset INTEGER NOT NULL,
+                source INTEGER NOT NULL,
+                target INTEGER NOT NULL,
+                token INTEGER NOT NULL,
+                btoken INTEGER NOT NULL,
+                count INTEGER NOT NULL
             )
+        ''')
+        self.cursor.execute('SELECT value, id FROM nodes')
+        self._bulk_nodes = dict(self.cursor.fetchall())
+        self.cursor.execute('SELECT value, id FROM tokens')
+        self._bulk_tokens = dict(self.cursor.fetchall())
+        self._bulk_links = {}
+        self.bulk = True
+
+    def end_bulk(self, settings=False):
+        """Disable bulk load mode.
+
+        Enable journaling, merge staged links in one transaction,
+        rebuild indexes, run ``ANALYZE`` and restore default pragmas.
+
+        Parameters
+        ----------
+        settings : `bool`, optional
+            Write generator settings in the same transaction
+            as merged links (default: `False`).
+        """
+        if not self.bulk:
+            return
+        self.flush_bulk()
+        if not self.bulk_journal:
+            self.set_pragmas(pragma for pragma in self.DEFAULT_PRAGMAS
+                             if pragma[0] in self.JOURNAL_PRAGMAS)
+        self.cursor.execute('SELECT EXISTS (SELECT 1 FROM links)')
+        if self.cursor.fetchone()[0]:
+            self.cursor.execute(
+                'INSERT INTO links_bulk'
+                ' (dataset, source, target, token, btoken, count)'
+                ' SELECT dataset, source, target, token, btoken, count'
+                ' FROM links'
+            )
+            self.cursor.execute('DELETE FROM links')
+        self.cursor.execute(
+            'INSERT INTO links'
+            ' (dataset, source, target, token, btoken, count)'
+            ' SELECT dataset, source, target, token, btoken, SUM(count)'
+            ' FROM links_bulk'
+            ' GROUP BY dataset, source, target'
+        )
+        self.cursor.execute('DROP TABLE links_bulk')
+        self.create_indexes()
+        if settings:
+            self.update_main_table()
+        self.db.commit()
+        self.cursor.execute('ANALYZE')
+        self.set_pragmas(self.get_bulk_pragmas(self.DEFAULT_PRAGMAS))
+        self._bulk_nodes = None
+        self._bulk_tokens = None
+        self._bulk_links = None
+        self.bulk = False
+
+    def get_bulk_pragmas(self, pragmas):
+        """Get pragmas changed in bulk load mode.
+
+        Parameters
+        ----------
+        pragmas : `iterable` of (`str`, `object`)
+            Pragma names and values.
+
+        Returns
+        -------
+        `iterable` of (`str`, `object`)
+            Pragmas without `JOURNAL_PRAGMAS` if `bulk_journal` is set.
+        """
+        if not self.bulk_journal:
+            return pragmas
+        return (pragma for pragma in pragmas
+                if pragma[0] not in self.JOURNAL_PRAGMAS)
+
+    def set_pragmas(self, pragmas):
+        """Set database pragmas.
+
+        Parameters
+        ----------
+        pragmas : `iterable` of (`str`, `object`)
+            Pragma names and values.
+        """
+        for name, value in pragmas:
+            self.cursor.execute('PRAGMA %s=%s' % (name, value))
+            self.cursor.fetchall()
 
     def get_state(self, state, size):
         state = deque(chain(repeat('', size), state), maxlen=size)
@@ -109,13 +345,16 @@ class SqliteStorage(Storage):
 
     def get_links(self, dataset, state, backward=False):
         if backward:
-            query = ('SELECT count, bvalue, source'
+            query = ('SELECT links.count, tokens.value, links.source'
                      ' FROM links'
-                     ' WHERE dataset=? AND target=?')
+                     ' INNER JOIN tokens ON tokens.id = links.btoken'
+                     ' WHERE links.dataset=? AND links.target=?')
         else:
-            query = ('SELECT count, value, target'
+            query = ('SELECT links.count, tokens.value,'
+                     ' NULLIF(links.target, 0)'
                      ' FROM links'
-                     ' WHERE dataset=? AND source=?')
+                     ' LEFT JOIN tokens ON tokens.id = links.token'
+                     ' WHERE links.dataset=? AND links.source=?')
         self.cursor.execute(query, (dataset, state))
         return self.cursor.fetchall()
 
@@ -134,35 +373,86 @@ class SqliteStorage(Storage):
         )
         return set(x[0] for x in self.cursor.fetchall())
 
-    def get_node(self, value):
-        """Get node ID by value.
+    def _get_id(self, table, cache, value):
+        """Get row ID by value.
 
-        If a node with the specified value does not exist,
+        If a row with the specified value does not exist,
         create it and return its ID.
 
         Parameters
         ----------
+        table : `str`
+            Table name.
+        cache : `dict` of (`str`, `int`) or `None`
+            Bulk load mode ID cache.
         value : `str`
-            Node value.
+            Value.
 
         Returns
         -------
         `int`
-            Node ID.
+            Row ID.
         """
+        if cache is not None:
+            try:
+                return cache[value]
+            except KeyError:
+                self.cursor.execute(
+                    'INSERT INTO %s (value) VALUES (?)' % table,
+                    (value,)
+                )
+                ret = self.cursor.lastrowid
+                cache[value] = ret
+                return ret
         while True:
             self.cursor.execute(
-                'SELECT id FROM nodes WHERE value=?',
+                'SELECT id FROM %s WHERE value=?' % table,
                 (value,)
             )
-            node = self.cursor.fetchone()
-            if node is not None:
-                return node[0]
+            ret = self.cursor.fetchone()
+            if ret is not None:
+                return ret[0]
             self.cursor.execute(
-                'INSERT INTO nodes (value) VALUES (?)',
+                'INSERT INTO %s (value) VALUES (?)' % table,
                 (value,)
             )
 
+    def get_node(self, value):
+        """Get node ID by value.
+
+        If a node with the specified value does not exist,
+        create it and return its ID.
+
+        Parameters
+        ----------
+        value : `str`
+            Node value.
+
+        Returns
+        -------
+        `int`
+            Node ID.
+        """
+        return self._get_id('nodes', self._bulk_nodes, value)
+
+    def get_token(self, value):
+        """Get token ID by value.
+
+        If a token with the specified value does not exist,
+        create it and return its ID.
+
+        Parameters
+        ----------
+        value : `str`
+            Token value.
+
+        Returns
+        -------
+        `int`
+            Token ID.
+        """
+        return self._get_id('tokens', self._bulk_tokens, value)
+
     def update_main_table(self):
         """Write generator settings to database.
         """
@@ -173,10 +463,24 @@ class SqliteStorage(Storage):
         else:
             self.cursor.execute('UPDATE main SET settings=?', data)
 
+    def get_version(self):
+        """Get database schema version.
+
+        Returns
+        -------
+        `int`
+        """
+        self.cursor.execute('PRAGMA user_version')
+        return self.cursor.fetchone()[0]
+
     def create_tables(self):
         """Create tables if they don't exist.
+
+        Migrate links table to the current schema version if necessary.
         """
         self.cursor.execute('PRAGMA foreign_keys=1')
+        tables = self.get_tables()
+        version = self.get_version()
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS main (
                 settings TEXT NOT NULL DEFAULT "{}"
@@ -195,25 +499,135 @@ class SqliteStorage(Storage):
             )
         ''')
         self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS links (
-                dataset REFERENCES datasets (id),
-                source REFERENCES nodes (id),
-                target REFERENCES nodes (id),
-                value TEXT,
-                bvalue TEXT,
-                count INTEGER NOT NULL DEFAULT 1
+            CREATE TABLE IF NOT EXISTS tokens (
+                id INTEGER NOT NULL PRIMARY KEY,
+                value TEXT NOT NULL
             )
         ''')
+        if 'links' in tables and version < self.VERSION:
+            self.migrate()
+        else:
+            self.create_links_table()
+        self.create_indexes()
+        if version != self.VERSION:
+            self.cursor.execute('PRAGMA user_version=%d' % self.VERSION)
+
+    def create_links_table(self, name='links'):
+        """Create links table if it does not exist.
+
+        Parameters
+        ----------
+        name : `str`, optional
+            Table name (default: 'links').
+        """
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS %s (
+                dataset INTEGER NOT NULL,
+                source INTEGER NOT NULL,
+                target INTEGER NOT NULL,
+                token INTEGER NOT NULL,
+                btoken INTEGER NOT NULL,
+                count INTEGER NOT NULL DEFAULT 1,
+                PRIMARY KEY (dataset, source, target)
+            ) WITHOUT ROWID
+        ''' % name)
+
+    def create_indexes(self):
+        """Create indexes if they don't exist.
+        """
         self.cursor.execute(
             'CREATE UNIQUE INDEX IF NOT EXISTS node ON nodes (value)'
         )
         self.cursor.execute(
-            'CREATE INDEX IF NOT EXISTS link_source ON links (source, dataset)'
+            'CREATE UNIQUE INDEX IF NOT EXISTS token ON tokens (value)'
         )
         self.cursor.execute(
-            'CREATE INDEX IF NOT EXISTS link_target ON links (target, dataset)'
+            'CREATE INDEX IF NOT EXISTS link_target ON links (dataset, target)'
         )
 
+    def migrate(self):
+        """Migrate links table from schema version 1.
+
+        Version 1 links table stores source and target values
+        as text on every row.
+        """
+        self.cursor.execute('DROP INDEX IF EXISTS link_source')
+        self.cursor.execute('DROP INDEX IF EXISTS link_target')
+        self.cursor.execute('ALTER TABLE links RENAME TO links_v1')
+        self.cursor.execute(
+            'CREATE UNIQUE INDEX IF NOT EXISTS token ON tokens (value)'
+        )
+        self.cursor.execute(
+            'INSERT OR IGNORE INTO tokens (value)'
+            ' SELECT value FROM links_v1 WHERE value IS NOT NULL'
+            ' UNION SELECT bvalue FROM links_v1 WHERE bvalue IS NOT NULL'
+        )
+        self.create_links_table()
+        self.cursor.execute(
+            'INSERT INTO links'
+            ' (dataset, source, target, token, btoken, count)'
+            ' SELECT links_v1.dataset, links_v1.source,'
+            ' IFNULL(links_v1.target, 0), IFNULL(token.id, 0), btoken.id,'
+            ' SUM(links_v1.count)'
+            ' FROM links_v1'
+            ' LEFT JOIN tokens AS token ON token.value = links_v1.value'
+            ' INNER JOIN tokens AS btoken ON btoken.value = links_v1.bvalue'
+            ' GROUP BY links_v1.dataset, links_v1.source,'
+            ' IFNULL(links_v1.target, 0)'
+        )
+        self.cursor.execute('DROP TABLE links_v1')
+        self.db.commit()
+
+    def do_prune(self, prune_state):
+        """Prune links.
+
+        Links are pruned by source state, so backward link
+        counts are affected by forward pruning. Nodes and tokens
+        that are not used by any link are removed.
+        ``VACUUM`` is required to reduce database file size.
+
+        Parameters
+        ----------
+        prune_state : `function`
+            Function that takes link counts of a state and link
+            direction and returns new counts (0 if a link is removed).
+        """
+        self.end_bulk()
+        removed = []
+        updated = []
+        cursor = self.db.cursor()
+        cursor.execute('SELECT dataset, source, target, count FROM links'
+                       ' ORDER BY dataset, source')
+        for _, links in groupby(cursor, itemgetter(0, 1)):
+            links = list(links)
+            counts = prune_state([link[3] for link in links])
+            for link, count in zip(links, counts):
+                if not count:
+                    removed.append(link[:3])
+                elif count != link[3]:
+                    updated.append((count,) + link[:3])
+        cursor.close()
+        self.cursor.executemany(
+            'DELETE FROM links WHERE dataset=? AND source=? AND target=?',
+            removed
+        )
+        self.cursor.executemany(
+            'UPDATE links SET count=?'
+            ' WHERE dataset=? AND source=? AND target=?',
+            updated
+        )
+        self.cursor.execute(
+            'DELETE FROM nodes'
+            ' WHERE id NOT IN (SELECT source FROM links)'
+            ' AND id NOT IN (SELECT target FROM links)'
+        )
+        self.cursor.execute(
+            'DELETE FROM tokens'
+            ' WHERE id NOT IN (SELECT token FROM links)'
+            ' AND id NOT IN (SELECT btoken FROM links)'
+        )
+        self.db.commit()
+
     def do_save(self, fp=None):
         """Save.
 
@@ -223,8 +637,11 @@ class SqliteStorage(Storage):
         """
         if fp is not None:
             raise NotImplementedError()
-        self.update_main_table()
-        self.db.commit()
+        if self.bulk:
+            self.end_bulk(True)
+        else:
+            self.update_main_table()
+            self.db.commit()
 
     def close(self):
         self.cursor.close()
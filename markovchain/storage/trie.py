@@ -0,0 +1,428 @@
+import re
+import sys
+from collections import deque
+from itertools import chain, repeat
+
+from .base import Storage
+from .json import JsonStorage
+from ..util import state_size_dataset
+
+
+class TrieStorage(Storage):
+    """Context tree storage.
+
+    Datasets that differ only in state size share a tree.
+    Forward tree paths are state tokens from last to first
+    and backward tree paths are state tokens from first to last,
+    so states of all sizes share path prefixes. A node of depth N
+    holds links of a state of size N.
+
+    Nodes are lists of link counts, link targets and children.
+    Links are stored as in `markovchain.storage.JsonStorage`
+    (`int` and `str` for a single link or `list` of `int`
+    and `list` of `str`). Children are `None`, (`str`, `list`)
+    for a single child or `dict` of (`str`, `list`).
+    Tokens are interned.
+
+    Saved and loaded in `markovchain.storage.JsonStorage` format.
+
+    Attributes
+    ----------
+    RE_STATE_SIZE : `_sre.SRE_Pattern`
+        Dataset key with state size suffix
+        (`markovchain.util.state_size_dataset`).
+    datasets : `dict` of (`str`, ((`str`, `bool`), `int` or `None`))
+        Tree key and state size by dataset key.
+    trees : `dict` of ((`str`, `bool`), `list`)
+        Forward tree roots by dataset key prefix
+        and state size suffix flag.
+    backward : `None` or `dict` of ((`str`, `bool`), `list`)
+        Backward tree roots.
+    """
+    RE_STATE_SIZE = re.compile(r'^(.*)_ss([0-9]+)$', re.DOTALL)
+
+    def __init__(self, backward=None, settings=None):
+        """Trie storage constructor.
+
+        Parameters
+        ----------
+        backward : `bool`, optional
+            Store backward links
+            (default: settings['storage']['backward'] or `False`).
+        settings : `dict`, optional
+        """
+        if backward is None:
+            backward = (settings or {}).get('storage', {}).get('backward',
+                                                              False)
+        super().__init__(settings)
+        self.datasets = {}
+        self.trees = {}
+        self.backward = {} if backward else None
+
+    def __eq__(self, storage):
+        return (isinstance(storage, TrieStorage)
+                and self.datasets == storage.datasets
+                and self.trees == storage.trees
+                and self.backward == storage.backward
+                and super().__eq__(storage))
+
+    @staticmethod
+    def find_node(node, path):
+        """Find a node.
+
+        Parameters
+        ----------
+        node : `list`
+            Tree root.
+        path : `iterable` of `str`
+            Node path.
+
+        Returns
+        -------
+        `list` or `None`
+            Node or `None` if it does not exist.
+        """
+        for token in path:
+            children = node[2]
+            if children is None:
+                return None
+            if type(children) is tuple: # pylint:disable=unidiomatic-typecheck
+                if children[0] != token:
+                    return None
+                node = children[1]
+            else:
+                node = children.get(token)
+                if node is None:
+                    return None
+        return node
+
+    @staticmethod
+    def add_node(node, path):
+        """Find or create a node.
+
+        Parameters
+        ----------
+        node : `list`
+            Tree root.
+        path : `iterable` of `str`
+            Node path.
+
+        Returns
+        -------
+        `list`
+            Node.
+        """
+        intern = sys.intern
+        for token in path:
+            children = node[2]
+            if children is None:
+                child = [None, None, None]
+                node[2] = (intern(token), child)
+                node = child
+            elif type(children) is tuple: # pylint:disable=unidiomatic-typecheck
+                if children[0] == token:
+                    node = children[1]
+                else:
+                    child = [None, None, None]
+                    node[2] = {children[0]: children[1], intern(token): child}
+                    node = child
+            else:
+                try:
+                    node = children[token]
+                except KeyError:
+                    child = [None, None, None]
+                    children[intern(token)] = child
+                    node = child
+        return node
+
+    @staticmethod
+    def children(node):
+        """Get node children.
+
+        Parameters
+        ----------
+        node : `list`
+            Node.
+
+        Returns
+        -------
+        `iterable` of (`str`, `list`)
+            Tokens and child nodes.
+        """
+        children = node[2]
+        if children is None:
+            return ()
+        if isinstance(children, tuple):
+            return (children,)
+        return children.items()
+
+    @staticmethod
+    def add_link(node, target, count=1):
+        """Add a link.
+
+        Parameters
+        ----------
+        node : `list`
+            Link source node.
+        target : `str` or `None`
+            Link target.
+        count : `int`, optional
+            Link count (default: 1).
+        """
+        values, links = node[0], node[1]
+        if values is None:
+            node[0] = count
+            node[1] = target if target is None else sys.intern(target)
+        elif isinstance(links, list):
+            try:
+                values[links.index(target)] += count
+            except ValueError:
+                links.append(target if target is None
+                             else sys.intern(target))
+                values.append(count)
+        elif links == target:
+            node[0] += count
+        else:
+            node[0] = [values, count]
+            node[1] = [links, target if target is None
+                       else sys.intern(target)]
+
+    @classmethod
+    def iter_nodes(cls, node, depth=None, path=()):
+        """Iterate over nodes with links.
+
+        Parameters
+        ----------
+        node : `list`
+            Tree root.
+        depth : `int` or `None`, optional
+            Node depth (default: any depth).
+        path : `tuple` of `str`, optional
+            Root path.
+
+        Returns
+        -------
+        `generator` of (`tuple` of `str`, `list`)
+            Node paths and nodes.
+        """
+        if node[0] is not None and (depth is None or depth == len(path)):
+            yield path, node
+        if depth is None or depth > len(path):
+            for token, child in cls.children(node):
+                yield from cls.iter_nodes(child, depth, path + (token,))
+
+    def replace_state_separator(self, old_separator, new_separator):
+        pass
+
+    def get_dataset(self, key, create=False):
+        try:
+            tree, _ = self.datasets[key]
+        except KeyError:
+            if not create:
+                raise
+            match = self.RE_STATE_SIZE.match(key)
+            if match is None:
+                tree, size = (key, False), None
+            else:
+                tree, size = (match.group(1), True), int(match.group(2))
+            self.datasets[key] = (tree, size)
+            if tree not in self.trees:
+                self.trees[tree] = [None, None, None]
+                if self.backward is not None:
+                    self.backward[tree] = [None, None, None]
+        return (
+            self.trees[tree],
+            None if self.backward is None else self.backward[tree]
+        )
+
+    def add_links(self, links, dataset_prefix=''):
+        self.add_link_counts(
+            ((dataset, tuple(src), dst, 1) for dataset, src, dst in links),
+            dataset_prefix
+        )
+
+    def add_link_counts(self, links, dataset_prefix=''):
+        add_node = self.add_node
+        add_link = self.add_link
+        for dataset, src, dst, count in links:
+            forward, backward = self.get_dataset(dataset_prefix + dataset,
+                                                 True)
+            if backward is not None and dst is not None:
+                node = add_node(backward, chain(src[1:], (dst,)))
+                add_link(node, src[0], count)
+            add_link(add_node(forward, reversed(src)), dst, count)
+
+    def get_state(self, state, size):
+        return deque(chain(repeat('', size), state), maxlen=size)
+
+    def copy_state(self, state):
+        return state.copy()
+
+    def get_states(self, dataset, string):
+        root = self.get_dataset(dataset)[0]
+        size = self.datasets[dataset][1]
+        string = string.lower()
+        ret = []
+        for path, _ in self.iter_nodes(root, size):
+            state = self.join_state(reversed(path))
+            if string in state.lower():
+                ret.append(state)
+        return ret
+
+    def get_links(self, dataset, state, backward=False):
+        """
+        Raises
+        ------
+        ValueError
+            If backward == `True` and self.backward is `None`.
+        """
+        if backward:
+            if self.backward is None:
+                raise ValueError('no backward nodes')
+            node = self.find_node(dataset[1], state)
+        else:
+            node = self.find_node(dataset[0], reversed(state))
+        if node is None or node[0] is None:
+            return []
+        if not isinstance(node[1], list):
+            return [(node[0], node[1])]
+        return list(zip(node[0], node[1]))
+
+    def follow_link(self, link, state, backward=False):
+        value = link[1]
+        if backward:
+            state.appendleft(value)
+        else:
+            state.append(value)
+        return state
+
+    def do_prune(self, prune_state):
+        def prune_node(node, backward):
+            children = [
+                (token, child)
+                for token, child in list(self.children(node))
+                if prune_node(child, backward)
+            ]
+            if not children:
+                node[2] = None
+            elif len(children) == 1:
+                node[2] = children[0]
+            else:
+                node[2] = dict(children)
+            if node[0] is not None:
+                values, links = node[0], node[1]
+                if not isinstance(links, list):
+                    values = [values]
+                    links = [links]
+                counts = prune_state(values, backward)
+                links = [
+                    (count, link)
+                    for count, link in zip(counts, links)
+                    if count
+                ]
+                if not links:
+                    node[0] = node[1] = None
+                elif len(links) == 1:
+                    node[0], node[1] = links[0]
+                else:
+                    node[0] = [count for count, _ in links]
+                    node[1] = [link for _, link in links]
+            return node[0] is not None or node[2] is not None
+
+        for backward, trees in enumerate((self.trees, self.backward)):
+            if trees is not None:
+                for root in trees.values():
+                    prune_node(root, bool(backward))
+
+    def do_save(self, fp=None):
+        """Save to file in `markovchain.storage.JsonStorage` format.
+
+        Parameters
+        ----------
+        fp : `file` or `str`, optional
+            Output file (default: stdout).
+        """
+        self.to_json().do_save(fp)
+
+    def to_json(self):
+        """Convert to JSON storage.
+
+        Returns
+        -------
+        `markovchain.storage.JsonStorage`
+        """
+        data = []
+        for backward, trees in enumerate((self.trees, self.backward)):
+            if trees is None:
+                data.append(None)
+                continue
+            datasets = dict((key, {}) for key in self.datasets)
+            for (prefix, sized), root in trees.items():
+                for path, node in self.iter_nodes(root):
+                    key = prefix
+                    if sized:
+                        key += state_size_dataset(len(path))
+                    if not backward:
+                        path = reversed(path)
+                    state = self.join_state(path)
+                    datasets.setdefault(key, {})[state] = [node[0], node[1]]
+            data.append(datasets)
+        return JsonStorage(data[0], data[1], self.settings)
+
+    @classmethod
+    def from_json(cls, storage):
+        """Convert from JSON storage.
+
+        Parameters
+        ----------
+        storage : `markovchain.storage.JsonStorage`
+
+        Returns
+        -------
+        `markovchain.storage.TrieStorage`
+        """
+        storage.load_datasets()
+        ret = cls(storage.backward is not None, storage.settings)
+        ret.state_separator = storage.state_separator
+        for backward, data in enumerate((storage.nodes, storage.backward)):
+            if data is None:
+                continue
+            for key, dataset in data.items():
+                root = ret.get_dataset(key, True)[backward]
+                size = ret.datasets[key][1]
+                for state, (counts, targets) in dataset.items():
+                    path = storage.split_state(state)
+                    if size is not None and len(path) < size:
+                        path[:0] = repeat('', size - len(path))
+                    if not backward:
+                        path.reverse()
+                    node = ret.add_node(root, path)
+                    if isinstance(targets, list):
+                        for count, target in zip(counts, targets):
+                            ret.add_link(node, target, count)
+                    else:
+                        ret.add_link(node, targets, counts)
+        return ret
+
+    def close(self):
+        pass
+
+    @classmethod
+    def load(cls, fp):
+        """Load from file in `markovchain.storage.JsonStorage` format.
+
+        Parameters
+        ----------
+        fp : `file` or `str`
+            Input file or path.
+
+        Returns
+        -------
+        `markovchain.storage.TrieStorage`
+            Loaded storage.
+        """
+        storage = JsonStorage.load(fp)
+        try:
+            return cls.from_json(storage)
+        finally:
+            storage.close()
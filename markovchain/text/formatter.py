@@ -4,7 +4,7 @@ from abc import abstractmethod
 from ..util import SaveLoad, int_enum
 from .util import (
     CharCase, lstrip_ws_and_chars,
-    re_flags, re_flags_str, re_sub
+    re_flags, re_flags_str, re_sub, re_compile
 )
 
 
@@ -48,6 +48,8 @@ class Formatter(FormatterBase):
         Sentence ending characters.
     default_end : `None` or `str`
         Default sentence ending character.
+    optimize : `bool`
+        `True` if default replace rules are applied in fused passes.
     """
     # pylint:disable=bad-whitespace
     DEFAULT_REPLACE = [
@@ -59,11 +61,31 @@ class Formatter(FormatterBase):
         (r'(\w)([-+*]+)(\w)'  , r'\1 \2 \3'),
     ]
     # pylint:enable=bad-whitespace
+    # DEFAULT_REPLACE fused into two passes:
+    # rules 1-2 are applied to the same whitespace runs,
+    # rules 3-5 insert a space between two characters
+    # and do not affect each other or rule 6.
+    FAST_REPLACE = [
+        (
+            re.compile(r'\s*([^\w\s]+)\s*|\s+', re.U),
+            lambda match: match.group(1) or ' '
+        ),
+        (
+            re.compile(r'(?<=[,.?!])(?=\w)'
+                       r'|(?<=[\w,.?!])(?=[\[({<])'
+                       r'|(?<=[\])}>])(?=\w)'
+                       r'|(\w)([-+*]+)(\w)', re.U),
+            lambda match: (' ' if match.group(1) is None
+                           else '%s %s %s' % match.groups())
+        )
+    ]
+
     def __init__(self,
                  case=CharCase.TITLE,
                  replace=None,
                  end_chars='.?!',
-                 default_end='.'):
+                 default_end='.',
+                 optimize=True):
         """Formatter constructor.
 
         Parameters
@@ -76,13 +98,35 @@ class Formatter(FormatterBase):
             Default sentence ending character (default: '.').
         replace : `list` of ((`str`, `str`) or (`str`, `str`, `str`)), optional
             List of regular expressions to replace (default: DEFAULT_REPLACE).
+        optimize : `bool`, optional
+            Use `FAST_REPLACE` if `replace` is equal to `DEFAULT_REPLACE`
+            (default: `True`).
         """
         if replace is None:
             replace = self.DEFAULT_REPLACE
         self.case = int_enum(CharCase, case)
         self.end_chars = end_chars
         self.default_end = default_end
-        self.replace = []
+        self.replace = self.compile_replace(replace)
+        self.optimize = (
+            optimize
+            and self.replace == self.compile_replace(self.DEFAULT_REPLACE)
+        )
+
+    @staticmethod
+    def compile_replace(replace):
+        """Compile replace rules.
+
+        Parameters
+        ----------
+        replace : `list` of ((`str`, `str`) or (`str`, `str`, `str`))
+            List of regular expressions to replace.
+
+        Returns
+        -------
+        `list` of (_sre.SRE_Pattern, `str`, `int`)
+        """
+        ret = []
         for rule in replace:
             try:
                 expr, repl, flags = rule
@@ -90,7 +134,8 @@ class Formatter(FormatterBase):
                 expr, repl = rule
                 flags = 'u'
             flags, custom_flags = re_flags(flags)
-            self.replace.append((re.compile(expr, flags), repl, custom_flags))
+            ret.append((re_compile(expr, flags), repl, custom_flags))
+        return ret
 
     def save(self):
         data = super().save()
@@ -123,7 +168,11 @@ class Formatter(FormatterBase):
 
         string = self.case.convert(string)
 
-        for expr, repl, flags in self.replace:
-            string = re_sub(expr, repl, string, custom_flags=flags)
+        if self.optimize:
+            for expr, repl in self.FAST_REPLACE:
+                string = expr.sub(repl, string)
+        else:
+            for expr, repl, flags in self.replace:
+                string = re_sub(expr, repl, string, custom_flags=flags)
 
         return string
@@ -64,6 +64,47 @@ class MarkovText(Markov):
         text = self.storage.state_separator.join(parts)
         return self.formatter(text)
 
+    def limit_words(self, parts):
+        """Abort text generation if rank word limit is exceeded.
+
+        Parameters
+        ----------
+        parts : `iterable` of `str`
+            Text parts.
+
+        Returns
+        -------
+        `iterable` of `str` or `None`
+            Text parts or `None` if text has too many words.
+        """
+        max_words = self.rank.max_words
+        if max_words is None:
+            return parts
+        ret = []
+        nwords = 0
+        for part in parts:
+            nwords += len(get_words(part))
+            if nwords > max_words:
+                return None
+            ret.append(part)
+        return ret
+
+    def get_tokens(self, string):
+        """Split a string to tokens.
+
+        Parameters
+        ----------
+        string : `str`
+
+        Returns
+        -------
+        `list` of `str`
+        """
+        tokens = [token for token in self.scanner(string, True)
+                  if token is not self.scanner.END]
+        self.scanner.reset()
+        return tokens
+
     def get_cont_state(self, string, backward=False):
         """Get initial states from input string.
 
@@ -119,8 +160,45 @@ class MarkovText(Markov):
                 return ret
         return []
 
+    def generate_parts(self, state_size, state, dataset, backward,
+                       backoff=None, sampling=None):
+        """Generate text parts.
+
+        Parameters
+        ----------
+        state_size : `int`
+            State size.
+        state : `str` or `iterable` of `str`
+            Initial state.
+        dataset : `str`
+            Dataset key prefix.
+        backward : `bool`
+            Link direction.
+        backoff : `int` or `None`, optional
+            Minimum number of links for backoff generation
+            with parser state sizes up to `state_size`
+            (default: `None`, no backoff). Backward generation
+            does not use backoff.
+        sampling : `markovchain.storage.Sampling` or `None`, optional
+            Link sampling policy (default: `None`, link count
+            proportional sampling).
+
+        Returns
+        -------
+        `generator` of `str`
+            Text parts.
+        """
+        if backoff is None or backward:
+            return self.generate(state_size, state, dataset, backward,
+                                 sampling)
+        state_sizes = set(ss for ss in self.parser.state_sizes
+                          if ss <= state_size)
+        state_sizes.add(state_size)
+        return self.generate_backoff(state_sizes, state, dataset, backoff)
+
     def generate_cont(self, max_length, state_size,
-                      reply_to, backward, dataset):
+                      reply_to, backward, dataset, backoff=None,
+                      sampling=None):
         """Generate texts from start/end.
 
         Parameters
@@ -135,24 +213,34 @@ class MarkovText(Markov):
             `True` to generate text start.
         dataset: `str`
             Dataset key prefix.
+        backoff : `int` or `None`, optional
+            Minimum number of links for backoff generation.
+        sampling : `markovchain.storage.Sampling` or `None`, optional
+            Link sampling policy.
 
         Returns
         -------
-        `generator` of `str`
-            Generated texts.
+        `generator` of (`str` or `None`)
+            Generated texts (`None` if text has too many words).
         """
         state = self.get_cont_state(reply_to, backward)
         while True:
-            parts = self.generate(state_size, state, dataset, backward)
+            parts = self.generate_parts(state_size, state, dataset,
+                                        backward, backoff, sampling)
             if reply_to is not None:
                 if backward:
+                    parts = self.limit_words(parts)
+                    if parts is None:
+                        yield None
+                        continue
                     parts = chain(reversed(list(parts)), (reply_to,))
                 else:
                     parts = chain((reply_to,), parts)
-            parts = islice(parts, 0, max_length)
-            yield self.format(parts)
+            parts = self.limit_words(islice(parts, 0, max_length))
+            yield None if parts is None else self.format(parts)
 
-    def generate_replies(self, max_length, state_size, reply_to, dataset):
+    def generate_replies(self, max_length, state_size, reply_to, dataset,
+                         backoff=None, sampling=None):
         """Generate replies.
 
         Parameters
@@ -165,11 +253,15 @@ class MarkovText(Markov):
             Input string.
         dataset: `str`
             Dataset key prefix.
+        backoff : `int` or `None`, optional
+            Minimum number of links for backoff generation.
+        sampling : `markovchain.storage.Sampling` or `None`, optional
+            Link sampling policy.
 
         Returns
         -------
-        `generator` of `str`
-            Generated texts.
+        `generator` of (`str` or `None`)
+            Generated texts (`None` if text has too many words).
         """
         state_sets = self.get_reply_states(
             reply_to,
@@ -178,32 +270,103 @@ class MarkovText(Markov):
 
         if not state_sets:
             yield from self.generate_cont(max_length, state_size,
-                                          None, False, dataset)
+                                          None, False, dataset, backoff,
+                                          sampling)
             return
 
         random.shuffle(state_sets)
 
-        generate = lambda state, backward: self.generate(
+        generate = lambda state, backward: self.generate_parts(
             state_size, state,
-            dataset, backward
+            dataset, backward, backoff, sampling
         )
 
         for states in cycle(state_sets):
             state = random.choice(states)
+            start = self.limit_words(generate(state, True))
+            if start is None:
+                yield None
+                continue
             parts = chain(
-                reversed(list(generate(state, True))),
+                reversed(list(start)),
                 (state,),
                 generate(state, False)
             )
-            parts = islice(parts, 0, max_length)
-            yield self.format(parts)
+            parts = self.limit_words(islice(parts, 0, max_length))
+            yield None if parts is None else self.format(parts)
+
+    def generate_beam(self, max_length, state_size, reply_to, reply_mode,
+                      dataset, beam):
+        """Generate most likely texts with beam search.
+
+        Parameters
+        ----------
+        max_length : `int` or `None`
+            Maximum sentence length (default: `beam.max_length`).
+        state_size : `int`
+            State size.
+        reply_to : `str` or `None`
+            Input string.
+        reply_mode : `markovchain.text.util.ReplyMode`
+            Reply mode.
+        dataset: `str`
+            Dataset key prefix.
+        beam : `markovchain.storage.BeamSearch`
+            Beam search.
+
+        Returns
+        -------
+        `list` of (`str` or `None`)
+            Generated texts, most likely first
+            (`None` if text has too many words).
+        """
+        def search(state, backward):
+            generator = self.generator(state_size, dataset, backward)
+            return [
+                tokens for _, tokens in beam.search(
+                    self.storage, generator.data,
+                    generator.get_state(state), backward, max_length
+                )
+            ]
+
+        if reply_mode == ReplyMode.REPLY:
+            state_sets = self.get_reply_states(
+                reply_to,
+                dataset + state_size_dataset(state_size)
+            )
+            if state_sets:
+                state = random.choice(random.choice(state_sets))
+                start = search(state, True)
+                start = list(reversed(start[0])) if start else []
+                texts = [chain(start, (state,), tokens)
+                         for tokens in search(state, False)]
+            else:
+                texts = search((), False)
+        else:
+            backward = reply_mode == ReplyMode.START
+            texts = search(self.get_cont_state(reply_to, backward), backward)
+            if reply_to is not None:
+                if backward:
+                    texts = [chain(reversed(tokens), (reply_to,))
+                             for tokens in texts]
+                else:
+                    texts = [chain((reply_to,), tokens) for tokens in texts]
+
+        ret = []
+        for parts in texts:
+            parts = self.limit_words(islice(parts, 0, max_length))
+            ret.append(None if parts is None else self.format(parts))
+        return ret
 
     def __call__(self,
                  max_length=None,
                  state_size=None,
                  reply_to=None,
                  reply_mode=ReplyMode.END,
-                 dataset=''):
+                 dataset='',
+                 backoff=None,
+                 sampling=None,
+                 beam=None):
         """Generate text.
 
         Parameters
@@ -211,35 +374,84 @@ class MarkovText(Markov):
         max_length : `int` or `None`, optional
             Maximum sentence length (default: None).
         state_size : `int`, optional
-            State size (default: parser.state_sizes[0]).
+            State size (default: parser.state_sizes[0]
+            or maximum parser state size if `backoff` is not `None`).
         reply_to : `str` or `None`, optional
             Input string (default: None).
         reply_mode : `markovchain.text.util.ReplyMode`, optional
             Reply mode (default: `markovchain.text.util.ReplyMode.END`)
         dataset: `str`, optional
             Dataset key prefix (default: '').
+        backoff : `int` or `None`, optional
+            Minimum number of links for backoff generation
+            (default: `None`, no backoff). If a state
+            has fewer links or is unknown, shorter states are used.
+        sampling : `markovchain.storage.Sampling` or `None`, optional
+            Link sampling policy (default: `None`, link count
+            proportional sampling). Sampling can not be used
+            with backoff generation. Length limits of
+            `markovchain.storage.Constraint` apply to text start
+            and text end separately.
+        beam : `markovchain.storage.BeamSearch` or `None`, optional
+            Beam search (default: `None`, random generation).
+            If not `None`, most likely texts are ranked
+            instead of `rank.size` random texts, and the best
+            ranked text is returned. Beam search can not be used
+            with backoff generation or sampling.
 
         Returns
         -------
         `str`
+
+        Raises
+        ------
+        ValueError
+            If backoff < 1 or beam search, backoff and sampling
+            are used together.
         """
         if reply_to is None:
             reply_mode = ReplyMode.END
 
+        if backoff is not None and backoff < 1:
+            raise ValueError('backoff < 1')
+        if backoff is not None and sampling is not None:
+            raise ValueError('sampling with backoff')
+        if beam is not None and (backoff is not None or sampling is not None):
+            raise ValueError('beam search with backoff or sampling')
+
         if state_size is None:
-            state_size = next(iter(self.parser.state_sizes))
+            if backoff is None:
+                state_size = next(iter(self.parser.state_sizes))
+            else:
+                state_size = max(self.parser.state_sizes)
 
         if max_length is not None and max_length <= 0:
             return self.format('')
 
-        if reply_mode == ReplyMode.REPLY:
+        if beam is not None:
+            text = self.generate_beam(max_length, state_size, reply_to,
+                                      reply_mode, dataset, beam)
+        elif reply_mode == ReplyMode.REPLY:
             text = self.generate_replies(max_length, state_size,
-                                         reply_to, dataset)
+                                         reply_to, dataset, backoff,
+                                         sampling)
         else:
             backward = reply_mode == ReplyMode.START
             text = self.generate_cont(max_length, state_size,
-                                      reply_to, backward, dataset)
-
-        text = islice(text, 0, self.rank.size)
-        text = self.rank(text)
+                                      reply_to, backward, dataset, backoff,
+                                      sampling)
+
+        if beam is None:
+            text = islice(text, 0, self.rank.size)
+        text = self.rank(string for string in text if string is not None)
+        if not text:
+            max_words = self.rank.max_words
+            self.rank.max_words = None
+            try:
+                return self(max_length, state_size, reply_to,
+                            reply_mode, dataset, backoff, sampling, beam)
+            finally:
+                self.rank.max_words = max_words
+        if beam is not None:
+            return text[0]
         return random.choice(text)
@@ -1,11 +1,14 @@
 import sys
 import math
 from abc import abstractmethod
-from itertools import chain, islice
+from heapq import nlargest
+from itertools import chain
 
-from ..util import SaveLoad
+from ..util import SaveLoad, lazy_import
 from ..text.util import get_words
 
+np = lazy_import('numpy') # pylint:disable=invalid-name
+
 
 class Rank(SaveLoad):
     """Base text rank class.
@@ -14,27 +17,40 @@ class Rank(SaveLoad):
     ----------
     size : `int`
     remove : `float`
+    threshold : `float` or `None`
+        If not `None`, stop ranking at the first string
+        with rank >= threshold.
+    max_words : `int` or `None`
+        If not `None`, maximum number of words in a string.
     debug : `bool`
         If True, enable debug output.
     """
     classes = {}
 
-    def __init__(self, size=10, remove=0.5):
+    def __init__(self, size=10, remove=0.5, threshold=None, max_words=None):
         if size <= 0:
             raise ValueError('rank size <= 0')
+        if max_words is not None and max_words <= 0:
+            raise ValueError('rank max words <= 0')
         self.size = size
         self.remove = remove
+        self.threshold = threshold
+        self.max_words = max_words
         self.debug = False
 
     def __eq__(self, rank):
         return (super().__eq__(self, rank)
                 and self.size == rank.size
-                and abs(self.remove - rank.remove) < 1e-5)
+                and abs(self.remove - rank.remove) < 1e-5
+                and self.threshold == rank.threshold
+                and self.max_words == rank.max_words)
 
     def save(self):
         ret = super().save()
         ret['size'] = self.size
         ret['remove'] = self.remove
+        ret['threshold'] = self.threshold
+        ret['max_words'] = self.max_words
         return ret
 
     @abstractmethod
@@ -51,6 +67,19 @@ class Rank(SaveLoad):
         """
         pass
 
+    def rank_many(self, strings):
+        """Rank strings.
+
+        Parameters
+        ----------
+        strings : `list` of `str`
+
+        Returns
+        -------
+        `list` of `float`
+        """
+        return [self.rank(string) for string in strings]
+
     def __call__(self, strings):
         """Filter strings by rank.
 
@@ -64,12 +93,26 @@ class Rank(SaveLoad):
         `list` of `str`
             Filtered list.
         """
-        strings = sorted(
-            ((string, self.rank(string)) for string in strings),
-            key=lambda x: -x[1]
-        )
+        if self.threshold is None:
+            strings = list(strings)
+            ranks = self.rank_many(strings)
+        else:
+            ranks = []
+            ranked = []
+            for string in strings:
+                rank = self.rank(string)
+                if rank >= self.threshold:
+                    if self.debug:
+                        print([string], file=sys.stderr)
+                    return [string]
+                ranked.append(string)
+                ranks.append(rank)
+            strings = ranked
         end = max(1, len(strings) - int(self.remove * len(strings)))
-        res = [string for string, rank in islice(strings, 0, end)]
+        res = [
+            strings[i]
+            for i in nlargest(end, range(len(strings)), key=ranks.__getitem__)
+        ]
         if self.debug:
             print(res, file=sys.stderr)
         return res
@@ -77,29 +120,44 @@ class Rank(SaveLoad):
 
 class Const(Rank):
     """Constant text rank."""
-    def __init__(self, **_):
-        super().__init__(1, 0.0)
+    def __init__(self, size=1, remove=0.0, threshold=None, max_words=None):
+        super().__init__(size, remove, threshold, max_words)
 
     def rank(self, string):
         return 1
 
+    def rank_many(self, strings):
+        return [1] * len(strings)
+
 
 class Test(Rank):
-    def __init__(self, size, remove):
-        super().__init__(size=10, remove=0.5)
+    def __init__(self, size, remove, **kwargs):
+        super().__init__(size=10, remove=0.5, **kwargs)
         self.header = False
         self.opt_words = 8
         self.opt_long_words = 4
         self.opt_long_word_ratio = 0.6
         self.long_word_length = 4
 
-    def features(self, string):
+    def counts(self, string):
+        """Count words and long words in a string.
+
+        Parameters
+        ----------
+        string : `str`
+
+        Returns
+        -------
+        (`int`, `int`)
+        """
         words = get_words(string)
-        nwords = len(words)
-        nlongwords = sum(
-            1 for word in words
-            if len(word) >= self.long_word_length
+        return (
+            len(words),
+            sum(1 for word in words if len(word) >= self.long_word_length)
         )
+
+    def features(self, string):
+        nwords, nlongwords = self.counts(string)
         return [
             1 - abs(1 - nwords / self.opt_words),
             1 - abs(1 - nlongwords / self.opt_long_words) ** 2,
@@ -124,6 +182,23 @@ class Test(Rank):
             self.log(ret, features, string)
         return ret
 
+    def rank_many(self, strings):
+        if np is None or self.debug or not strings:
+            return super().rank_many(strings)
+        counts = np.array([self.counts(string) for string in strings],
+                          dtype=float)
+        nwords = counts[:, 0]
+        nlongwords = counts[:, 1]
+        if not nwords.all():
+            raise ZeroDivisionError('float division by zero')
+        features = np.stack([
+            1 - np.abs(1 - nwords / self.opt_words),
+            1 - np.abs(1 - nlongwords / self.opt_long_words) ** 2,
+            1 - np.abs(1 - nlongwords / nwords / self.opt_long_word_ratio)
+        ], axis=1)
+        np.clip(features, 0, 1, out=features)
+        return (features.sum(axis=1) / features.shape[1]).tolist()
+
     def __call__(self, strings):
         self.header = False
         return super().__call__(strings)
@@ -125,6 +125,12 @@ class CharScanner(TextScanner):
         self.start = False
         self.end = False
 
+    def checkpoint(self):
+        return [self.start, self.end]
+
+    def restore(self, state):
+        self.start, self.end = state
+
     def scan(self, data, part):
         """Scan a string.
 
@@ -237,6 +243,12 @@ class RegExpScanner(TextScanner):
         """
         self.end = True
 
+    def checkpoint(self):
+        return self.end
+
+    def restore(self, state):
+        self.end = state
+
     def scan(self, data, part):
         """Scan a string.
 
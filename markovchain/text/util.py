@@ -1,5 +1,6 @@
 import re
 import enum
+from functools import lru_cache
 
 
 RE_PUNCT = re.compile(r'^[^\w\s]+$')
@@ -219,6 +220,26 @@ def re_flags_str(flags, custom_flags):
             res += flag
     return res
 
+@lru_cache(maxsize=256)
+def re_compile(pattern, flags=0):
+    """Compile a regular expression.
+
+    Compiled expressions are cached and shared by all callers.
+
+    Parameters
+    ----------
+    pattern : `str`
+        Regular expression.
+    flags : `int`, optional
+        Flags (default: 0).
+
+    Returns
+    -------
+    `_sre.SRE_Pattern`
+        Compiled regular expression.
+    """
+    return re.compile(pattern, flags)
+
 def re_sub(pattern, repl, string, count=0, flags=0, custom_flags=0):
     """Replace regular expression.
 
@@ -237,10 +258,15 @@ def re_sub(pattern, repl, string, count=0, flags=0, custom_flags=0):
     custom_flags : `int`
         Custom flags.
     """
+    if isinstance(pattern, str):
+        pattern = re_compile(pattern, flags)
+    elif flags:
+        raise ValueError('cannot process flags argument'
+                         ' with a compiled pattern')
     if custom_flags & ReFlags.OVERLAP:
         prev_string = None
         while string != prev_string:
             prev_string = string
-            string = re.sub(pattern, repl, string, count, flags)
+            string = pattern.sub(repl, string, count)
         return string
-    return re.sub(pattern, repl, string, count, flags)
+    return pattern.sub(repl, string, count)
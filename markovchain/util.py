@@ -1,5 +1,7 @@
+import sys
 from itertools import islice, repeat
 from copy import deepcopy
+from importlib.util import find_spec, module_from_spec, LazyLoader
 from custom_inherit import DocInheritMeta
 
 
@@ -418,3 +420,31 @@ def level_dataset(lv):
         Dataset key part.
     """
     return '_lv%d' % lv
+
+
+def lazy_import(name):
+    """Import a module on first attribute access.
+
+    Parameters
+    ----------
+    name : `str`
+        Module name.
+
+    Returns
+    -------
+    `module` or `None`
+        Module or `None` if it is not installed.
+    """
+    try:
+        return sys.modules[name]
+    except KeyError:
+        pass
+    spec = find_spec(name)
+    if spec is None:
+        return None
+    loader = LazyLoader(spec.loader)
+    spec.loader = loader
+    module = module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -39,8 +39,10 @@ setup(name='markovchain',
       install_requires=['enum34', 'tqdm', 'custom_inherit'],
       extras_require={
           'image': ['pillow'],
+          'fast': ['numpy'],
           'dev': [
               'pillow',
+              'numpy',
               'pytest',
               'pytest-mock',
               'coverage',
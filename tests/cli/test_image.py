@@ -1,8 +1,10 @@
 import os
 import json
+import sqlite3
 import pytest
 
 from markovchain.cli.main import main
+from markovchain.cli.util import Checkpoint
 
 
 @pytest.mark.parametrize('fname,settings,data,args,res', [
@@ -43,3 +45,219 @@ def test_cli_image(mocker, mock_cli, fname, settings, data, args, res):
     cmd.append(statefile)
     mock_cli.run(main, cmd)
     mock_cli.assert_output(res, '')
+
+
+@pytest.mark.parametrize('fname,progress', [
+    ('state.json', False),
+    ('state.json', True),
+    ('state.db', False)
+])
+def test_cli_image_create_jobs(mocker, mock_cli, fname, progress):
+    Image = pytest.importorskip('PIL.Image')
+    mock_cli(mocker)
+
+    settings = os.path.join(mock_cli.dir, 'settings.json')
+    with open(settings, 'wt') as fp:
+        json.dump({
+            'markov': {
+                'levels': 2,
+                'scanner': {
+                    '__class__': 'ImageScanner',
+                    'resize': [8, 8]
+                },
+                'imgtype': {'__class__': 'RGB'}
+            }
+        }, fp)
+    fnames = []
+    for i in range(3):
+        fnames.append(os.path.join(mock_cli.dir, 'img%d.png' % i))
+        img = Image.new('RGB', (8, 8))
+        img.putdata([(i * 64, x * 4, 255 - x * 4) for x in range(64)])
+        img.save(fnames[-1])
+
+    states = []
+    for jobs in ('1', '2'):
+        state = os.path.join(mock_cli.dir, jobs + fname)
+        cmd = ['image', 'create', '-s', settings, '-j', jobs, '-o', state]
+        if progress:
+            cmd.append('-P')
+        mock_cli.run(main, cmd + fnames)
+        mock_cli.assert_output(None, None)
+        states.append(state)
+
+    if fname.endswith('.json'):
+        data = []
+        for state in states:
+            with open(state, 'rt') as fp:
+                data.append(json.load(fp))
+        assert data[0] == data[1]
+    else:
+        data = []
+        for state in states:
+            db = sqlite3.connect(state)
+            data.append(db.execute(
+                'SELECT datasets.key, source.value, target.value, count'
+                ' FROM links'
+                ' INNER JOIN datasets ON datasets.id = links.dataset'
+                ' INNER JOIN nodes AS source ON source.id = links.source'
+                ' LEFT JOIN nodes AS target ON target.id = links.target'
+                ' ORDER BY 1, 2, 3'
+            ).fetchall())
+            db.close()
+        assert data[0]
+        assert data[0] == data[1]
+
+@pytest.mark.parametrize('jobs', ['1', '2'])
+def test_cli_image_update_cache(mocker, mock_cli, jobs):
+    Image = pytest.importorskip('PIL.Image')
+    mock_cli(mocker)
+
+    cache = os.path.join(mock_cli.dir, 'cache')
+    settings = os.path.join(mock_cli.dir, 'settings.json')
+    with open(settings, 'wt') as fp:
+        json.dump({
+            'markov': {
+                'levels': 2,
+                'scanner': {
+                    '__class__': 'ImageScanner',
+                    'resize': [8, 8]
+                },
+                'imgtype': {'__class__': 'Indexed'}
+            }
+        }, fp)
+    fnames = []
+    for i in range(2):
+        fnames.append(os.path.join(mock_cli.dir, 'img%d.png' % i))
+        img = Image.new('RGB', (8, 8))
+        img.putdata([(i * 64, x * 4, 255 - x * 4) for x in range(64)])
+        img.save(fnames[-1])
+
+    states = []
+    for args in ([], ['-C', cache], ['-C', cache]):
+        state = os.path.join(mock_cli.dir, 'state%d.json' % len(states))
+        mock_cli.run(main, ['image', 'create', '-s', settings, '-o', state])
+        mock_cli.run(main, ['image', 'update', '-j', jobs]
+                     + args + [state] + fnames)
+        mock_cli.assert_output('', '')
+        with open(state, 'rt') as fp:
+            states.append(json.load(fp))
+    assert states[0] == states[1] == states[2]
+    assert len(os.listdir(cache)) == 2
+
+class Crash(Exception):
+    pass
+
+@pytest.mark.parametrize('fname,jobs', [
+    ('state.json', '1'),
+    ('state.json', '2'),
+    ('state.db', '1')
+])
+def test_cli_image_checkpoint(mocker, mock_cli, fname, jobs):
+    Image = pytest.importorskip('PIL.Image')
+    mock_cli(mocker)
+
+    settings = os.path.join(mock_cli.dir, 'settings.json')
+    with open(settings, 'wt') as fp:
+        json.dump({
+            'markov': {
+                'levels': 2,
+                'scanner': {
+                    '__class__': 'ImageScanner',
+                    'resize': [8, 8]
+                },
+                'imgtype': {'__class__': 'RGB'}
+            }
+        }, fp)
+    fnames = []
+    for i in range(4):
+        fnames.append(os.path.join(mock_cli.dir, 'img%d.png' % i))
+        img = Image.new('RGB', (8, 8))
+        img.putdata([(i * 64, x * 4, 255 - x * 4) for x in range(64)])
+        img.save(fnames[-1])
+
+    save = Checkpoint.save
+    positions = []
+    def save_crash(self, position):
+        positions.append(position)
+        if len(positions) == 3:
+            self.markov.close()
+            raise Crash()
+        save(self, position)
+
+    states = []
+    for args in ([], ['--resume']):
+        state = os.path.join(mock_cli.dir, '%d%s' % (len(states), fname))
+        cmd = ['image', 'create', '-s', settings, '-j', jobs, '-o', state]
+        if args:
+            mocker.patch.object(Checkpoint, 'save', save_crash)
+            with pytest.raises(Crash):
+                mock_cli.run(main, cmd + ['--checkpoint', '1'] + fnames)
+            assert positions == [(1, 0), (2, 0), (3, 0)]
+        mock_cli.run(main, cmd + args + fnames)
+        mock_cli.assert_output('', '')
+        states.append(state)
+
+    data = []
+    for state in states:
+        if fname.endswith('.json'):
+            with open(state, 'rt') as fp:
+                data.append(json.load(fp))
+        else:
+            db = sqlite3.connect(state)
+            data.append(db.execute(
+                'SELECT datasets.key, source.value, target.value, count'
+                ' FROM links'
+                ' INNER JOIN datasets ON datasets.id = links.dataset'
+                ' INNER JOIN nodes AS source ON source.id = links.source'
+                ' LEFT JOIN nodes AS target ON target.id = links.target'
+                ' ORDER BY 1, 2, 3'
+            ).fetchall())
+            db.close()
+    assert data[0]
+    assert data[0] == data[1]
+
+@pytest.mark.parametrize('imgtype,mode,progress', [
+    ('RGB', 'RGB', False),
+    ('Indexed', 'P', True),
+    ('Grayscale', 'L', False)
+])
+def test_cli_image_generate_tiled(mocker, mock_cli, imgtype, mode, progress):
+    Image = pytest.importorskip('PIL.Image')
+    mock_cli(mocker)
+
+    settings = os.path.join(mock_cli.dir, 'settings.json')
+    state = os.path.join(mock_cli.dir, 'state.json')
+    data = os.path.join(mock_cli.dir, 'img.png')
+    with open(settings, 'wt') as fp:
+        json.dump({
+            'markov': {
+                'levels': 3,
+                'scanner': {
+                    '__class__': 'ImageScanner',
+                    'resize': [16, 16],
+                    'level_scale': [2, 4]
+                },
+                'imgtype': {'__class__': imgtype}
+            }
+        }, fp)
+    img = Image.new('RGB', (16, 16))
+    img.putdata([(x, x * 2, 255 - x) for x in range(256)])
+    img.save(data)
+    mock_cli.run(main, ['image', 'create', '-s', settings, '-o', state, data])
+
+    output = os.path.join(mock_cli.dir, 'out%d.png')
+    cmd = ['image', 'generate', '-T', '-c', '2', '-S', '24', '16']
+    if progress:
+        cmd.append('-P')
+    mock_cli.run(main, cmd + [state, output])
+    mock_cli.assert_output(None if progress else '', None)
+    for i in range(2):
+        res = Image.open(output % i)
+        res.load()
+        assert res.size == (24, 16)
+        assert res.mode == mode
+
+def test_cli_image_generate_tiled_error(mocker, mock_cli):
+    mock_cli(mocker)
+    mock_cli.run(main, ['image', 'generate', '-T', 'state.json', 'out.jpg'])
+    mock_cli.assert_output('', 'Tiled output format is not PNG: out.jpg\n', 1)
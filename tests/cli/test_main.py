@@ -0,0 +1,64 @@
+import os
+import sys
+import subprocess
+import pytest
+
+import markovchain
+from markovchain.cli.main import main, get_command, get_commands
+
+
+@pytest.mark.parametrize('args,res', [
+    ([], None),
+    (['-v'], None),
+    (['text', 'generate'], 'text'),
+    (['-h', 'image', '-h'], 'image'),
+    (['x', 'text'], None)
+])
+def test_get_command(args, res):
+    assert get_command(args, ['text', 'image', 'serve']) == res
+
+def test_get_commands(mocker):
+    assert get_commands() == ['text', 'image', 'serve']
+    mocker.patch('markovchain.cli.main.find_spec', return_value=None)
+    assert get_commands() == ['text', 'serve']
+
+def test_main_no_image(mocker, mock_cli):
+    mock_cli(mocker)
+    mocker.patch('markovchain.cli.main.find_spec', return_value=None)
+    mock_cli.run(main, ['image', 'create'])
+    mock_cli.assert_output('', None, 2)
+    assert 'invalid choice' in mock_cli.stderr.getvalue()
+
+@pytest.mark.parametrize('args,status', [
+    (['text', '-h'], 0),
+    (['serve', '-h'], 0),
+    (['-h'], 1)
+])
+def test_main_help(mocker, mock_cli, args, status):
+    mock_cli(mocker)
+    mock_cli.run(main, args)
+    assert mock_cli.stdout.getvalue().startswith('usage: ')
+    mock_cli.assert_output(None, '', status)
+
+def test_main_json_no_sqlite(mocker, mock_cli):
+    mock_cli(mocker)
+    datafile = os.path.join(mock_cli.dir, 'data.txt')
+    statefile = os.path.join(mock_cli.dir, 'state.json')
+    with open(datafile, 'wt') as fp:
+        fp.write('aa bb')
+    mock_cli.run(main, ['text', 'create', '-o', statefile, datafile])
+    mock_cli.assert_output('', '')
+
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(
+        os.path.dirname(os.path.abspath(markovchain.__file__))
+    ))
+    res = subprocess.run(
+        [sys.executable, '-W', 'ignore', '-c',
+         'import sys\n'
+         'from markovchain.cli.main import main\n'
+         'main(["text", "generate", sys.argv[1]])\n'
+         'print("sqlite3" in sys.modules)',
+         statefile],
+        stdout=subprocess.PIPE, env=env, check=True
+    )
+    assert res.stdout.decode() == 'Aa bb.\nFalse\n'
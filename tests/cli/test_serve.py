@@ -0,0 +1,176 @@
+import os
+import json
+from argparse import Namespace
+from io import BytesIO
+from threading import Thread
+from urllib.request import urlopen
+from urllib.error import HTTPError
+
+import pytest
+
+from markovchain.cli.main import main
+from markovchain.cli.serve import Server, Histogram, load_models
+
+
+@pytest.fixture
+def server(mocker, mock_cli):
+    mock_cli(mocker)
+    datafile = os.path.join(mock_cli.dir, 'data.txt')
+    with open(datafile, 'wt') as fp:
+        fp.write('aa bb cc')
+    for fname in ('state.json', 'state.db'):
+        mock_cli.run(main, ['text', 'create', '-o',
+                            os.path.join(mock_cli.dir, fname), datafile])
+    mock_cli.assert_output('', '')
+
+    args = Namespace(settings={}, concurrency=2)
+    models = load_models('text', [
+        'json=' + os.path.join(mock_cli.dir, 'state.json'),
+        'db=' + os.path.join(mock_cli.dir, 'state.db')
+    ], args)
+
+    try:
+        from PIL import Image
+    except ImportError:
+        pass
+    else:
+        imgfile = os.path.join(mock_cli.dir, 'img.png')
+        img = Image.new('RGB', (4, 4))
+        img.putdata([(x * 16, 0, 0) for x in range(16)])
+        img.save(imgfile)
+        statefile = os.path.join(mock_cli.dir, 'img.json')
+        mock_cli.run(main, ['image', 'create', '-o', statefile, imgfile])
+        mock_cli.assert_output('', '')
+        models.extend(load_models('image', ['img=' + statefile], args))
+
+    server = Server(('127.0.0.1', 0), models, quiet=True)
+    thread = Thread(target=server.serve_forever, args=(0.01,))
+    thread.start()
+    server.url = 'http://127.0.0.1:%d/' % server.server_address[1]
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def request(server, path, data=None):
+    if data is not None:
+        data = json.dumps(data).encode('utf-8')
+    with urlopen(server.url + path, data) as res:
+        return res.status, res.headers['Content-Type'], res.read()
+
+
+def test_serve_models(server):
+    status, _, data = request(server, 'models')
+    assert status == 200
+    data = json.loads(data.decode('utf-8'))
+    assert sorted(data['text']) == ['db', 'json']
+
+
+@pytest.mark.parametrize('model', ['json', 'db'])
+@pytest.mark.parametrize('params,res', [
+    ({}, {'text': ['Aa bb cc.']}),
+    ({'count': 2, 'start': 'bb'}, {'text': ['Bb cc.', 'Bb cc.']}),
+    ({'format': False, 'words': 2}, {'text': ['aa bb']}),
+    ({'backoff': 2}, {'text': ['Aa bb cc.']}),
+    ({'temperature': 0.5, 'top_k': 1}, {'text': ['Aa bb cc.']}),
+    ({'exclude': ['BB'], 'terminate': True}, {'text': ['Aa.']}),
+    ({'beam': 2, 'start': 'bb'}, {'text': ['Bb cc.']}),
+    ([{}, {'count': 0}], [{'text': ['Aa bb cc.']}, {'text': []}])
+])
+def test_serve_text(server, model, params, res):
+    status, content_type, data = request(server, 'text/' + model, params)
+    assert status == 200
+    assert content_type == 'application/json'
+    assert json.loads(data.decode('utf-8')) == res
+
+
+@pytest.mark.parametrize('path,data,status', [
+    ('xxx', None, 404),
+    ('text/xxx', {}, 404),
+    ('text/json', {'start': 'aa', 'end': 'bb'}, 400),
+    ('text/json', {'backoff': 0}, 400),
+    ('text/json', {'top_p': 2}, 400),
+    ('text/json', {'exclude': 'xxx'}, 400),
+    ('text/json', {'beam': 0}, 400),
+    ('text/json', {'backoff': 1, 'temperature': 2}, 400),
+    ('text/json', 'xxx', 400)
+])
+def test_serve_error(server, path, data, status):
+    with pytest.raises(HTTPError) as err:
+        request(server, path, data)
+    assert err.value.code == status
+    assert 'error' in json.loads(err.value.read().decode('utf-8'))
+
+
+def test_serve_image(server):
+    Image = pytest.importorskip('PIL.Image')
+    status, content_type, data = request(
+        server, 'image/img', {'size': [4, 4]}
+    )
+    assert status == 200
+    assert content_type == 'image/png'
+    assert Image.open(BytesIO(data)).size == (4, 4)
+    with pytest.raises(HTTPError) as err:
+        request(server, 'image/img', {})
+    assert err.value.code == 400
+
+
+def test_serve_metrics(server):
+    request(server, 'text/json', {})
+    request(server, 'text/json', [{}, {}])
+    status, content_type, data = request(server, 'metrics')
+    assert status == 200
+    assert content_type.startswith('text/plain')
+    lines = data.decode('utf-8').splitlines()
+    assert ('markovchain_request_duration_seconds_count'
+            '{type="text",model="json"} 2') in lines
+    assert ('markovchain_request_duration_seconds_count'
+            '{type="text",model="db"} 0') in lines
+
+
+@pytest.mark.parametrize('test,res', [
+    ([], [0] * 11 + [0]),
+    ([0.001, 0.3, 20], [1] * 6 + [2] * 5 + [3])
+])
+def test_serve_histogram(test, res):
+    hist = Histogram()
+    for value in test:
+        hist.observe(value)
+    lines = hist.format('x', 'a="b"')
+    counts = [int(line.rsplit(' ', 1)[1]) for line in lines[:-2]]
+    assert counts == res
+    assert lines[-1] == 'x_count{a="b"} %d' % len(test)
+
+
+def test_serve_load_models_error():
+    args = Namespace(settings={}, concurrency=1)
+    with pytest.raises(ValueError):
+        load_models('text', ['xxx'], args)
+
+def test_serve_load_models_shared(mocker, mock_cli):
+    mock_cli(mocker)
+    datafile = os.path.join(mock_cli.dir, 'data.txt')
+    with open(datafile, 'wt') as fp:
+        fp.write('aa bb cc')
+    specs = []
+    for fname in ('state.json', 'state.jsons', 'state.db'):
+        statefile = os.path.join(mock_cli.dir, fname)
+        mock_cli.run(main, ['text', 'create', '-o', statefile, datafile])
+        specs.append(fname + '=' + statefile)
+    mock_cli.assert_output('', '')
+
+    args = Namespace(settings={}, concurrency=3)
+    models = load_models('text', specs, args)
+    for model in models:
+        instances = [model.pool.get() for _ in range(3)]
+        assert len(set(map(id, instances))) == 3
+        assert len(set(id(markov.parser) for markov in instances)) == 3
+        storages = set(id(markov.storage) for markov in instances)
+        if model.name == 'state.db':
+            assert len(storages) == 3
+        else:
+            assert len(storages) == 1
+        for markov in instances:
+            assert markov() == 'Aa bb cc.'
+            markov.storage.close()
@@ -1,8 +1,12 @@
 import os
+import bz2
 import json
+import sqlite3
 import pytest
 
 from markovchain.cli.main import main
+from markovchain.cli.util import Checkpoint, load_json
+from markovchain.storage.sqlite import SqliteStorage
 
 
 @pytest.mark.parametrize('fname,settings,data,args,res', [
@@ -40,6 +44,90 @@ from markovchain.cli.main import main
         ['a b c.\na b c.\na b c.\nb b d.'],
         ['-ss', '2', '-S', 'b b'],
         'B b d.\n'
+    ),
+    (
+        'state.jsons',
+        {
+            'markov': {
+                'parser': {
+                    '__class__': 'Parser',
+                    'state_sizes': [1, 2]
+                }
+            }
+        },
+        ['a b c.', 'a b c.\na b c.\nb b d.'],
+        ['-ss', '2', '-S', 'b b'],
+        'B b d.\n'
+    ),
+    (
+        'state.json',
+        {
+            'markov': {
+                'parser': {
+                    '__class__': 'Parser',
+                    'state_sizes': [1, 2]
+                }
+            }
+        },
+        ['a b c.'],
+        ['-ss', '2', '-S', 'c b'],
+        'C b.\n'
+    ),
+    (
+        'state.db',
+        {
+            'markov': {
+                'parser': {
+                    '__class__': 'Parser',
+                    'state_sizes': [1, 2]
+                }
+            }
+        },
+        ['a b c.'],
+        ['-b', '1', '-S', 'c b'],
+        'C b c.\n'
+    ),
+    (
+        'state.json',
+        None,
+        ['a b. a b. a c.'],
+        ['-k', '1', '-S', 'a'],
+        'A b.\n'
+    ),
+    (
+        'state.db',
+        None,
+        ['a b. a b. a c.'],
+        ['-t', '0.5', '-p', '0.5', '-S', 'a'],
+        'A b.\n'
+    ),
+    (
+        'state.json',
+        None,
+        ['a b. a b. a c.'],
+        ['-x', 'B', '-S', 'a'],
+        'A c.\n'
+    ),
+    (
+        'state.db',
+        None,
+        ['a b c d e. f.'],
+        ['-T', '-w', '2', '-c', '2'],
+        'F.\nF.\n'
+    ),
+    (
+        'state.json',
+        None,
+        ['a b c d e. a b. a b c.'],
+        ['-B', '2', '-c', '2'],
+        'A b c.\nA b c.\n'
+    ),
+    (
+        'state.db',
+        None,
+        ['a b c d e. a b. a b c.'],
+        ['-B', '2', '-S', 'c'],
+        'C d e.\n'
     )
 ])
 def test_cli_text(mocker, mock_cli, fname, settings, data, args, res):
@@ -78,3 +166,314 @@ def test_cli_text(mocker, mock_cli, fname, settings, data, args, res):
     cmd.append(statefile)
     mock_cli.run(main, cmd)
     mock_cli.assert_output(res, '')
+
+@pytest.mark.parametrize('fname', [
+    'state.json', 'state.json.bz2', 'state.jsons'
+])
+def test_cli_text_update_log(mocker, mock_cli, fname):
+    mock_cli(mocker)
+
+    statefile = os.path.join(mock_cli.dir, fname)
+    logfile = statefile + '.log'
+    datafiles = []
+    for i, data in enumerate(['aa bb', 'cc dd', 'ee ff']):
+        datafile = os.path.join(mock_cli.dir, 'data%d.txt' % i)
+        with open(datafile, 'wt') as fp:
+            fp.write(data)
+        datafiles.append(datafile)
+
+    mock_cli.run(main, ['text', 'create', '-o', statefile, datafiles[0]])
+    mtime = os.path.getmtime(statefile)
+    for datafile in datafiles[1:]:
+        mock_cli.run(main, ['text', 'update', '-L', statefile, datafile])
+    mock_cli.assert_output('', '')
+    assert os.path.getmtime(statefile) == mtime
+    with open(logfile, 'rt') as fp:
+        assert len(fp.readlines()) == 8
+
+    mock_cli.run(main, ['text', 'generate', '-S', 'ee', statefile])
+    mock_cli.assert_output('Ee ff.\n', '')
+    mock_cli.reset()
+
+    mock_cli.run(main, ['text', 'compact', statefile])
+    mock_cli.assert_output('', '')
+    assert not os.path.exists(logfile)
+
+    mock_cli.run(main, ['text', 'generate', '-S', 'ee', statefile])
+    mock_cli.assert_output('Ee ff.\n', '')
+
+def save_legacy(fname):
+    storage = load_json(fname)
+    storage.load_datasets()
+    storage.close()
+    del storage.settings['storage']['backward']
+    if storage.container:
+        with open(fname, 'wb') as fp:
+            storage.save_container(fp)
+        return
+    with (bz2.open if fname.endswith('.bz2') else open)(fname, 'wt') as fp:
+        json.dump({
+            'settings': storage.settings,
+            'nodes': storage.nodes,
+            'backward': storage.backward
+        }, fp)
+
+@pytest.mark.parametrize('fname', [
+    'state.json', 'state.json.bz2', 'state.jsons'
+])
+@pytest.mark.parametrize('flag', [True, False])
+def test_cli_text_update_log_backward(mocker, mock_cli, fname, flag):
+    mock_cli(mocker)
+
+    statefiles = [os.path.join(mock_cli.dir, name + fname[5:])
+                  for name in ('state', 'expected')]
+    settings = os.path.join(mock_cli.dir, 'settings.json')
+    with open(settings, 'wt') as fp:
+        json.dump({'storage': {'backward': True}}, fp)
+    datafiles = []
+    for i, data in enumerate(['aa bb', 'aa cc']):
+        datafile = os.path.join(mock_cli.dir, 'data%d.txt' % i)
+        with open(datafile, 'wt') as fp:
+            fp.write(data)
+        datafiles.append(datafile)
+
+    for statefile in statefiles:
+        mock_cli.run(main, ['text', 'create', '-s', settings,
+                            '-o', statefile, datafiles[0]])
+        if not flag:
+            save_legacy(statefile)
+    mock_cli.run(main, ['text', 'update', statefiles[1], datafiles[1]])
+    mock_cli.run(main, ['text', 'update', '-L', statefiles[0], datafiles[1]])
+    mock_cli.run(main, ['text', 'compact', statefiles[0]])
+    mock_cli.assert_output('', '')
+
+    state, expected = map(read_state, statefiles)
+    assert state.backward
+    assert state == expected
+
+@pytest.mark.parametrize('fname', [
+    'state.json', 'state.json.bz2', 'state.jsons'
+])
+def test_cli_text_create_remove_log(mocker, mock_cli, fname):
+    mock_cli(mocker)
+
+    statefile = os.path.join(mock_cli.dir, fname)
+    datafiles = []
+    for i, data in enumerate(['aa bb', 'cc dd', 'ee ff']):
+        datafile = os.path.join(mock_cli.dir, 'data%d.txt' % i)
+        with open(datafile, 'wt') as fp:
+            fp.write(data)
+        datafiles.append(datafile)
+
+    mock_cli.run(main, ['text', 'create', '-o', statefile, datafiles[0]])
+    mock_cli.run(main, ['text', 'update', '-L', statefile, datafiles[1]])
+    mock_cli.run(main, ['text', 'create', '-o', statefile, datafiles[2]])
+    mock_cli.assert_output('', '')
+    assert not os.path.exists(statefile + '.log')
+
+    mock_cli.run(main, ['text', 'generate', '-c', '10', statefile])
+    mock_cli.assert_output('Ee ff.\n' * 10, '')
+
+@pytest.mark.parametrize('args', [
+    ['text', 'update', '-L', 'state.db'],
+    ['text', 'update', '-L', '-o', 'state2.json', 'state.json'],
+    ['text', 'compact', 'state.db']
+])
+def test_cli_text_update_log_error(mocker, mock_cli, args):
+    mock_cli(mocker)
+    mock_cli.run(main, args)
+    mock_cli.assert_output('', None, 1)
+
+@pytest.mark.parametrize('args', [
+    ['-t', '0'],
+    ['-k', '0'],
+    ['-p', '1.5'],
+    ['-b', '1', '-t', '2'],
+    ['-T', '-w', '-1'],
+    ['-B', '0'],
+    ['-B', '2', '-k', '1']
+])
+def test_cli_text_sampling_error(mocker, mock_cli, args):
+    mock_cli(mocker)
+    statefile = os.path.join(mock_cli.dir, 'state.json')
+    datafile = os.path.join(mock_cli.dir, 'data.txt')
+    with open(datafile, 'wt') as fp:
+        fp.write('aa bb.')
+    mock_cli.run(main, ['text', 'create', '-o', statefile, datafile])
+    mock_cli.assert_output('', '')
+    mock_cli.run(main, ['text', 'generate'] + args + [statefile])
+    mock_cli.assert_output('', None, 1)
+
+@pytest.mark.parametrize('fname,output', [
+    ('state.json', None),
+    ('state.json', 'pruned.jsons'),
+    ('state.db', None),
+    ('state.db', 'pruned.db')
+])
+def test_cli_text_prune(mocker, mock_cli, fname, output):
+    mock_cli(mocker)
+
+    statefile = os.path.join(mock_cli.dir, fname)
+    datafile = os.path.join(mock_cli.dir, 'data.txt')
+    with open(datafile, 'wt') as fp:
+        fp.write('aa bb.\naa bb.\naa cc.\ndd ee.')
+
+    mock_cli.run(main, ['text', 'create', '-o', statefile, datafile])
+    cmd = ['text', 'prune', '-m', '2']
+    if output is not None:
+        output = os.path.join(mock_cli.dir, output)
+        cmd.extend(('-o', output))
+    else:
+        output = statefile
+    cmd.append(statefile)
+    mock_cli.run(main, cmd)
+    out = mock_cli.stdout.getvalue().splitlines()
+    assert out[:3] == [
+        'states: 7 -> 4',
+        'links: 9 -> 4',
+        'count: 16 -> 11'
+    ]
+    assert out[3].startswith('size: ')
+    assert out[4] == 'distance: 0.312500'
+    mock_cli.reset()
+
+    mock_cli.run(main, ['text', 'generate', '-c', '2', output])
+    mock_cli.assert_output('Aa bb.\nAa bb.\n', '')
+
+class Crash(Exception):
+    pass
+
+def read_state(fname):
+    if fname.endswith('.db'):
+        db = sqlite3.connect(fname)
+        try:
+            return db.execute(
+                'SELECT datasets.key, nodes.value, tokens.value, count'
+                ' FROM links'
+                ' JOIN datasets ON datasets.id = links.dataset'
+                ' JOIN nodes ON nodes.id = links.source'
+                ' JOIN tokens ON tokens.id = links.token'
+                ' ORDER BY 1, 2, 3'
+            ).fetchall()
+        finally:
+            db.close()
+    storage = load_json(fname)
+    try:
+        storage.load_datasets()
+        return storage
+    finally:
+        storage.close()
+
+@pytest.mark.parametrize('fname', [
+    'state.json', 'state.json.bz2', 'state.jsons', 'state.db'
+])
+@pytest.mark.parametrize('command,crash', [
+    ('create', 1), ('create', 4), ('update', 2)
+])
+def test_cli_text_checkpoint(mocker, mock_cli, fname, command, crash):
+    mock_cli(mocker)
+
+    datafiles = []
+    for i, data in enumerate(['aa bb\ncc. dd\nee ff', 'gg.\nhh ii. jj\n']):
+        datafile = os.path.join(mock_cli.dir, 'data%d.txt' % i)
+        with open(datafile, 'wt') as fp:
+            fp.write(data)
+        datafiles.append(datafile)
+    expected = os.path.join(mock_cli.dir, 'expected' + fname[5:])
+    statefile = os.path.join(mock_cli.dir, fname)
+
+    if command == 'create':
+        cmd = ['text', 'create']
+        mock_cli.run(main, cmd + ['-o', expected] + datafiles)
+        cmd.extend(('--checkpoint', '1', '-o', statefile))
+    else:
+        for fname_ in (expected, statefile):
+            mock_cli.run(main, ['text', 'create', '-o', fname_,
+                                datafiles[1]])
+            mock_cli.run(main, ['text', 'update', fname_] + datafiles)
+        mock_cli.run(main, ['text', 'create', '-o', statefile,
+                            datafiles[1]])
+        cmd = ['text', 'update', '--checkpoint', '1', statefile]
+    mock_cli.assert_output('', '')
+
+    save = Checkpoint.save
+    positions = []
+    def save_crash(self, position):
+        positions.append(position)
+        if len(positions) == crash + 1:
+            self.markov.close()
+            raise Crash()
+        save(self, position)
+
+    mocker.patch.object(Checkpoint, 'save', save_crash)
+    with pytest.raises(Crash):
+        mock_cli.run(main, cmd + datafiles)
+
+    mock_cli.run(main, cmd + datafiles[::-1] + ['--resume'])
+    mock_cli.assert_output('', None, 1)
+    mock_cli.reset()
+    if command == 'update':
+        mock_cli.run(main, ['text', 'update', statefile] + datafiles)
+        mock_cli.assert_output('', None, 1)
+        mock_cli.reset()
+
+    mock_cli.run(main, cmd + datafiles + ['--resume'])
+    mock_cli.assert_output('', '')
+    assert read_state(statefile) == read_state(expected)
+
+@pytest.mark.parametrize('crash', [1, 2, 4])
+def test_cli_text_checkpoint_bulk(mocker, mock_cli, crash):
+    mock_cli(mocker)
+    datafile = os.path.join(mock_cli.dir, 'data.txt')
+    statefile = os.path.join(mock_cli.dir, 'state.db')
+    expected = os.path.join(mock_cli.dir, 'expected.db')
+    with open(datafile, 'wt') as fp:
+        fp.write('aa bb.\naa bb.\ncc aa.\naa bb cc.\naa dd.\n')
+    mock_cli.run(main, ['text', 'create', '-o', expected, datafile])
+
+    begin_bulk = SqliteStorage.begin_bulk
+    def begin_bulk_flush(self):
+        self.bulk_size = 1
+        begin_bulk(self)
+
+    save = Checkpoint.save
+    positions = []
+    def save_crash(self, position):
+        positions.append(position)
+        if len(positions) == crash + 1:
+            assert self.markov.storage.bulk_journal
+            self.markov.close()
+            raise Crash()
+        save(self, position)
+
+    mocker.patch.object(SqliteStorage, 'begin_bulk', begin_bulk_flush)
+    mocker.patch.object(Checkpoint, 'save', save_crash)
+    end_bulk = mocker.spy(SqliteStorage, 'end_bulk')
+    cmd = ['text', 'create', '--checkpoint', '1', '-o', statefile, datafile]
+    with pytest.raises(Crash):
+        mock_cli.run(main, cmd)
+    assert end_bulk.call_count == 0
+
+    mock_cli.run(main, cmd + ['--resume'])
+    mock_cli.assert_output('', '')
+    assert end_bulk.call_count == 1
+    assert read_state(statefile) == read_state(expected)
+    assert ('_ss1', 'aa', 'bb', 3) in read_state(statefile)
+
+@pytest.mark.parametrize('args', [
+    ['text', 'create', '--checkpoint', '1', 'data.txt'],
+    ['text', 'create', '--checkpoint', '0', '-o', 'state.json', 'data.txt'],
+    ['text', 'create', '--resume', '-o', 'state.json', 'data.txt'],
+    ['text', 'update', '-L', '--checkpoint', '1', 'state.json', 'data.txt']
+])
+def test_cli_text_checkpoint_error(mocker, mock_cli, args):
+    mock_cli(mocker)
+    datafile = os.path.join(mock_cli.dir, 'data.txt')
+    statefile = os.path.join(mock_cli.dir, 'state.json')
+    with open(datafile, 'wt') as fp:
+        fp.write('aa bb')
+    mock_cli.run(main, ['text', 'create', '-o', statefile, datafile])
+    args = [os.path.join(mock_cli.dir, arg) if '.' in arg else arg
+            for arg in args]
+    mock_cli.run(main, args)
+    mock_cli.assert_output('', None, 1)
@@ -8,8 +8,9 @@ import sys
 import pytest
 
 from markovchain import JsonStorage, SqliteStorage
+from markovchain.cli import util as cli_util
 from markovchain.cli.util import (
-    no_tqdm, NoProgressBar,
+    tqdm, no_tqdm, NoProgressBar,
     pprint, load, save,
     set_args, JSON, SQLITE,
     check_output_format,
@@ -42,6 +43,17 @@ def test_no_tqdm(mocker):
     no_pbar.assert_not_called()
     no_pbar.print_warning.assert_called_with()
 
+def test_tqdm_import_error(mocker):
+    mocker.patch.object(cli_util, 'TQDM', None)
+    mocker.patch.object(cli_util, 'TQDM_IMPORT_ERROR', None)
+    mocker.patch.dict(sys.modules, {'tqdm': None})
+    no_pbar = mocker.patch('markovchain.cli.util.NoProgressBar')
+    iterable = range(3)
+    assert tqdm(iterable) is iterable
+    assert isinstance(cli_util.TQDM_IMPORT_ERROR, ImportError)
+    assert cli_util.TQDM is no_tqdm
+    no_pbar.print_warning.assert_called_with()
+
 
 @pytest.mark.parametrize('test', [
     {'x': 0, 'y': [{'z': '0'}, {'z': '1'}]},
@@ -100,7 +112,7 @@ def test_load_json(mocker, fname, bz2, stdout):
 def test_load_sqlite(mocker):
     sqlite_storage = MagicMock()
     sqlite_storage_cls = mocker.patch(
-        'markovchain.cli.util.SqliteStorage',
+        'markovchain.storage.sqlite.SqliteStorage',
         load=Mock(return_value=sqlite_storage)
     )
     fname = 'test'
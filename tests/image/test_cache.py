@@ -0,0 +1,54 @@
+import os
+import pytest
+from PIL import Image
+
+from markovchain.image import MarkovImage, ImageScanner, LevelCache
+from markovchain.image.type import RGB
+
+
+def write_image(fname, color):
+    img = Image.new('RGB', (8, 8), color)
+    img.save(fname)
+    return fname
+
+def test_level_cache(tmpdir):
+    cache = LevelCache(os.path.join(str(tmpdir), 'cache'))
+    fname = write_image(os.path.join(str(tmpdir), 'img.png'), (10, 20, 30))
+    markov = MarkovImage(
+        levels=2,
+        imgtype=RGB(),
+        scanner=ImageScanner(levels=2, level_scale=2)
+    )
+    key = cache.key(fname, markov)
+    assert cache.get(key) is None
+    pyramids = markov.pyramids(Image.open(fname))
+    cache.put(key, pyramids)
+    res = cache.get(key)
+    assert [[(img.mode, img.size, img.tobytes()) for img in levels]
+            for levels in res] == \
+           [[(img.mode, img.size, img.tobytes()) for img in levels]
+            for levels in pyramids]
+    assert cache.size() == os.path.getsize(cache.path(key))
+
+    markov.scanner.level_scale = 4
+    assert cache.key(fname, markov) != key
+    markov.scanner.level_scale = 2
+    write_image(fname, (10, 20, 31))
+    assert cache.key(fname, markov) != key
+
+def test_level_cache_evict(tmpdir):
+    cache = LevelCache(str(tmpdir))
+    pyramids = [[Image.frombytes('L', (16, 16), os.urandom(256))]]
+    for i, key in enumerate('abc'):
+        cache.put(key, pyramids)
+        os.utime(cache.path(key), (i, i))
+    size = os.path.getsize(cache.path('a'))
+    cache.max_size = 2 * size
+    assert cache.get('a') is not None
+    cache.evict()
+    assert not os.path.exists(cache.path('b'))
+    assert os.path.exists(cache.path('a'))
+    assert os.path.exists(cache.path('c'))
+    cache.max_size = 0
+    cache.evict()
+    assert cache.size() == 0
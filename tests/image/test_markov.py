@@ -137,3 +137,62 @@ def test_markov_image_get_settings_json(mocker):
 ])
 def test_markov_image_eq(test, test2, res):
     assert (MarkovImage(*test) == MarkovImage(*test2)) == res
+
+@pytest.mark.parametrize('args,kwargs,res,nstrips', [
+    ((2, 2), {'levels': 1}, [0, 1, 2, 3], 1),
+    (
+        (2, 2),
+        {},
+        [
+            0, 2, 1, 3,
+            1, 3, 2, 0,
+            2, 0, 3, 1,
+            3, 1, 0, 2
+        ],
+        2
+    ),
+    (
+        (None, None),
+        {'levels': 1, 'start_level': 0, 'start_image': True},
+        [1, 3, 2, 0],
+        1
+    ),
+    (
+        (None, None),
+        {'levels': 1, 'start_level': 2, 'start_image': True},
+        [1],
+        1
+    )
+])
+def test_markov_image_strips(args, kwargs, res, nstrips):
+    scanner = Scanner(lambda x: x)
+    scanner.traversal = [HLines(), VLines()]
+    scanner.levels = 2
+    scanner.level_scale = [2]
+
+    markov = MarkovImage(levels=2, scanner=scanner)
+    markov.imgtype.convert = lambda x: [x]
+    markov.data([
+        ['\x00', '\x01', '\x02', '\x03'],
+        [(Scanner.START, '\x00'), '\x01',
+         (Scanner.START, '\x01'), '\x02',
+         (Scanner.START, '\x02'), '\x03',
+         (Scanner.START, '\x03'), '\x00']
+    ])
+
+    if 'start_image' in kwargs:
+        img = Image.new('P', (1, 1))
+        img.putpixel((0, 0), 1)
+        kwargs['start_image'] = img
+
+    width, height, strips = markov.strips(*args, **kwargs)
+    strips = list(strips)
+    assert len(strips) == nstrips
+    img = Image.new('P', (width, height))
+    y = 0
+    for strip in strips:
+        assert strip.size[0] == width
+        img.paste(strip, (0, y))
+        y += strip.size[1]
+    assert y == height
+    assert list(img.getdata()) == res
@@ -0,0 +1,52 @@
+import os
+from io import BytesIO
+import pytest
+from PIL import Image
+
+from markovchain.image.png import PngWriter
+from markovchain.image.util import palette
+
+
+@pytest.mark.parametrize('mode,size,rows', [
+    ('L', (7, 5), [2, 2, 1]),
+    ('RGB', (3, 4), [4]),
+    ('P', (16, 3), [1, 1, 1])
+])
+def test_png_writer(mocker, mode, size, rows):
+    mocker.patch.object(PngWriter, 'CHUNK_SIZE', 8)
+    width, height = size
+    bpp = len(mode) if mode == 'RGB' else 1
+    img = Image.frombytes(mode, size, os.urandom(width * height * bpp))
+    pal = None
+    if mode == 'P':
+        pal = palette(8, 4, 8)
+        img.putpalette(pal)
+    fp = BytesIO()
+    with PngWriter(fp, width, height, mode, pal) as png:
+        y = 0
+        for strip_height in rows:
+            png.write(img.crop((0, y, width, y + strip_height)))
+            y += strip_height
+    fp.seek(0)
+    res = Image.open(fp)
+    assert res.mode == mode
+    assert res.size == size
+    assert res.tobytes() == img.tobytes()
+    if mode == 'P':
+        assert res.getpalette()[:len(pal)] == pal
+
+def test_png_writer_error():
+    with pytest.raises(ValueError):
+        PngWriter(BytesIO(), 1, 1, 'RGBA')
+    with pytest.raises(ValueError):
+        PngWriter(BytesIO(), 1, 1, 'P')
+    png = PngWriter(BytesIO(), 2, 2, 'L')
+    with pytest.raises(ValueError):
+        png.write(Image.new('RGB', (2, 1)))
+    with pytest.raises(ValueError):
+        png.write(Image.new('L', (1, 1)))
+    with pytest.raises(ValueError):
+        png.write(Image.new('L', (2, 3)))
+    png.write(Image.new('L', (2, 1)))
+    with pytest.raises(ValueError):
+        png.close()
@@ -2,7 +2,10 @@ import pytest
 from PIL import Image
 
 from markovchain import Scanner
-from markovchain.image import ImageScanner, HLines, VLines
+from markovchain.image import (
+    ImageScanner, HLines, VLines, Spiral, Hilbert, Blocks
+)
+from markovchain.image.type import RGB
 
 
 @pytest.fixture(scope='module')
@@ -106,6 +109,20 @@ def test_image_scanner_input_level_scale():
     size = [scan.level(img, level).size for level in range(scan.levels)]
     assert size == [(2, 2), (4, 4), (12, 12), (48, 48)]
 
+@pytest.mark.parametrize('size,level_scale', [
+    ((48, 48), [2, 3, 4]),
+    ((50, 37), [2, 3]),
+    ((7, 9), [])
+])
+def test_image_scanner_pyramid(size, level_scale):
+    img = Image.new(mode='RGB', size=size)
+    scan = ImageScanner(levels=len(level_scale) + 1, level_scale=level_scale)
+    pyramid = scan.pyramid(img)
+    assert pyramid[-1] is img
+    assert [x.size for x in pyramid] == [
+        scan.level(img, level).size for level in range(scan.levels)
+    ]
+
 def test_image_scanner_scan(image_test):
     scan = ImageScanner(traversal=HLines())
     assert [list(level) for level in scan(image_test)] == [
@@ -130,6 +147,32 @@ def test_image_scanner_scan_levels(image_test):
         ]
     ]
 
+@pytest.mark.parametrize('fused', [True, False])
+@pytest.mark.parametrize('size,kwargs', [
+    ((5, 3), {}),
+    ((16, 16), {'levels': 3, 'level_scale': 2,
+                'traversal': [HLines(), VLines(), Spiral()]}),
+    ((19, 14), {'levels': 2, 'level_scale': 4,
+                'traversal': [HLines(line_sentences=True), Hilbert()]}),
+    ((18, 9), {'levels': 2, 'level_scale': 3,
+               'traversal': [Blocks((2, 2), True),
+                             HLines(reverse=2, line_sentences=True)]})
+])
+def test_image_scanner_scan_channels(mocker, fused, size, kwargs):
+    if fused:
+        pytest.importorskip('numpy')
+    mocker.patch.object(ImageScanner, 'fused', fused)
+    img = Image.new('RGB', size)
+    img.putdata([(i % 7, i % 256, (i * 31) % 256)
+                 for i in range(size[0] * size[1])])
+    scan = ImageScanner(**kwargs)
+    channels = RGB().convert(img)
+    res = [[list(level) for level in levels]
+           for levels in scan.scan_channels(channels)]
+    assert res == [[list(level) for level in scan(channel)]
+                   for channel in channels]
+    assert res[0] != res[1]
+
 @pytest.mark.parametrize('test', [
     (),
     ((4, 4), 2, 2, 'NEAREST', [HLines(), VLines()])
@@ -0,0 +1,91 @@
+import random
+import pytest
+
+from markovchain import JsonStorage, SharedStorage, SqliteStorage
+from markovchain.storage import BackoffIndex
+
+
+def add_links(storage, data, state_sizes):
+    links = []
+    for key, tokens in data:
+        for size in state_sizes:
+            state = [''] * size
+            for token in tokens + [None]:
+                links.append((key + '_%d' % size, tuple(state), token))
+                state = state[1:] + [token]
+    storage.add_links(links)
+    return storage
+
+def json_storage(*args):
+    return add_links(JsonStorage(), *args)
+
+def sqlite_storage(*args):
+    return add_links(SqliteStorage(), *args)
+
+def shared_storage(*args):
+    return SharedStorage(SharedStorage.dump(json_storage(*args)))
+
+
+@pytest.fixture
+def index(mocker):
+    mocker.patch('markovchain.storage.backoff.state_size_dataset',
+                 wraps=lambda ss: '_%d' % ss)
+    storage = json_storage([
+        ('', ['x', 'y', 'z']),
+        ('', ['y', 'x', 'y', 'x']),
+        ('', ['z', 'y', 'y'])
+    ], [1, 2])
+    return BackoffIndex(storage, [2, 1, 3])
+
+@pytest.mark.parametrize('state,min_links,res', [
+    (['', ''], 1, ([1, 2, 3], ['x', 'y', 'z'])),
+    (['', 'x'], 1, ([1], ['y'])),
+    (['', 'x'], 2, ([2, 3], ['y', None])),
+    (['', 'x'], 3, ([1], ['y'])),
+    (['z', 'x'], 1, ([2, 3], ['y', None])),
+    (['x', 'y'], 1, ([1, 2], ['z', 'x'])),
+    (['q', 'y'], 2, ([1, 3, 4, 5], ['z', 'x', 'y', None])),
+    (['y', 'q'], 1, None)
+])
+def test_backoff_index_find(index, state, min_links, res):
+    assert index.state_sizes == [1, 2, 3]
+    assert index.state_size == 3
+    assert index.find(state, min_links) == res
+
+def test_backoff_index_generate(index):
+    random.seed(0)
+    for _ in range(10):
+        res = list(index(['x', 'y', 'y'], 2))
+        assert res[-1:] != ['']
+        assert all(token in 'xyz' for token in res)
+    assert list(index('q')) == []
+
+@pytest.mark.parametrize('storage', [
+    json_storage, sqlite_storage, shared_storage
+])
+def test_backoff_index_storage(mocker, storage):
+    mocker.patch('markovchain.storage.backoff.state_size_dataset',
+                 wraps=lambda ss: '_%d' % ss)
+    data = [
+        ('0', ['x', 'y', 'z']),
+        ('0', ['y', 'x', 'y', 'x']),
+        ('0', ['z', 'y', 'y', 'z', 'x'])
+    ]
+    storage = storage(data, [1, 2])
+    index = BackoffIndex(storage, [2], '0')
+    for seed in range(10):
+        random.seed(seed)
+        res = list(index())
+        random.seed(seed)
+        assert res == list(storage.generate((), 2, '0_2'))
+
+def test_backoff_index_separator(mocker):
+    mocker.patch('markovchain.storage.backoff.state_size_dataset',
+                 wraps=lambda ss: '_%d' % ss)
+    storage = JsonStorage(settings={'storage': {'state_separator': ''}})
+    add_links(storage, [('', ['x', 'y'])], [1, 2])
+    index = BackoffIndex(storage, [1, 2])
+    assert index.find(['', 'x']) == ([1], ['y'])
+    assert index.find(['q', 'x']) == ([1], ['y'])
+    assert index.find(['x', 'y']) == ([1], [None])
+    assert list(index()) == ['x', 'y']
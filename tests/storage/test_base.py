@@ -19,6 +19,8 @@ class StorageTest(Storage):
         pass
     def follow_link(self, link, state, backward=False):
         pass
+    def do_prune(self, prune_state):
+        pass
     def do_save(self, fp=None):
         pass
     def close(self):
@@ -128,6 +130,29 @@ def test_storage_base_generate(state, backward):
         call(2, 'state2', backward)
     ])
 
+def test_storage_base_generator():
+    storage = StorageTest()
+    storage.get_dataset = Mock(side_effect=[2, 3])
+    storage.get_state = Mock(side_effect=[1, 4, 5])
+    storage.do_generate = Mock(return_value=0)
+
+    generator = storage.generator('data', 4, True)
+    assert storage.generator('data', 4, True) is generator
+    assert storage.generator('data', 4) is not generator
+
+    assert generator('x') == 0
+    assert generator('x') == 0
+    assert generator(['x']) == 0
+    storage.get_dataset.assert_called_once_with('data')
+    assert storage.get_state.call_count == 2
+    storage.do_generate.assert_has_calls([
+        call(2, 1, True), call(2, 1, True), call(2, 4, True)
+    ])
+
+    storage.state_separator = '+'
+    assert generator('x') == 0
+    storage.do_generate.assert_called_with(3, 5, True)
+
 def test_storage_base_save():
     storage = StorageTest()
     storage.do_save = Mock()
@@ -135,3 +160,21 @@ def test_storage_base_save():
     storage.save(0)
     assert storage.settings['storage']['state_separator'] == '+'
     storage.do_save.assert_called_once_with(0)
+
+@pytest.mark.parametrize('args,res', [
+    (([3, 1, 2],), [3, 1, 2]),
+    (([3, 1, 2], 2), [3, 0, 2]),
+    (([3, 1, 2], 4), [0, 0, 0]),
+    (([1, 3, 1, 2], 1, 2), [0, 3, 0, 2]),
+    (([1, 1, 1], 1, 2), [1, 1, 0]),
+    (([1000, 10, 1], 1, None, 8), [255, 3, 1]),
+    (([200, 10, 1], 1, None, 8), [200, 10, 1]),
+    (([70000, 2, 1], 2, 1, 16), [65535, 0, 0])
+])
+def test_storage_base_prune_counts(args, res):
+    assert Storage.prune_counts(*args) == res
+
+@pytest.mark.parametrize('args', [(0,), (1, 0), (1, None, 0)])
+def test_storage_base_prune_error(args):
+    with pytest.raises(ValueError):
+        StorageTest().prune(*args)
@@ -0,0 +1,98 @@
+from math import log
+import pytest
+
+from markovchain import JsonStorage, TrieStorage, SharedStorage
+from markovchain.storage import BeamSearch
+from markovchain.storage.sqlite import SqliteStorage
+
+
+LINKS = [
+    ('0', ('', ''), 'x'),
+    ('0', ('', ''), 'x'),
+    ('0', ('', ''), 'x'),
+    ('0', ('', ''), 'y'),
+    ('0', ('', ''), 'y'),
+    ('0', ('', 'x'), 'y'),
+    ('0', ('', 'x'), 'z'),
+    ('0', ('x', 'y'), None),
+    ('0', ('x', 'z'), 'w'),
+    ('0', ('z', 'w'), None),
+    ('0', ('', 'y'), None),
+    ('0', ('', 'y'), 'y'),
+    ('0', ('y', 'y'), 'y')
+]
+
+
+def storages():
+    json = JsonStorage(backward=True)
+    json.add_links(LINKS)
+    trie = TrieStorage(backward=True)
+    trie.add_links(LINKS)
+    sqlite = SqliteStorage(db=':memory:')
+    sqlite.add_links(LINKS)
+    return [json, trie, sqlite, SharedStorage(SharedStorage.dump(json))]
+
+def search(beam, state=(), backward=False, max_length=None):
+    ret = []
+    for storage in storages():
+        try:
+            ret.append(beam.search(storage, storage.get_dataset('0'),
+                                   storage.get_state(state, 2),
+                                   backward, max_length))
+        finally:
+            storage.close()
+    assert all(res == ret[0] for res in ret)
+    return ret[0]
+
+
+@pytest.mark.parametrize('args', [
+    (0,), (1, -1), (1, 1, -1)
+])
+def test_beam_search_error(args):
+    with pytest.raises(ValueError):
+        BeamSearch(*args)
+
+@pytest.mark.parametrize('alpha,res', [
+    (0, [
+        (log(0.3), ['x', 'y']),
+        (log(0.3), ['x', 'z', 'w']),
+        (log(0.2), ['y'])
+    ]),
+    (1, [
+        (log(0.3) / 4, ['x', 'z', 'w']),
+        (log(0.3) / 3, ['x', 'y']),
+        (log(0.2) / 2, ['y'])
+    ])
+])
+def test_beam_search(alpha, res):
+    test = search(BeamSearch(4, alpha))
+    assert [seq for _, seq in test] == [seq for _, seq in res]
+    assert [score for score, _ in test] == pytest.approx(
+        [score for score, _ in res]
+    )
+
+@pytest.mark.parametrize('args,kwargs,res', [
+    ((1, 0), {}, [['x', 'y']]),
+    ((2, 0, 1), {}, [['y']]),
+    ((2, 0, 1), {'max_length': 0}, [[]]),
+    ((2, 0), {'state': ('', 'q')}, [[]]),
+    ((2, 0), {'state': ('y', 'y'), 'max_length': 3}, [['y', 'y', 'y']]),
+    ((2, 0), {'state': ('z', 'w'), 'backward': True}, [['x']])
+])
+def test_beam_search_length(args, kwargs, res):
+    assert [seq for _, seq in search(BeamSearch(*args), **kwargs)] == res
+
+def test_beam_search_cache(mocker):
+    storage = JsonStorage()
+    storage.add_links(LINKS)
+    get_links = mocker.patch.object(storage, 'get_links',
+                                    wraps=storage.get_links)
+    beam = BeamSearch(4, 1)
+    for _ in range(3):
+        assert list(storage.generate((), 2, '0', False, beam)) == [
+            'x', 'z', 'w'
+        ]
+    assert get_links.call_count == 7
+    assert len(beam.cache) == 7
+    beam.clear()
+    assert beam.cache == {}
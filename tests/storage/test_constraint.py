@@ -0,0 +1,109 @@
+import random
+from itertools import islice
+from math import inf
+import pytest
+
+from markovchain import JsonStorage, TrieStorage, SharedStorage
+from markovchain.storage import Constraint
+from markovchain.storage.sqlite import SqliteStorage
+
+
+LINKS = [
+    ('0', ('', ''), 'x'),
+    ('0', ('', 'x'), 'y'),
+    ('0', ('', 'x'), 'z'),
+    ('0', ('x', 'y'), 'x'),
+    ('0', ('y', 'x'), 'y'),
+    ('0', ('x', 'z'), 'w'),
+    ('0', ('z', 'w'), None),
+    ('0', ('x', 'y'), None)
+] + [('0', ('y', 'x'), 'y')] * 10 + [('0', ('x', 'y'), 'x')] * 10
+
+
+def storages():
+    json = JsonStorage(backward=True)
+    json.add_links(LINKS)
+    trie = TrieStorage(backward=True)
+    trie.add_links(LINKS)
+    sqlite = SqliteStorage(db=':memory:')
+    sqlite.add_links(LINKS)
+    return [json, trie, sqlite, SharedStorage(SharedStorage.dump(json))]
+
+
+@pytest.mark.parametrize('args', [
+    (0,), (1, 0), (1, None, 2), (1, None, None, (), -1)
+])
+def test_constraint_error(args):
+    with pytest.raises(ValueError):
+        Constraint(*args)
+
+@pytest.mark.parametrize('forbidden,res', [
+    ((), ([3, 5, 6], [(3, 'x'), (2, 'z'), (1, 'y')])),
+    (('z',), ([3, 4], [(3, 'x'), (1, 'y')])),
+    (('x', 'y', 'z'), ([], []))
+])
+def test_constraint_links(forbidden, res):
+    constraint = Constraint(forbidden=forbidden)
+    assert constraint.links([(1, 'y'), (3, 'x'), (2, 'z')]) == res
+
+@pytest.mark.parametrize('state,forbidden,res', [
+    (('', ''), (), (2, [2], 2)),
+    (('', 'x'), (), (1, [1, 2], 2)),
+    (('x', 'y'), (), (0, [2, 0], 2)),
+    (('y', 'x'), (), (1, [1], 1)),
+    (('', ''), ('w',), (2, [2], 2)),
+    (('', ''), ('y',), (3, [3], 3)),
+    (('', ''), ('w', 'y'), (inf, [inf], inf)),
+    (('', 'q'), (), (inf, [], 0))
+])
+def test_constraint_distance(state, forbidden, res):
+    for storage in storages():
+        try:
+            constraint = Constraint(forbidden=forbidden)
+            data = storage.get_dataset('0')
+            test = constraint.distance(
+                storage, data, storage.get_state(state, 2)
+            )
+            assert test == res
+        finally:
+            storage.close()
+
+@pytest.mark.parametrize('args,res', [
+    ((), [['x', 'y', 'x', 'y'], ['x', 'z', 'w']]),
+    (((), 2), [['x', 'y']]),
+    (((), 3), [['x', 'y'], ['x', 'z', 'w']]),
+    ((('z',), 3), [['x', 'y']]),
+    ((('z',), 1), [['x']]),
+    ((('y',), 2), [['x', 'z']]),
+    ((('w', 'y'), None), [['x', 'z']])
+])
+def test_constraint_generate(args, res):
+    if args:
+        constraint = Constraint(1, None, None, *args)
+    else:
+        constraint = Constraint(top_k=1)
+    for storage in storages():
+        try:
+            for seed in range(10):
+                random.seed(seed)
+                test = storage.generate((), 2, '0', False, constraint)
+                assert list(islice(test, 4)) in res
+            constraint.clear()
+        finally:
+            storage.close()
+
+@pytest.mark.parametrize('max_length,res', [
+    (2, [['x']]),
+    (3, [['x'], ['x', 'y', 'x']])
+])
+def test_constraint_generate_backward(max_length, res):
+    constraint = Constraint(max_length=max_length)
+    for storage in storages():
+        try:
+            for seed in range(10):
+                random.seed(seed)
+                test = storage.generate(('y', 'x'), 2, '0', True, constraint)
+                assert list(test) in res
+            constraint.clear()
+        finally:
+            storage.close()
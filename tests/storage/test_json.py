@@ -1,8 +1,13 @@
-from io import StringIO
+import os
+import time
+import random
+from io import StringIO, BytesIO
 from collections import deque
+from threading import Thread
 import pytest
 
 from markovchain import JsonStorage
+from markovchain.storage import Storage
 
 
 def test_json_storage_empty():
@@ -202,6 +207,214 @@ def test_json_storage_save_load():
     loaded = JsonStorage.load(fp)
     assert storage == loaded
 
+@pytest.mark.parametrize('backward', [True, False])
+def test_json_storage_container(backward):
+    storage = JsonStorage(backward=backward, settings={'x': 'ю'})
+    storage.add_links([
+        ('0', ('x',), 'y'),
+        ('0', ('y',), 'ю'),
+        ('1', ('x',), 'y'),
+        ('1', ('x',), 'z')
+    ])
+    storage.container = True
+    fp = BytesIO()
+    storage.save(fp)
+    assert storage.settings['storage']['backward'] == backward
+    fp.seek(0)
+    loaded = JsonStorage.load(fp)
+    assert loaded.container
+    assert dict.__len__(loaded.nodes) == 0
+    assert len(loaded.nodes) == 2
+    assert '1' in loaded.nodes
+    assert loaded.get_dataset('1')[0] == {'x': [[1, 1], ['y', 'z']]}
+    assert dict.__len__(loaded.nodes) == 1
+    with pytest.raises(KeyError):
+        loaded.get_dataset('2')
+    assert loaded.settings == storage.settings
+    assert loaded == storage
+    assert dict.__len__(loaded.nodes) == 2
+
+def test_json_storage_container_file(tmpdir):
+    fname = os.path.join(str(tmpdir), 'test.jsons')
+    storage = JsonStorage(settings={'x': 1}, container=True)
+    storage.add_links([('0', ('x',), 'y'), ('1', ('x',), 'z')])
+    storage.save(fname)
+    assert JsonStorage.load_settings(fname) == storage.settings
+    loaded = JsonStorage.load(fname)
+    assert loaded.file is not None
+    loaded.add_links([('1', ('x',), 'y')])
+    loaded.save(fname)
+    loaded.close()
+    assert loaded.file is None
+    storage.add_links([('1', ('x',), 'y')])
+    loaded = JsonStorage.load(fname)
+    assert loaded == storage
+    loaded.close()
+
+class SlowFile:
+    def __init__(self, fp):
+        self.fp = fp
+
+    def seek(self, offset):
+        self.fp.seek(offset)
+        time.sleep(0.001)
+
+    def read(self, size):
+        return self.fp.read(size)
+
+def test_json_storage_container_threads(tmpdir):
+    fname = os.path.join(str(tmpdir), 'test.jsons')
+    storage = JsonStorage(container=True)
+    storage.add_links([(str(i), ('x',), 'y' * i) for i in range(1, 50)])
+    storage.save(fname)
+    loaded = JsonStorage.load(fname)
+    loaded.nodes.fp = SlowFile(loaded.nodes.fp)
+    errors = []
+    def get_datasets():
+        for i in range(1, 50):
+            try:
+                if loaded.get_dataset(str(i))[0] != {'x': [1, 'y' * i]}:
+                    errors.append(i)
+            except Exception as err: # pylint:disable=broad-except
+                errors.append(err)
+    threads = [Thread(target=get_datasets) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    loaded.close()
+    assert errors == []
+    assert loaded == storage
+
+@pytest.mark.parametrize('args,nodes,backward,stats', [
+    (
+        (1,),
+        {'x': [[3, 1], ['y', 'z']], 'y': [1, None], 'z': [2, 'x']},
+        {'y': [3, 'x'], 'z': [1, 'x'], 'x': [2, 'z']},
+        {'states': (3, 3), 'links': (4, 4), 'count': (7, 7),
+         'distance': 0.0}
+    ),
+    (
+        (2,),
+        {'x': [3, 'y'], 'z': [2, 'x']},
+        {'y': [3, 'x'], 'x': [2, 'z']},
+        {'states': (3, 2), 'links': (4, 2), 'count': (7, 5),
+         'distance': 2 / 7}
+    ),
+    (
+        (1, 1),
+        {'x': [3, 'y'], 'y': [1, None], 'z': [2, 'x']},
+        {'y': [3, 'x'], 'z': [1, 'x'], 'x': [2, 'z']},
+        {'states': (3, 3), 'links': (4, 3), 'count': (7, 6),
+         'distance': 1 / 7}
+    ),
+    (
+        (1, None, 1),
+        {'x': [[1, 1], ['y', 'z']], 'y': [1, None], 'z': [1, 'x']},
+        {'y': [1, 'x'], 'z': [1, 'x'], 'x': [1, 'z']},
+        {'states': (3, 3), 'links': (4, 4), 'count': (7, 4),
+         'distance': 1 / 7}
+    )
+])
+def test_json_storage_prune(args, nodes, backward, stats):
+    storage = JsonStorage(backward=True)
+    storage.add_links([
+        ('0', ('x',), 'y'),
+        ('0', ('x',), 'y'),
+        ('0', ('x',), 'z'),
+        ('0', ('x',), 'y'),
+        ('0', ('y',), None),
+        ('0', ('z',), 'x'),
+        ('0', ('z',), 'x')
+    ])
+    res = storage.prune(*args)
+    assert storage.nodes == {'0': nodes}
+    assert storage.backward == {'0': backward}
+    assert res == pytest.approx(stats)
+
+@pytest.mark.parametrize('state,size,backward', [
+    ((), 1, False),
+    (('x',), 1, False),
+    (('y',), 1, True),
+    ((), 2, False),
+    (('x', 'y'), 2, True)
+])
+def test_json_storage_generate(state, size, backward):
+    storage = JsonStorage(backward=True)
+    links = []
+    for tokens in (['x', 'y', 'z'], ['y', 'x', 'y', 'y'], ['z', 'z']):
+        src = [''] * size
+        for token in tokens + [None]:
+            links.append(('0', tuple(src), token))
+            src = src[1:] + [token]
+    storage.add_links(links)
+    data = storage.get_dataset('0')
+    for seed in range(10):
+        random.seed(seed)
+        res = list(storage.do_generate(data, storage.get_state(state, size),
+                                       backward))
+        random.seed(seed)
+        assert res == list(Storage.do_generate(
+            storage, data, storage.get_state(state, size), backward
+        ))
+
+def test_json_storage_generate_error():
+    storage = JsonStorage()
+    storage.add_links([('0', ('x',), 'y')])
+    with pytest.raises(ValueError):
+        list(storage.generate('x', 1, '0', True))
+
 def test_json_storage_close():
     storage = JsonStorage()
     storage.close()
+
+@pytest.mark.parametrize('backward', [True, False])
+def test_json_storage_log(backward):
+    links = [
+        [('0', ('x',), 'y'), ('0', ('y',), None), ('1', ('x',), 'y')],
+        [('0', ('x',), 'z'), ('0', ('x',), 'y'), ('1', ('x',), 'y')],
+        [('2', ('x', 'y'), 'z')]
+    ]
+    storage = JsonStorage(backward=backward)
+    expected = JsonStorage(backward=backward)
+    fp = StringIO()
+    for data in links:
+        expected.add_links(data)
+        delta = JsonStorage(backward=True)
+        delta.add_links(data)
+        delta.save_log(fp)
+    fp.seek(0)
+    storage.load_log(fp)
+    assert storage == expected
+
+def test_json_storage_log_error():
+    storage = JsonStorage()
+    with pytest.raises(ValueError):
+        storage.load_log(StringIO('[0, "0", "x", "y", 1]\n[0, "0"'))
+
+@pytest.mark.parametrize('test,chunk_size,res', [
+    ('{"settings": {"x": [1, 2]}, "nodes": {}}', 65536, {'x': [1, 2]}),
+    ('{"settings": {"x": [1, 2]}, "nodes": {}}', 2, {'x': [1, 2]}),
+    (' { "settings" : {}, "nodes": {}}', 1, {}),
+    ('{"nodes": {}, "settings": {"x": 1}}', 1, {'x': 1}),
+    ('{"nodes": {}}', 3, None),
+    ('{"settings": {"x": 1}}', 65536, {'x': 1})
+])
+def test_json_storage_load_settings(mocker, test, chunk_size, res):
+    mocker.patch.object(JsonStorage, 'SETTINGS_CHUNK_SIZE', chunk_size)
+    assert JsonStorage.load_settings(StringIO(test)) == res
+
+@pytest.mark.parametrize('backward', [True, False])
+def test_json_storage_add_link_counts(backward):
+    links = [
+        ('0', ('x', 'y'), 'z', 2),
+        ('0', ('y', 'z'), None, 1),
+        ('1', ('x', 'y'), 'z', 3),
+        ('0', ('x', 'y'), 'x', 1)
+    ]
+    storage = JsonStorage(backward=backward)
+    expected = JsonStorage(backward=backward)
+    storage.add_link_counts(links, 'p')
+    for dataset, src, dst, count in links:
+        expected.add_links([(dataset, src, dst)] * count, 'p')
+    assert storage == expected
@@ -0,0 +1,116 @@
+import random
+from collections import Counter
+import pytest
+
+from markovchain import JsonStorage, TrieStorage, SharedStorage
+from markovchain.storage import Sampling
+from markovchain.storage.sqlite import SqliteStorage
+
+
+LINKS = [
+    ('0', ('', ''), 'x'),
+    ('0', ('', ''), 'x'),
+    ('0', ('', ''), 'x'),
+    ('0', ('', ''), 'y'),
+    ('0', ('', ''), 'z'),
+    ('0', ('', ''), 'z'),
+    ('0', ('', 'x'), 'y'),
+    ('0', ('', 'y'), None),
+    ('0', ('', 'z'), None),
+    ('0', ('x', 'y'), None),
+    ('0', ('x', 'y'), 'x'),
+    ('0', ('x', 'y'), 'x'),
+    ('0', ('y', 'x'), None)
+]
+
+
+def json_storage():
+    storage = JsonStorage(backward=True)
+    storage.add_links(LINKS)
+    return storage
+
+def storages():
+    json = json_storage()
+    trie = TrieStorage(backward=True)
+    trie.add_links(LINKS)
+    sqlite = SqliteStorage(db=':memory:')
+    sqlite.add_links(LINKS)
+    return [json, trie, sqlite, SharedStorage(SharedStorage.dump(json))]
+
+
+@pytest.mark.parametrize('args', [
+    (0,), (-1,), (1, 0), (1, None, 0), (1, None, 1.5)
+])
+def test_sampling_error(args):
+    with pytest.raises(ValueError):
+        Sampling(*args)
+
+@pytest.mark.parametrize('args,res', [
+    ((), ([3, 5, 6], [(3, 'x'), (2, 'z'), (1, 'y')])),
+    ((1, 2), ([3, 5], [(3, 'x'), (2, 'z')])),
+    ((1, None, 0.5), ([3], [(3, 'x')])),
+    ((1, None, 0.6), ([3, 5], [(3, 'x'), (2, 'z')])),
+    ((1, None, 1), ([3, 5, 6], [(3, 'x'), (2, 'z'), (1, 'y')])),
+    ((1, 1, 1), ([3], [(3, 'x')])),
+    ((0.5,), ([1, 1 + 4 / 9, 1 + 5 / 9], [(3, 'x'), (2, 'z'), (1, 'y')])),
+    ((2, None, 0.5), (
+        [1, 1 + (2 / 3) ** 0.5], [(3, 'x'), (2, 'z')]
+    ))
+])
+def test_sampling_links(args, res):
+    sampling = Sampling(*args)
+    test = sampling.links([(1, 'y'), (3, 'x'), (2, 'z')])
+    assert test[0] == pytest.approx(res[0])
+    assert test[1] == res[1]
+    assert sampling.links([]) == ([], [])
+
+@pytest.mark.parametrize('args,res', [
+    ((1, 1), ['x', 'y', 'x']),
+    ((0.01,), ['x', 'y', 'x']),
+    ((1, None, 0.5), ['x', 'y', 'x'])
+])
+def test_sampling_generate(args, res):
+    sampling = Sampling(*args)
+    for storage in storages():
+        try:
+            test = storage.generate((), 2, '0', False, sampling)
+            assert list(test) == res
+        finally:
+            storage.close()
+
+def test_sampling_generate_backward():
+    sampling = Sampling(top_k=1)
+    for storage in storages():
+        try:
+            test = storage.generate(('y', 'x'), 2, '0', True, sampling)
+            assert list(test) == ['x']
+        finally:
+            storage.close()
+
+def test_sampling_distribution():
+    storage = json_storage()
+    sampling = Sampling(top_k=2)
+    random.seed(0)
+    counts = Counter(
+        next(storage.generate((), 2, '0', False, sampling))
+        for _ in range(1000)
+    )
+    assert set(counts) == {'x', 'z'}
+    assert 500 < counts['x'] < 700
+
+def test_sampling_cache(mocker):
+    storage = json_storage()
+    get_links = mocker.patch.object(storage, 'get_links',
+                                    wraps=storage.get_links)
+    sampling = Sampling(top_k=1)
+    for _ in range(3):
+        assert list(storage.generate((), 2, '0', False, sampling)) == [
+            'x', 'y', 'x'
+        ]
+    assert get_links.call_count == 4
+    assert len(sampling.cache) == 4
+    sampling.CACHE_SIZE = 2
+    sampling.clear()
+    list(storage.generate((), 2, '0', False, sampling))
+    assert len(sampling.cache) <= 2
+    assert get_links.call_count == 8
@@ -0,0 +1,169 @@
+import os
+import random
+from io import BytesIO
+from multiprocessing import get_context
+import pytest
+
+from markovchain import JsonStorage, SharedStorage
+
+
+LINKS = [
+    ('0', ('', 'x'), 'y'),
+    ('0', ('x', 'y'), 'z'),
+    ('0', ('x', 'y'), 'z'),
+    ('0', ('x', 'y'), 'x'),
+    ('0', ('y', 'z'), None),
+    ('0', ('y', 'x'), 'ю'),
+    ('0', ('x', 'ю'), None),
+    ('1', ('', 'x'), 'x'),
+    ('1', ('x', 'x'), None)
+]
+
+
+def json_storage(backward=True):
+    storage = JsonStorage(backward=backward, settings={'x': 'ю'})
+    storage.add_links(LINKS)
+    return storage
+
+def generate(storage, seed):
+    random.seed(seed)
+    return [
+        list(storage.generate(state, 2, dataset, backward))
+        for dataset, state, backward in [
+            ('0', ['x'], False),
+            ('0', ['x', 'y'], False),
+            ('0', ['y', 'z'], True),
+            ('1', [], False),
+            ('1', ['x', 'x'], True)
+        ]
+    ]
+
+def generate_shared(args):
+    name, seed = args
+    storage = SharedStorage.attach(name)
+    try:
+        return generate(storage, seed)
+    finally:
+        storage.close()
+
+def generate_file(args):
+    fname, seed = args
+    storage = SharedStorage.load(fname)
+    try:
+        return generate(storage, seed)
+    finally:
+        storage.close()
+
+
+@pytest.fixture
+def shared():
+    storage = SharedStorage(SharedStorage.dump(json_storage()))
+    yield storage
+    storage.close()
+
+
+def test_shared_storage_get_dataset(shared):
+    data = shared.get_dataset('0')
+    assert data[0] is not None
+    assert data[1] is not None
+    with pytest.raises(KeyError):
+        shared.get_dataset('2')
+    with pytest.raises(ValueError):
+        shared.get_dataset('2', True)
+
+@pytest.mark.parametrize('backward', [True, False])
+def test_shared_storage_get_links(backward):
+    storage = json_storage(backward)
+    shared = SharedStorage(SharedStorage.dump(storage))
+    directions = [False, True] if backward else [False]
+    for data in filter(None, (storage.nodes, storage.backward)):
+        for key, dataset in data.items():
+            for state in list(dataset) + ['q', 'x q']:
+                state = storage.split_state(state)
+                for direction in directions:
+                    assert (shared.get_links(shared.get_dataset(key),
+                                             state, direction)
+                            == storage.get_links(storage.get_dataset(key),
+                                                 state, direction))
+    if not backward:
+        with pytest.raises(ValueError):
+            shared.get_links(shared.get_dataset('0'), ['x', 'y'], True)
+    shared.close()
+
+@pytest.mark.parametrize('dataset,string,res', [
+    ('0', 'x', [' x', 'x y', 'x ю', 'y x']),
+    ('0', 'Ю', ['x ю']),
+    ('0', 'q', []),
+    ('1', 'x', [' x', 'x x'])
+])
+def test_shared_storage_get_states(shared, dataset, string, res):
+    assert sorted(shared.get_states(dataset, string)) == res
+
+def test_shared_storage_generate(shared):
+    for seed in range(10):
+        assert generate(shared, seed) == generate(json_storage(), seed)
+
+@pytest.mark.parametrize('method,args', [
+    ('add_links', ([('0', ('x', 'y'), 'z')],)),
+    ('add_link_counts', ([('0', ('x', 'y'), 'z', 1)],)),
+    ('prune', ()),
+    ('replace_state_separator', (' ', ':'))
+])
+def test_shared_storage_read_only(shared, method, args):
+    with pytest.raises(ValueError):
+        getattr(shared, method)(*args)
+
+def test_shared_storage_invalid():
+    with pytest.raises(ValueError):
+        SharedStorage(b'{"settings": {}, "nodes": {}}')
+
+def test_shared_storage_save_load(tmpdir, shared):
+    fp = BytesIO()
+    shared.settings['y'] = 1
+    shared.save(fp)
+    loaded = SharedStorage(fp.getvalue())
+    assert loaded == shared
+    assert loaded.settings['y'] == 1
+    assert loaded != SharedStorage(SharedStorage.dump(json_storage(False)))
+
+    fname = os.path.join(str(tmpdir), 'test.shm')
+    shared.save(fname)
+    loaded = SharedStorage.load(fname)
+    assert loaded == shared
+    assert loaded.name is None
+    assert generate(loaded, 0) == generate(shared, 0)
+    loaded.close()
+    assert loaded.handle is None
+    loaded.close()
+
+def test_shared_storage_create_attach():
+    storage = SharedStorage.create(json_storage())
+    name = storage.name
+    attached = SharedStorage.attach(name)
+    assert attached == storage
+    assert attached.name == name
+    attached.close()
+    assert generate(storage, 0) == generate(json_storage(), 0)
+    storage.close()
+    with pytest.raises(FileNotFoundError):
+        SharedStorage.attach(name)
+
+@pytest.mark.parametrize('source', ['shared', 'file'])
+def test_shared_storage_processes(tmpdir, source):
+    seeds = list(range(8))
+    expected = [generate(json_storage(), seed) for seed in seeds]
+    if source == 'shared':
+        storage = SharedStorage.create(json_storage())
+        func = generate_shared
+        name = storage.name
+    else:
+        storage = SharedStorage(SharedStorage.dump(json_storage()))
+        func = generate_file
+        name = os.path.join(str(tmpdir), 'test.shm')
+        storage.save(name)
+    try:
+        with get_context('spawn').Pool(4) as pool:
+            res = pool.map(func, [(name, seed) for seed in seeds])
+    finally:
+        storage.close()
+    assert res == expected
@@ -1,4 +1,5 @@
 import os
+import sqlite3
 import pytest
 
 from markovchain import SqliteStorage
@@ -14,7 +15,9 @@ def get_datasets(cursor):
 
 def get_links(cursor, source):
     cursor.execute(
-        'SELECT dataset, value, count FROM links WHERE source=?',
+        'SELECT links.dataset, tokens.value, links.count'
+        ' FROM links LEFT JOIN tokens ON tokens.id = links.token'
+        ' WHERE links.source=?',
         (source,)
     )
     return cursor.fetchall()
@@ -27,7 +30,9 @@ def test_sqlite_storage_empty():
     assert 'main' in tables
     assert 'nodes' in tables
     assert 'links' in tables
+    assert 'tokens' in tables
     assert 'datasets' in tables
+    assert storage.get_version() == SqliteStorage.VERSION
 
 def test_sqlite_storage_get_dataset():
     storage = SqliteStorage()
@@ -144,3 +149,160 @@ def test_sqlite_storage_close(tmpdir):
 
     loaded = SqliteStorage.load(db)
     assert nodes == get_nodes(loaded.cursor)
+
+def get_indexes(cursor):
+    cursor.execute('SELECT name FROM sqlite_master WHERE type="index"')
+    return set(x[0] for x in cursor.fetchall())
+
+@pytest.mark.parametrize('bulk_size', [1, 2, 100])
+def test_sqlite_storage_bulk(bulk_size):
+    storage = SqliteStorage()
+    storage.add_links([('0', ('x',), 'y')])
+    storage.begin_bulk()
+    storage.bulk_size = bulk_size
+    assert storage.bulk
+    assert not get_indexes(storage.cursor) & {'node', 'token', 'link_target'}
+    storage.add_links([
+        ('0', ('x',), 'y'),
+        ('0', ('x',), 'z'),
+        ('0', ('y',), 'z'),
+        ('1', ('x',), 'y'),
+        ('0', ('x',), 'z')
+    ])
+    storage.end_bulk()
+    assert not storage.bulk
+    assert {'node', 'token', 'link_target'} <= get_indexes(storage.cursor)
+    assert 'links_bulk' not in storage.get_tables()
+    assert get_nodes(storage.cursor) == [(1, 'x'), (2, 'y'), (3, 'z')]
+    assert sorted(get_links(storage.cursor, 1)) == [
+        (1, 'y', 2), (1, 'z', 2), (2, 'y', 1)
+    ]
+    assert storage.get_links(1, 1) == [(2, 'y', 2), (2, 'z', 3)]
+
+def test_sqlite_storage_bulk_save(tmpdir):
+    db = os.path.join(str(tmpdir), 'test.db')
+    storage = SqliteStorage(db=db, bulk=True)
+    storage.add_links([('0', ('x', 'y'), 'z'), ('0', ('x', 'y'), 'z')])
+    storage.save()
+    assert not storage.bulk
+    storage.cursor.execute('PRAGMA journal_mode')
+    assert storage.cursor.fetchone() == ('delete',)
+    loaded = SqliteStorage.load(db)
+    assert get_links(loaded.cursor, 1) == [(1, 'z', 2)]
+
+@pytest.mark.parametrize('bulk_journal,journal_mode,res', [
+    (False, 'off', 1), (True, 'delete', 2)
+])
+def test_sqlite_storage_bulk_resume(tmpdir, bulk_journal, journal_mode, res):
+    db = os.path.join(str(tmpdir), 'test.db')
+    storage = SqliteStorage(db=db, bulk=True, bulk_journal=bulk_journal)
+    storage.bulk_size = 1
+    storage.add_links([('0', ('x', 'y'), 'z')])
+    if bulk_journal:
+        storage.settings['checkpoint'] = 1
+        storage.commit_bulk()
+        assert 'links_bulk' in storage.get_tables()
+        assert not get_indexes(storage.cursor) & {'node', 'token'}
+        storage.add_links([('0', ('x', 'y'), 'z')])
+    storage.close()
+    storage = SqliteStorage.load(db)
+    if bulk_journal:
+        assert storage.settings['checkpoint'] == 1
+    storage.bulk_journal = bulk_journal
+    storage.begin_bulk()
+    storage.cursor.execute('PRAGMA journal_mode')
+    assert storage.cursor.fetchone() == (journal_mode,)
+    storage.add_links([('0', ('x', 'y'), 'z')])
+    storage.settings['key'] = 'value'
+    storage.save()
+    loaded = SqliteStorage.load(db)
+    assert loaded.settings['key'] == 'value'
+    assert get_links(loaded.cursor, 1) == [(1, 'z', res)]
+
+def test_sqlite_storage_migrate(tmpdir):
+    db = os.path.join(str(tmpdir), 'test.db')
+    storage = SqliteStorage(db=db)
+    storage.close()
+    db = sqlite3.connect(db)
+    db.executescript('''
+        DROP TABLE links;
+        DROP TABLE tokens;
+        PRAGMA user_version=0;
+        CREATE TABLE links (
+            dataset INTEGER REFERENCES datasets (id),
+            source INTEGER REFERENCES nodes (id),
+            target INTEGER REFERENCES nodes (id),
+            value TEXT,
+            bvalue TEXT,
+            count INTEGER NOT NULL DEFAULT 1
+        );
+        CREATE INDEX link_source ON links (source, dataset);
+        CREATE INDEX link_target ON links (target, dataset);
+        INSERT INTO datasets (key) VALUES ('0');
+        INSERT INTO nodes (value) VALUES ('x'), ('y');
+        INSERT INTO links VALUES
+            (1, 1, 2, 'y', 'x', 2),
+            (1, 1, NULL, NULL, 'x', 1),
+            (1, 2, NULL, NULL, 'y', 3);
+    ''')
+    db.commit()
+    storage = SqliteStorage(db=db)
+    assert storage.get_version() == SqliteStorage.VERSION
+    assert 'links_v1' not in storage.get_tables()
+    assert 'link_source' not in get_indexes(storage.cursor)
+    assert sorted(storage.get_links(1, 1)) == [(1, None, None), (2, 'y', 2)]
+    assert storage.get_links(1, 2) == [(3, None, None)]
+    assert storage.get_links(1, 2, True) == [(2, 'x', 1)]
+
+@pytest.mark.parametrize('args,nodes,links,stats', [
+    (
+        (2,),
+        [(1, 'x'), (2, 'y'), (3, 'z')],
+        [(1, 2, 3), (3, 1, 2)],
+        {'states': (3, 2), 'links': (4, 2), 'count': (7, 5)}
+    ),
+    (
+        (3,),
+        [(1, 'x'), (2, 'y')],
+        [(1, 2, 3)],
+        {'states': (3, 1), 'links': (4, 1), 'count': (7, 3)}
+    ),
+    (
+        (1, 1, 1),
+        [(1, 'x'), (2, 'y'), (3, 'z')],
+        [(1, 2, 1), (2, 0, 1), (3, 1, 1)],
+        {'states': (3, 3), 'links': (4, 3), 'count': (7, 3)}
+    )
+])
+def test_sqlite_storage_prune(args, nodes, links, stats):
+    storage = SqliteStorage()
+    storage.add_links([
+        ('0', ('x',), 'y'),
+        ('0', ('x',), 'y'),
+        ('0', ('x',), 'z'),
+        ('0', ('x',), 'y'),
+        ('0', ('y',), None),
+        ('0', ('z',), 'x'),
+        ('0', ('z',), 'x')
+    ])
+    res = storage.prune(*args)
+    for key, value in stats.items():
+        assert res[key] == value
+    assert get_nodes(storage.cursor) == nodes
+    storage.cursor.execute('SELECT source, target, count FROM links')
+    assert sorted(storage.cursor.fetchall()) == links
+    storage.cursor.execute('SELECT value FROM tokens')
+    assert (len(storage.cursor.fetchall())
+            == len(set(x[1] for x in nodes)))
+
+@pytest.mark.parametrize('bulk', [True, False])
+def test_sqlite_storage_add_link_counts(bulk):
+    storage = SqliteStorage(bulk=bulk)
+    storage.add_link_counts([
+        ('0', ('x',), 'y', 2),
+        ('0', ('y',), None, 3),
+        ('0', ('x',), 'y', 1)
+    ])
+    storage.end_bulk()
+    assert storage.get_links(1, 1) == [(3, 'y', 2)]
+    assert storage.get_links(1, 2) == [(3, None, None)]
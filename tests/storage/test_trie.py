@@ -0,0 +1,207 @@
+import random
+from io import StringIO, BytesIO
+from collections import deque
+import pytest
+
+from markovchain import JsonStorage, TrieStorage
+
+
+LINKS = [
+    ('0_ss1', ('x',), 'y'),
+    ('0_ss1', ('x',), 'y'),
+    ('0_ss1', ('x',), 'z'),
+    ('0_ss1', ('y',), None),
+    ('0_ss1', ('z',), 'x'),
+    ('0_ss2', ('', 'x'), 'y'),
+    ('0_ss2', ('x', 'y'), 'z'),
+    ('0_ss2', ('x', 'y'), None),
+    ('0_ss2', ('y', 'z'), 'x'),
+    ('1', ('x', 'y'), 'z')
+]
+
+
+def json_storage(backward=True):
+    storage = JsonStorage(backward=backward)
+    storage.add_links(LINKS)
+    return storage
+
+def trie_storage(backward=True):
+    storage = TrieStorage(backward=backward)
+    storage.add_links(LINKS)
+    return storage
+
+
+@pytest.mark.parametrize('settings,res', [
+    ({}, False),
+    ({'storage': {'backward': True}}, True)
+])
+def test_trie_storage_empty(settings, res):
+    storage = TrieStorage(settings=settings)
+    assert storage.trees == {}
+    assert (storage.backward is not None) == res
+
+def test_trie_storage_get_dataset():
+    storage = TrieStorage(backward=True)
+    with pytest.raises(KeyError):
+        storage.get_dataset('0_ss1')
+    data = storage.get_dataset('0_ss1', True)
+    assert data == ([None, None, None], [None, None, None])
+    assert data[0] is not data[1]
+    assert storage.get_dataset('0_ss2', True)[0] is data[0]
+    assert storage.get_dataset('0', True)[0] is not data[0]
+    assert storage.datasets == {
+        '0_ss1': (('0', True), 1),
+        '0_ss2': (('0', True), 2),
+        '0': (('0', False), None)
+    }
+
+def test_trie_storage_add_links():
+    storage = TrieStorage()
+    storage.add_links([
+        ('0_ss1', ('x',), 'y'),
+        ('0_ss1', ('x',), 'y'),
+        ('0_ss2', ('y', 'x'), 'z'),
+        ('0_ss2', ('z', 'x'), 'y'),
+        ('0_ss2', ('z', 'x'), None)
+    ])
+    assert storage.trees == {
+        ('0', True): [None, None, (
+            'x', [2, 'y', {
+                'y': [1, 'z', None],
+                'z': [[1, 1], ['y', None], None]
+            }]
+        )]
+    }
+    assert storage.backward is None
+
+def test_trie_storage_add_links_backward():
+    storage = TrieStorage(backward=True)
+    storage.add_links([
+        ('0', ('x', 'y'), 'z'),
+        ('0', ('x', 'y'), None),
+        ('0', ('z', 'y'), 'z')
+    ])
+    assert storage.backward == {
+        ('0', False): [None, None, (
+            'y', [None, None, ('z', [[1, 1], ['x', 'z'], None])]
+        )]
+    }
+
+@pytest.mark.parametrize('state,size,res', [
+    ([], 4, ['', '', '', '']),
+    (['ab', 'cd'], 1, ['cd']),
+    (['ab', 'cd'], 3, ['', 'ab', 'cd'])
+])
+def test_trie_storage_get_state(state, size, res):
+    storage = TrieStorage()
+    assert storage.get_state(state, size) == deque(res, maxlen=size)
+
+@pytest.mark.parametrize('dataset,string,res', [
+    ('0_ss1', 'x', ['x']),
+    ('0_ss1', '', ['x', 'y', 'z']),
+    ('0_ss2', 'y', ['x y', 'y z']),
+    ('0_ss2', ' ', [' x', 'x y', 'y z']),
+    ('0_ss2', 'q', []),
+    ('1', 'x', ['x y'])
+])
+def test_trie_storage_get_states(dataset, string, res):
+    storage = trie_storage()
+    test = storage.get_states(dataset, string)
+    assert sorted(test) == res
+    assert sorted(test) == sorted(json_storage().get_states(dataset, string))
+
+@pytest.mark.parametrize('dataset,state,backward', [
+    ('0_ss1', ['x'], False),
+    ('0_ss1', ['y'], False),
+    ('0_ss1', ['q'], False),
+    ('0_ss1', ['x'], True),
+    ('0_ss1', ['z'], True),
+    ('0_ss2', ['', 'x'], False),
+    ('0_ss2', ['x', 'y'], False),
+    ('0_ss2', ['x', 'q'], False),
+    ('0_ss2', ['y', 'z'], True),
+    ('0_ss2', ['z', 'x'], True),
+    ('1', ['x', 'y'], False),
+    ('1', ['y', 'z'], True)
+])
+def test_trie_storage_get_links(dataset, state, backward):
+    storage = trie_storage()
+    json = json_storage()
+    assert (
+        storage.get_links(storage.get_dataset(dataset), state, backward)
+        == json.get_links(json.get_dataset(dataset), state, backward)
+    )
+
+def test_trie_storage_get_links_error():
+    storage = trie_storage(False)
+    with pytest.raises(ValueError):
+        storage.get_links(storage.get_dataset('1'), ['y', 'z'], True)
+
+@pytest.mark.parametrize('args', [
+    (1,), (2,), (3,), (1, 1), (1, None, 1)
+])
+def test_trie_storage_prune(args):
+    storage = trie_storage()
+    json = json_storage()
+    assert storage.prune(*args) == pytest.approx(json.prune(*args))
+    assert storage.to_json() == json
+    assert storage == TrieStorage.from_json(json)
+
+@pytest.mark.parametrize('backward', [True, False])
+def test_trie_storage_json(backward):
+    storage = trie_storage(backward)
+    json = json_storage(backward)
+    assert storage.to_json() == json
+    assert TrieStorage.from_json(json) == storage
+
+def test_trie_storage_save_load():
+    storage = trie_storage()
+    storage.state_separator = ':'
+    fp = StringIO()
+    storage.save(fp)
+    fp.seek(0)
+    loaded = TrieStorage.load(fp)
+    assert loaded == storage
+    assert loaded.state_separator == ':'
+    fp.seek(0)
+    assert JsonStorage.load(fp).get_dataset('0_ss2')[0]['x:y'] == [
+        [1, 1], ['z', None]
+    ]
+
+def test_trie_storage_container():
+    storage = json_storage()
+    storage.container = True
+    fp = BytesIO()
+    storage.save(fp)
+    fp.seek(0)
+    loaded = TrieStorage.load(fp)
+    assert loaded == TrieStorage.from_json(storage)
+    assert loaded.trees == trie_storage().trees
+
+@pytest.mark.parametrize('test,test2,res', [
+    ((), (), True),
+    ((), (True,), False),
+    ((), ({},), True),
+    ((), (None, {'state_separator': ':'}), False)
+])
+def test_trie_storage_eq(test, test2, res):
+    assert (TrieStorage(*test) == TrieStorage(*test2)) == res
+    assert TrieStorage() != JsonStorage()
+    assert trie_storage() == trie_storage()
+    assert trie_storage() != trie_storage(False)
+
+@pytest.mark.parametrize('start,size,dataset,backward', [
+    ((), 1, '0_ss1', False),
+    (('x',), 1, '0_ss1', False),
+    ((), 2, '0_ss2', False),
+    (('x', 'y'), 2, '0_ss2', True),
+    (('x', 'y'), 2, '1', False)
+])
+def test_trie_storage_generate(start, size, dataset, backward):
+    storage = trie_storage()
+    json = json_storage()
+    for seed in range(10):
+        random.seed(seed)
+        res = list(storage.generate(start, size, dataset, backward))
+        random.seed(seed)
+        assert res == list(json.generate(start, size, dataset, backward))
@@ -28,28 +28,67 @@ def test_markov_base_data(data, part, dataset):
     parser.assert_called_once_with(0, part, dataset)
     storage.add_links.assert_called_once_with(1)
 
-@pytest.mark.parametrize('state_sizes, args, call', [
-    ([1], (1, 'x', 'd'), ('x', 1, 'd_1', False)),
-    ([2, 1], (None, 'y', 'dd', True), ('y', 2, 'dd_2', True)),
-    ([], (None, 'y', 'dd'), None)
+@pytest.mark.parametrize('state_sizes, args, call, start', [
+    ([1], (1, 'x', 'd'), ('d_1', 1, False), 'x'),
+    ([2, 1], (None, 'y', 'dd', True), ('dd_2', 2, True), 'y'),
+    ([], (None, 'y', 'dd'), None, None)
 ])
-def test_markov_base_generate(mocker, state_sizes, args, call):
+def test_markov_base_generate(mocker, state_sizes, args, call, start):
     mocker.patch(
         'markovchain.base.state_size_dataset',
         wraps=lambda ss: '_%d' % ss
     )
+    storage = Mock()
+    generator = Mock(return_value=0, storage=storage)
+    storage.generator = Mock(return_value=generator)
     markov = Markov(
         parser=Mock(state_sizes=state_sizes),
         scanner=Mock(),
-        storage=Mock(generate=Mock(return_value=0))
+        storage=storage
     )
     res = markov.generate(*args)
     if call is not None:
         assert res == 0
-        markov.storage.generate.assert_called_with(*call)
+        storage.generator.assert_called_once_with(*call)
+        generator.assert_called_once_with(start)
+        assert markov.generate(*args) == 0
+        assert storage.generator.call_count == 1
+        markov.storage = Mock(generator=Mock(return_value=generator))
+        assert markov.generate(*args) == 0
+        markov.storage.generator.assert_called_once_with(*call)
     else:
         assert res is None
-        assert markov.storage.generate.call_count == 0
+        assert storage.generator.call_count == 0
+
+@pytest.mark.parametrize('state_sizes,args,call', [
+    ([1, 2], (), ((1, 2), '')),
+    ([1, 2], ([3, 1, 3], 'x', 'd', 2), ((1, 3), 'd')),
+    ([], (), None)
+])
+def test_markov_base_generate_backoff(mocker, state_sizes, args, call):
+    index = mocker.patch('markovchain.base.BackoffIndex')
+    index.return_value.return_value = 0
+    index.return_value.storage = storage = Mock()
+    markov = Markov(
+        parser=Mock(state_sizes=state_sizes),
+        scanner=Mock(),
+        storage=storage
+    )
+    res = markov.generate_backoff(*args)
+    if call is None:
+        assert res is None
+        assert index.call_count == 0
+        return
+    assert res == 0
+    index.assert_called_once_with(storage, *call)
+    start = args[1] if len(args) > 1 else ()
+    min_links = args[3] if len(args) > 3 else 1
+    index.return_value.assert_called_once_with(start, min_links)
+    markov.generate_backoff(*args)
+    assert index.call_count == 1
+    markov.data([])
+    markov.generate_backoff(*args)
+    assert index.call_count == 2
 
 def test_markov_base_get_settings_json():
     markov = Markov(
@@ -92,6 +131,16 @@ def test_markov_base_save(mocker):
     storage.save.assert_called_once_with(1)
     markov.get_settings_json.assert_called_once_with() # pylint:disable=no-member
 
+def test_markov_base_checkpoint():
+    markov = Markov(scanner=Mock(), parser=Mock())
+    markov.scanner.checkpoint.return_value = 0
+    markov.parser.checkpoint.return_value = [1]
+    state = markov.checkpoint()
+    assert state == {'scanner': 0, 'parser': [1]}
+    markov.restore(state)
+    markov.scanner.restore.assert_called_once_with(0)
+    markov.parser.restore.assert_called_once_with([1])
+
 def test_markov_base_close():
     storage = Mock(settings={}, close=Mock())
     markov = Markov(
@@ -110,6 +110,24 @@ def test_parser_save_load(test):
     loaded = Parser.load(saved)
     assert parser == loaded
 
+def test_parser_checkpoint():
+    tokens = ['a', 'b', Scanner.END, 'c', 'd', 'e']
+    parser = Parser(state_sizes=[1, 2])
+    res = [(dataset, list(state), next)
+           for dataset, state, next in parser(tokens, True)]
+    parser = Parser(state_sizes=[1, 2])
+    test = [(dataset, list(state), next)
+            for dataset, state, next in parser(tokens[:4], True)]
+    state = parser.checkpoint()
+    assert state == {'state': ['', 'c'], 'end': False}
+    parser = Parser(state_sizes=[1, 2])
+    parser.restore(state)
+    test.extend((dataset, list(state), next)
+                for dataset, state, next in parser(tokens[4:], True))
+    assert test == res
+    with pytest.raises(ValueError):
+        Parser(state_sizes=3).restore(state)
+
 
 def test_level_parser_properties():
     parser = LevelParser()
@@ -179,6 +197,18 @@ def test_level_parser_parse(mocker, test, res):
 def test_level_parser_eq(test, test2, res):
     assert (LevelParser(*test) == LevelParser(*test2)) == res
 
+def test_level_parser_checkpoint():
+    parser = LevelParser(levels=2, parsers=[Parser(), Parser(2)])
+    list(parser([['a'], ['b', 'c']], True))
+    state = parser.checkpoint()
+    assert state == [
+        {'state': ['a'], 'end': False},
+        {'state': ['b', 'c'], 'end': False}
+    ]
+    parser = LevelParser(levels=2, parsers=[Parser(), Parser(2)])
+    parser.restore(state)
+    assert parser.checkpoint() == state
+
 def test_level_parser_save_load():
     level = Parser(state_sizes=[2, 3])
     parser = LevelParser(levels=3, parsers=[level, Parser()])
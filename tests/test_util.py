@@ -1,10 +1,12 @@
+import sys
+import json
 import pytest
 from enum import IntEnum
 
 from markovchain.util import (
     SaveLoad, ObjectWrapper, const,
     fill, load, extend, to_list, truncate,
-    state_size_dataset, level_dataset, int_enum
+    state_size_dataset, level_dataset, int_enum, lazy_import
 )
 
 
@@ -216,3 +218,13 @@ def test_level_dataset(test):
     assert len(res) > 0
     assert res != level_dataset(test - 1)
     assert res != state_size_dataset(test)
+
+
+def test_lazy_import(mocker):
+    assert lazy_import('json') is json
+    assert lazy_import('markovchain_test_missing_module') is None
+    mocker.patch.dict(sys.modules)
+    sys.modules.pop('wave', None)
+    module = lazy_import('wave')
+    assert sys.modules['wave'] is module
+    assert callable(module.open)
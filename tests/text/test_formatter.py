@@ -1,3 +1,4 @@
+import random
 import pytest
 
 from markovchain.text.formatter import Noop, Formatter
@@ -25,6 +26,13 @@ def test_formatter_eq(kwargs, kwargs2, res):
     assert (Formatter(**kwargs) == Formatter(**kwargs2)) == res
 
 
+def test_formatter_shared_replace():
+    fmt = Formatter()
+    fmt2 = Formatter(optimize=False)
+    for (expr, _, _), (expr2, _, _) in zip(fmt.replace, fmt2.replace):
+        assert expr is expr2
+
+
 @pytest.mark.parametrize('kwargs', [
     {},
     {'default_end': '/'},
@@ -62,3 +70,35 @@ def test_formatter_format(kwargs, test, res):
     else:
         with pytest.raises(res):
             Formatter(**kwargs)(test)
+
+
+@pytest.mark.parametrize('kwargs', [
+    {},
+    {'case': 'preserve'},
+    {'default_end': None, 'end_chars': ''}
+])
+def test_formatter_optimize(kwargs):
+    rnd = random.Random(0)
+    chars = 'aZ9_é \t\n  ,.?!;:-+*()[]{}<>\'"/'
+    fmt = Formatter(**kwargs)
+    fmt2 = Formatter(optimize=False, **kwargs)
+    assert fmt.optimize
+    assert not fmt2.optimize
+    assert fmt == fmt2
+    for _ in range(20000):
+        test = ''.join(rnd.choice(chars)
+                       for _ in range(rnd.randint(0, 30)))
+        assert fmt(test) == fmt2(test), repr(test)
+
+
+@pytest.mark.parametrize('kwargs,res', [
+    ({}, True),
+    ({'optimize': False}, False),
+    ({'replace': Formatter.DEFAULT_REPLACE[:-1]}, False),
+    ({'replace': [('.', '')]}, False)
+])
+def test_formatter_optimize_enabled(kwargs, res):
+    assert Formatter(**kwargs).optimize == res
+    assert Formatter.load(Formatter(**kwargs).save()).optimize == (
+        res or 'optimize' in kwargs
+    )
@@ -2,9 +2,10 @@ from unittest.mock import Mock
 import pytest
 
 from markovchain.text import MarkovText, ReplyMode
+from markovchain.text.rank import Test
 from markovchain.scanner import Scanner
 from markovchain.parser import Parser
-from markovchain.storage import JsonStorage
+from markovchain.storage import JsonStorage, Sampling, Constraint, BeamSearch
 
 
 def test_markov_text_data(mocker):
@@ -13,6 +14,16 @@ def test_markov_text_data(mocker):
     assert markov.data([1, 2], True) == 1
     mock.assert_called_once_with([1, 2], True)
 
+@pytest.mark.parametrize('test,res', [
+    ('', []),
+    ('Word', ['word']),
+    ('a, b.', ['a', ',', 'b', '.'])
+])
+def test_markov_text_get_tokens(test, res):
+    markov = MarkovText()
+    assert markov.get_tokens(test) == res
+    assert markov.get_tokens(test) == res
+
 @pytest.mark.parametrize('test,join_with', [
     (['1', '2', '3'], ''),
     (['1', '2', '3'], ' ')
@@ -53,3 +64,123 @@ def test_markov_text_generate(mocker, ss, data, args, res):
     else:
         assert markov(*args) == res
         assert fmt.call_count == 1
+
+@pytest.mark.parametrize('args,res', [
+    ((6,), ['a', 'b', 'c', 'b']),
+    ((6, 1), ['a', 'b', 'c', 'b', 'c', 'b']),
+    ((6, None, None, ReplyMode.END, '', 1), ['a', 'b', 'c', 'b', 'c', 'b']),
+    ((6, 2, 'b', ReplyMode.END, '', 1), ['b', 'c', 'b', 'c', 'b', 'c']),
+    ((6, None, 'b', ReplyMode.START, '', 1), ['b']),
+    ((6, None, 'c', ReplyMode.REPLY, '', 1), ['a', 'b c', 'b', 'c', 'b', 'c']),
+    ((6, None, None, ReplyMode.END, '', 0), ValueError)
+])
+def test_markov_text_backoff(mocker, args, res):
+    mocker.patch(
+        'markovchain.text.MarkovText.format',
+        wraps=list
+    )
+    markov = MarkovText(
+        parser=Parser(state_sizes=[2, 1]),
+        scanner=Scanner(lambda x: x),
+        storage=JsonStorage(backward=True)
+    )
+    markov.data('abcb')
+    if isinstance(res, type):
+        with pytest.raises(res):
+            markov(*args)
+    else:
+        assert markov(*args) == res
+
+@pytest.mark.parametrize('args,res', [
+    ((6,), ['a', 'b', 'a', 'b', 'a', 'b']),
+    ((6, None, 'b', ReplyMode.START), ['a', 'b']),
+    ((4, None, 'b', ReplyMode.REPLY), ['a', 'b', 'a', 'b']),
+    ((6, None, None, ReplyMode.END, '', None, Constraint(forbidden='b')),
+     ['a', 'c']),
+    ((6, None, None, ReplyMode.END, '', 1), ValueError)
+])
+def test_markov_text_sampling(mocker, args, res):
+    mocker.patch(
+        'markovchain.text.MarkovText.format',
+        wraps=list
+    )
+    markov = MarkovText(
+        parser=Parser(state_sizes=[1]),
+        scanner=Scanner(lambda x: x),
+        storage=JsonStorage(backward=True)
+    )
+    markov.data('abac')
+    markov.data('ab')
+    markov.data('ab')
+    sampling = Sampling(top_k=1)
+    if len(args) > 6:
+        args, sampling = args[:6], args[6]
+    if isinstance(res, type):
+        with pytest.raises(res):
+            markov(*args, sampling=sampling)
+    else:
+        assert markov(*args, sampling=sampling) == res
+
+@pytest.mark.parametrize('args,res', [
+    ((6,), ['a', 'b']),
+    ((1,), ['a']),
+    ((6, None, 'c', ReplyMode.END), ['c']),
+    ((6, None, 'a', ReplyMode.END), ['a', 'b']),
+    ((6, None, 'b', ReplyMode.START), ['a', 'b']),
+    ((6, None, 'b', ReplyMode.REPLY), ['a', 'b']),
+    ((6, None, 'q', ReplyMode.REPLY), ['a', 'b']),
+    ((6, None, None, ReplyMode.END, '', 1), ValueError),
+    ((6, None, None, ReplyMode.END, '', None, Sampling()), ValueError)
+])
+def test_markov_text_beam(mocker, args, res):
+    mocker.patch(
+        'markovchain.text.MarkovText.format',
+        wraps=list
+    )
+    markov = MarkovText(
+        parser=Parser(state_sizes=[1]),
+        scanner=Scanner(lambda x: x),
+        storage=JsonStorage(backward=True)
+    )
+    for data in (['a', 'b', None], ['a', 'b', None], ['a', 'b', 'a', 'c']):
+        markov.data(data)
+    beam = BeamSearch(2, 0)
+    if isinstance(res, type):
+        with pytest.raises(res):
+            markov(*args, beam=beam)
+    else:
+        assert markov(*args, beam=beam) == res
+
+@pytest.mark.parametrize('max_words,test,res', [
+    (None, ['a', 'b'], ['a', 'b']),
+    (2, ['a', ',', 'b'], ['a', ',', 'b']),
+    (2, ['a', 'b c'], None),
+    (2, iter(['a', 'b', 'c']), None)
+])
+def test_markov_text_limit_words(max_words, test, res):
+    markov = MarkovText(rank=Test(10, 0.5, max_words=max_words))
+    parts = markov.limit_words(test)
+    if res is None:
+        assert parts is None
+    else:
+        assert list(parts) == res
+
+@pytest.mark.parametrize('max_words,res', [
+    (None, 'a b c'),
+    (3, 'a b c'),
+    (2, 'a b c')
+])
+def test_markov_text_max_words(mocker, max_words, res):
+    fmt = mocker.patch(
+        'markovchain.text.MarkovText.format',
+        wraps=' '.join
+    )
+    markov = MarkovText(
+        parser=Parser(state_sizes=[1]),
+        scanner=Scanner(lambda x: x),
+        rank=Test(10, 0.5, max_words=max_words)
+    )
+    markov.data(['a', 'b', 'c'])
+    assert markov() == res
+    assert markov.rank.max_words == max_words
+    assert fmt.call_count == markov.rank.size
@@ -0,0 +1,90 @@
+import random
+import pytest
+
+from markovchain.text import rank
+from markovchain.text.rank import Rank, Const, Test
+
+
+@pytest.mark.parametrize('remove,test,res', [
+    (0.5, [], []),
+    (0.5, ['a'], ['a']),
+    (0.5, ['a b c', 'a', 'a b'], ['a b c', 'a b']),
+    (0.0, ['a', 'a b c', 'a b', 'x y z'], ['a b c', 'x y z', 'a b', 'a']),
+    (1.0, ['a', 'a b c', 'a b', 'x y z'], ['a b c'])
+])
+def test_rank_call(mocker, remove, test, res):
+    mocker.patch.object(Const, 'rank_many',
+                        lambda self, strings: [len(s) for s in strings])
+    fmt = Const()
+    fmt.remove = remove
+    assert fmt(iter(test)) == res
+
+
+def test_rank_const():
+    assert Const().rank_many(['a', 'b']) == [1, 1]
+    assert Const()(['b', 'a']) == ['b', 'a']
+
+@pytest.mark.parametrize('kwargs', [
+    {},
+    {'threshold': 1, 'max_words': 8},
+    {'size': 4, 'remove': 0.5, 'max_words': 2}
+])
+def test_rank_const_save_load(kwargs):
+    const = Const(**kwargs)
+    data = const.save()
+    loaded = Rank.load(data)
+    assert isinstance(loaded, Const)
+    assert loaded.save() == data
+    for key, value in kwargs.items():
+        assert getattr(loaded, key) == value
+
+def test_rank_const_error():
+    with pytest.raises(TypeError):
+        Const(max_word=8)
+
+
+@pytest.mark.parametrize('numpy', [True, False])
+def test_rank_test_rank_many(mocker, numpy):
+    if not numpy:
+        mocker.patch.object(rank, 'np', None)
+    elif rank.np is None:
+        pytest.skip('numpy is not installed')
+    rnd = random.Random(0)
+    words = ['a', 'bb', 'ccc', 'dddd', 'eeeee', 'ffffffff']
+    strings = [
+        ' '.join(rnd.choice(words) for _ in range(rnd.randint(1, 20)))
+        for _ in range(200)
+    ]
+    test = Test(10, 0.5)
+    ranks = test.rank_many(strings)
+    assert ranks == pytest.approx([test.rank(s) for s in strings])
+    with pytest.raises(ZeroDivisionError):
+        test.rank_many(strings + ['.'])
+
+
+def test_rank_threshold(mocker):
+    mocker.patch.object(Test, 'rank', lambda self, string: len(string) / 10)
+    rank = Test(10, 0.5, threshold=0.5)
+    strings = iter(['a', 'abc', 'abcde', 'x', 'y'])
+    assert rank(strings) == ['abcde']
+    assert list(strings) == ['x', 'y']
+    rank.threshold = 1
+    assert rank(['a', 'abc', 'ab']) == ['abc', 'ab']
+
+
+@pytest.mark.parametrize('kwargs', [
+    {},
+    {'threshold': 0.5},
+    {'max_words': 5}
+])
+def test_rank_save_load(kwargs):
+    rank = Test(10, 0.5, **kwargs)
+    loaded = Test.load(rank.save())
+    assert (loaded.threshold, loaded.max_words) == (
+        rank.threshold, rank.max_words
+    )
+
+
+def test_rank_max_words_error():
+    with pytest.raises(ValueError):
+        Test(10, 0.5, max_words=0)
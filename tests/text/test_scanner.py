@@ -122,3 +122,21 @@ def test_regexp_scanner_save_load(test):
     saved = scanner.save()
     loaded = Scanner.load(saved)
     assert scanner == loaded
+
+@pytest.mark.parametrize('scanner,data', [
+    (CharScanner, ['ab', '.', 'c', '']),
+    (CharScanner, ['', 'a', 'b.', '']),
+    (RegExpScanner, ['ab c', '. d', 'e', '']),
+    (RegExpScanner, ['.', 'a.', 'b', ''])
+])
+def test_scanner_checkpoint(scanner, data):
+    scan = scanner()
+    res = [list(scan(part, i < len(data) - 1)) for i, part in enumerate(data)]
+    scan = scanner()
+    test = []
+    for i, part in enumerate(data):
+        state = scan.checkpoint()
+        scan = scanner()
+        scan.restore(state)
+        test.append(list(scan(part, i < len(data) - 1)))
+    assert test == res
@@ -3,7 +3,7 @@ import pytest
 
 from markovchain.text.util import (
     CharCase, ispunct, capitalize, lstrip_ws_and_chars,
-    re_flags, re_flags_str, re_sub, get_words, ReFlags
+    re_flags, re_flags_str, re_sub, re_compile, get_words, ReFlags
 )
 
 
@@ -80,7 +80,22 @@ def test_re_flags_str(test, res):
     (('x+', 'y', 'xxzxxx'), 'yzy'),
     (('x+', 'y', 'xxzxxx', 1), 'yzxxx'),
     (('xx', 'y', 'xxzXXX', 0, re.I), 'yzyX'),
-    (('xx', 'x', 'xxzXXX', 0, re.I, ReFlags.O), 'xzx')
+    (('xx', 'x', 'xxzXXX', 0, re.I, ReFlags.O), 'xzx'),
+    ((re.compile('x'), 'y', 'xX', 0, re.I), ValueError),
+    ((re.compile(r'(\w)-(\w)'), r'\1 - \2', 'a-b-c', 0, 0, ReFlags.O),
+     'a - b - c')
 ])
 def test_re_sub(test, res):
-    assert re_sub(*test) == res
+    if isinstance(res, type):
+        with pytest.raises(res):
+            re_sub(*test)
+    else:
+        assert re_sub(*test) == res
+
+
+def test_re_compile():
+    expr = re_compile('x+', re.I)
+    assert expr.pattern == 'x+'
+    assert expr.flags & re.I
+    assert re_compile('x+', re.I) is expr
+    assert re_compile('x+') is not expr